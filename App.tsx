@@ -1,90 +1,193 @@
 
-import React, { useState, useEffect, useRef } from 'react';
-import { FarmlandTask, Marker, MarkerType, Point, PlotRange, AppState } from './types';
+import React, { useState, useEffect, useRef, useCallback, useMemo, lazy, Suspense } from 'react';
+import { FarmlandTask, Marker, MarkerType, Point, PlotRange, AppState, InspectionData, PhotoRef } from './types';
 import { WellIcon, InletIcon, SeriesInletIcon, StarIcon, DrawIcon, PlusIcon } from './components/Icons';
+import { PhotoThumb } from './components/PhotoThumb';
+import { VirtualTaskGrid, useScrollRestoration } from './components/VirtualTaskGrid';
+import { useMarkerDrag } from './components/useMarkerDrag';
+import { CanvasMapLayer, shouldUseCanvas } from './components/CanvasMapLayer';
+import { Profiled } from './components/DevProfiler';
+import { loadProject, TaskPersistence, DEFAULT_PROJECT_NAME } from './services/storage';
+import { taskStore, useTask, useTaskIds, TaskUpdate } from './services/taskStore';
+import { searchIndex, useDebouncedValue, useSearchIndexVersion } from './services/searchIndex';
+import { importTasksFromFile, importTasksFromText, ImportProgress } from './services/csvImport';
+import { putPhoto } from './services/photoStore';
+import { exportProjectArchive, readProjectArchive, ArchiveFormatError } from './services/projectArchive';
+import { processImages, getImageOptions, setImageOptions, ImageOptions } from './services/imagePipeline';
+import { analyzeTaskPhotos, AnalysisProgress } from './services/analysisQueue';
+import { taskHistory, useTaskHistory, useBatchHistory } from './services/history';
+import { applyBatch, BatchOperation, FormTemplate } from './services/batchOps';
+import { getTaskMetrics, getCalibration, setCalibration, simplifyPolygon, formatArea, useCalibrationVersion } from './services/geometry';
+import './services/aggregates';
+import { recordWrite, PROFILING } from './services/profiler';
+import { syncOutbox, useSyncStatus, getSyncEndpoint, setSyncEndpoint } from './services/syncOutbox';
+import { useBaseImageReady, prefetchBaseImages, PrefetchProgress, getCacheBudget, setCacheBudget, getCacheUsage } from './services/imageCache';
+
+// 儀表板含 recharts，開啟時才載入。
+const DashboardView = lazy(() => import('./components/DashboardView').then(m => ({ default: m.DashboardView })));
 
 const App: React.FC = () => {
-  const [state, setState] = useState<AppState>(() => {
-    const saved = localStorage.getItem('farmland_app_v4');
-    return saved ? JSON.parse(saved) : {
-      projectName: '115年度農地現勘專案',
-      tasks: [],
-      view: 'list',
-      isEditingMap: true
-    };
+  const [state, setState] = useState<AppState>({
+    projectName: DEFAULT_PROJECT_NAME,
+    view: 'list',
+    isEditingMap: true
   });
+  const [loaded, setLoaded] = useState(false);
+  const [persistence] = useState(() => new TaskPersistence(400, PROFILING ? recordWrite : undefined));
+  // 清單的檢索條件與捲動位置一併保存在此，返回清單時還原的位置才會對應同一份結果。
+  const listScrollRef = useRef(0);
+  const [listFilters, setListFilters] = useState<ListFilters>(EMPTY_FILTERS);
+  const currentTask = useTask(state.currentTaskId);
+
+  useEffect(() => {
+    let cancelled = false;
+    let unsubscribe = () => {};
+    let stopSync = () => {};
+    loadProject()
+      .then(saved => {
+        if (cancelled) return;
+        if (saved) {
+          const { tasks, ...meta } = saved;
+          persistence.prime(saved);
+          taskStore.replaceAll(tasks);
+          setState(meta);
+        }
+        unsubscribe = taskStore.onChange(event => persistence.trackTasks(event, taskStore.getIds()));
+        setLoaded(true);
+        syncOutbox.start()
+          .then(stop => { if (cancelled) stop(); else stopSync = stop; })
+          .catch(err => console.error('Starting sync failed:', err));
+      })
+      .catch(err => {
+        console.error('Loading project failed:', err);
+        if (!cancelled) setLoaded(true);
+      });
+    return () => {
+      cancelled = true;
+      unsubscribe();
+      stopSync();
+    };
+  }, []);
 
   useEffect(() => {
-    localStorage.setItem('farmland_app_v4', JSON.stringify(state));
-  }, [state]);
+    if (loaded) persistence.trackMeta(state);
+  }, [loaded, state]);
 
-  const currentTask = state.tasks.find(t => t.id === state.currentTaskId);
+  useEffect(() => {
+    const flush = () => {
+      persistence.flush();
+      taskHistory.flush();
+    };
+    const onVisibility = () => { if (document.visibilityState === 'hidden') flush(); };
+    window.addEventListener('pagehide', flush);
+    document.addEventListener('visibilitychange', onVisibility);
+    return () => {
+      window.removeEventListener('pagehide', flush);
+      document.removeEventListener('visibilitychange', onVisibility);
+    };
+  }, []);
 
-  const updateTask = (updates: Partial<FarmlandTask>) => {
-    setState(prev => ({
-      ...prev,
-      tasks: prev.tasks.map(t => t.id === state.currentTaskId ? { ...t, ...updates } : t)
-    }));
-  };
+  const updateTask = useCallback((update: TaskUpdate) => {
+    if (state.currentTaskId) taskHistory.update(state.currentTaskId, update);
+  }, [state.currentTaskId]);
 
-  const handleExportProject = () => {
-    const dataStr = JSON.stringify(state);
-    const dataUri = 'data:application/json;charset=utf-8,' + encodeURIComponent(dataStr);
-    const exportFileDefaultName = `${state.projectName}_${new Date().toISOString().slice(0,10)}.farmland`;
-    const linkElement = document.createElement('a');
-    linkElement.setAttribute('href', dataUri);
-    linkElement.setAttribute('download', exportFileDefaultName);
-    linkElement.click();
+  // 批次操作為單次任務庫異動；隨即寫出，整批在同一個 IndexedDB 交易中完成。
+  const runBatch = useCallback((ids: string[], op: BatchOperation) => {
+    const changed = applyBatch(ids, op);
+    if (changed > 0) persistence.flush();
+    return changed;
+  }, []);
+
+  const selectTask = useCallback((id: string) => {
+    setState(p => ({ ...p, currentTaskId: id, view: 'editor', isEditingMap: true }));
+  }, []);
+
+  const handleExportProject = async () => {
+    try {
+      const archive = await exportProjectArchive(state, taskStore.getAll());
+      const url = URL.createObjectURL(archive);
+      const exportFileDefaultName = `${state.projectName}_${new Date().toISOString().slice(0,10)}.farmland`;
+      const linkElement = document.createElement('a');
+      linkElement.setAttribute('href', url);
+      linkElement.setAttribute('download', exportFileDefaultName);
+      linkElement.click();
+      setTimeout(() => URL.revokeObjectURL(url), 60000);
+    } catch (err) {
+      console.error('Export failed:', err);
+      alert('匯出失敗，請稍後再試。');
+    }
   };
 
-  const handleImportProject = (e: React.ChangeEvent<HTMLInputElement>) => {
+  const handleImportProject = async (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
+    e.target.value = '';
     if (file) {
-      const reader = new FileReader();
-      reader.onload = (event) => {
-        try {
-          const importedState = JSON.parse(event.target?.result as string);
-          setState({ ...importedState, view: 'list' });
-          alert('專案載入成功！');
-        } catch (err) {
-          alert('匯入失敗，請確認檔案格式是否正確。');
-        }
-      };
-      reader.readAsText(file);
+      try {
+        const { tasks, ...importedState } = await readProjectArchive(file);
+        taskStore.replaceAll(tasks);
+        setListFilters(EMPTY_FILTERS);
+        listScrollRef.current = 0;
+        setState({ ...importedState, currentTaskId: undefined, view: 'list' });
+        alert('專案載入成功！');
+      } catch (err) {
+        console.error('Import failed:', err);
+        alert(err instanceof ArchiveFormatError ? '匯入失敗：檔案不是有效的專案檔或已損毀。' : '匯入失敗，請稍後再試。');
+      }
     }
   };
 
+  if (!loaded) return <div>系統載入中...</div>;
+
   if (state.view === 'setup') {
     return (
-      <SetupView 
-        state={state} 
-        setState={setState} 
-        onBack={() => setState(p => ({ ...p, view: 'list' }))}
-        onExport={handleExportProject}
-      />
+      <Profiled id="SetupView">
+        <SetupView 
+          onBack={() => setState(p => ({ ...p, view: 'list' }))}
+          onExport={handleExportProject}
+        />
+      </Profiled>
+    );
+  }
+
+  if (state.view === 'dashboard') {
+    return (
+      <Suspense fallback={<div>系統載入中...</div>}>
+        <Profiled id="DashboardView">
+          <DashboardView projectName={state.projectName} onBack={() => setState(p => ({ ...p, view: 'list' }))} />
+        </Profiled>
+      </Suspense>
     );
   }
 
   if (state.view === 'list') {
     return (
-      <TaskListView 
-        state={state}
-        onSelect={(id) => setState(p => ({ ...p, currentTaskId: id, view: 'editor', isEditingMap: true }))} 
-        onGoToSetup={() => setState(p => ({ ...p, view: 'setup' }))}
-        onImport={handleImportProject}
-      />
+      <Profiled id="TaskListView">
+        <TaskListView 
+          projectName={state.projectName}
+          scrollRef={listScrollRef}
+          filters={listFilters}
+          onFiltersChange={setListFilters}
+          onSelect={selectTask} 
+          onGoToSetup={() => setState(p => ({ ...p, view: 'setup' }))}
+          onGoToDashboard={() => setState(p => ({ ...p, view: 'dashboard' }))}
+          onImport={handleImportProject}
+          onBatch={runBatch}
+        />
+      </Profiled>
     );
   }
 
   if (state.view === 'editor' && currentTask) {
     return (
-      <EditorView 
-        task={currentTask} 
-        isEditingMap={state.isEditingMap}
-        onBack={() => setState(p => ({ ...p, view: 'list', currentTaskId: undefined }))}
-        onUpdate={updateTask}
-        toggleMapEdit={() => setState(p => ({ ...p, isEditingMap: !p.isEditingMap }))}
-      />
+      <Profiled id="EditorView">
+        <EditorView 
+          task={currentTask} 
+          isEditingMap={state.isEditingMap}
+          onBack={() => setState(p => ({ ...p, view: 'list', currentTaskId: undefined }))}
+          onUpdate={updateTask}
+          toggleMapEdit={() => setState(p => ({ ...p, isEditingMap: !p.isEditingMap }))}
+        />
+      </Profiled>
     );
   }
 
@@ -93,42 +196,57 @@ const App: React.FC = () => {
 
 // --- 管理中心視圖 ---
 const SetupView: React.FC<{ 
-  state: AppState, 
-  setState: React.Dispatch<React.SetStateAction<AppState>>, 
   onBack: () => void,
   onExport: () => void
-}> = ({ state, setState, onBack, onExport }) => {
+}> = ({ onBack, onExport }) => {
   const [importText, setImportText] = useState('');
+  const [imageOptions, setImageOptionsState] = useState<ImageOptions>(getImageOptions);
+
+  const updateImageOptions = (options: Partial<ImageOptions>) => {
+    setImageOptions(options);
+    setImageOptionsState(getImageOptions());
+  };
+
+  const [cacheBudget, setCacheBudgetState] = useState(getCacheBudget);
+  const cacheUsage = getCacheUsage();
+
+  const updateCacheBudget = (bytes: number) => {
+    setCacheBudgetState(bytes);
+    setCacheBudget(bytes).catch(err => console.error('Applying cache budget failed:', err));
+  };
+
+  const [importProgress, setImportProgress] = useState<ImportProgress | null>(null);
+  const csvInputRef = useRef<HTMLInputElement>(null);
+
+  const summarize = (p: ImportProgress) =>
+    `已匯入 ${p.imported} 筆現勘對象` +
+    (p.duplicates ? `，略過重複編號 ${p.duplicates} 筆` : '') +
+    (p.errors.length ? `，${p.errors.length} 列格式錯誤` : '');
 
   const handleBatchImport = () => {
+    if (!importText.trim()) return;
+    const result = importTasksFromText(importText);
+    setImportProgress(result);
+    if (result.errors.length === 0) setImportText('');
+    alert(summarize(result));
+  };
+
+  const handleCsvFile = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!file) return;
     try {
-      const lines = importText.trim().split('\n');
-      const newTasks: FarmlandTask[] = lines.map((line, i) => {
-        const [code, owner, baseImage] = line.split(',').map(s => s?.trim());
-        return {
-          id: `task-${Date.now()}-${i}`,
-          code: code || `P${String(i+1).padStart(4, '0')}`,
-          year: '115',
-          owner: owner || '未知業主',
-          baseImage: baseImage || `https://picsum.photos/seed/${i}/1200/800`,
-          status: 'PENDING',
-          markers: [],
-          ranges: [],
-          formData: {
-            irrigationMethods: [],
-            landStatus: [],
-            photos: { irrigation: [], land: [], surrounding: [] }
-          }
-        };
-      });
-      setState(prev => ({ ...prev, tasks: [...prev.tasks, ...newTasks] }));
-      setImportText('');
-      alert(`已匯入 ${newTasks.length} 筆現勘對象`);
-    } catch (e) {
-      alert('匯入格式錯誤。請確保為：編號,業主,網址');
+      const result = await importTasksFromFile(file, setImportProgress);
+      alert(summarize(result));
+    } catch (err) {
+      console.error('CSV import failed:', err);
+      alert('匯入失敗，無法讀取此檔案。');
+      setImportProgress(null);
     }
   };
 
+  const importing = importProgress !== null && !importProgress.done;
+
   return (
     <div className="min-h-screen bg-slate-50 p-6 sm:p-10">
       <div className="max-w-3xl mx-auto space-y-8">
@@ -158,10 +276,42 @@ const SetupView: React.FC<{
               />
               <button 
                 onClick={handleBatchImport}
-                className="w-full bg-slate-800 text-white font-black py-4 rounded-2xl hover:bg-slate-900 transition-all shadow-lg"
+                disabled={importing}
+                className="w-full bg-slate-800 text-white font-black py-4 rounded-2xl hover:bg-slate-900 transition-all shadow-lg disabled:opacity-50"
               >
                 確認匯入並新增至清單
               </button>
+              <button 
+                onClick={() => csvInputRef.current?.click()}
+                disabled={importing}
+                className="w-full bg-white border-2 border-slate-200 text-slate-600 font-black py-4 rounded-2xl hover:bg-slate-50 transition-all disabled:opacity-50"
+              >
+                選擇 CSV 檔案匯入 (支援 UTF-8 / Big5)
+              </button>
+              <input type="file" ref={csvInputRef} className="hidden" accept=".csv,.txt,text/csv" onChange={handleCsvFile} />
+
+              {importProgress && (
+                <div className="bg-slate-50 rounded-2xl p-5 space-y-3">
+                  <div className="h-2 bg-slate-200 rounded-full overflow-hidden">
+                    <div
+                      className="h-full bg-emerald-500 transition-all"
+                      style={{ width: `${importProgress.totalBytes ? Math.round(importProgress.bytesRead / importProgress.totalBytes * 100) : 100}%` }}
+                    />
+                  </div>
+                  <p className="text-sm font-bold text-slate-600">
+                    {importing ? '匯入中… ' : ''}{summarize(importProgress)}
+                    {importProgress.encoding && <span className="text-slate-400"> ({importProgress.encoding})</span>}
+                  </p>
+                  {importProgress.errors.length > 0 && (
+                    <ul className="text-xs font-mono text-rose-600 max-h-40 overflow-y-auto space-y-1">
+                      {importProgress.errors.slice(0, 100).map(err => (
+                        <li key={err.line}>第 {err.line} 行：{err.message}</li>
+                      ))}
+                      {importProgress.errors.length > 100 && <li>…其餘 {importProgress.errors.length - 100} 筆錯誤未列出</li>}
+                    </ul>
+                  )}
+                </div>
+              )}
             </div>
           </section>
 
@@ -181,10 +331,52 @@ const SetupView: React.FC<{
             </button>
           </section>
 
+          <SyncSettings />
+
+          <section className="bg-white p-8 rounded-[2rem] shadow-sm border border-slate-100">
+            <h2 className="text-xl font-bold text-slate-800 mb-6">照片處理設定</h2>
+            <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+              <label className="block text-sm font-bold text-slate-500">
+                存檔解析度上限
+                <select
+                  className="mt-2 w-full border-2 border-slate-100 bg-slate-50 rounded-2xl p-3 text-sm outline-none focus:border-emerald-500"
+                  value={imageOptions.maxSize}
+                  onChange={e => updateImageOptions({ maxSize: Number(e.target.value) })}
+                >
+                  <option value={1280}>1280 px</option>
+                  <option value={2048}>2048 px</option>
+                  <option value={3072}>3072 px</option>
+                  <option value={0}>保留原始尺寸</option>
+                </select>
+              </label>
+              <label className="block text-sm font-bold text-slate-500">
+                存檔格式
+                <select
+                  className="mt-2 w-full border-2 border-slate-100 bg-slate-50 rounded-2xl p-3 text-sm outline-none focus:border-emerald-500"
+                  value={imageOptions.type}
+                  onChange={e => updateImageOptions({ type: e.target.value as ImageOptions['type'] })}
+                >
+                  <option value="image/jpeg">JPEG</option>
+                  <option value="image/webp">WebP</option>
+                </select>
+              </label>
+              <label className="block text-sm font-bold text-slate-500 sm:col-span-2">
+                離線底圖容量上限（目前 {cacheUsage.count} 張，約 {Math.round(cacheUsage.bytes / 1048576)} MB）
+                <select
+                  className="mt-2 w-full border-2 border-slate-100 bg-slate-50 rounded-2xl p-3 text-sm outline-none focus:border-emerald-500"
+                  value={cacheBudget}
+                  onChange={e => updateCacheBudget(Number(e.target.value))}
+                >
+                  {[100, 300, 500, 1000].map(mb => <option key={mb} value={mb * 1024 * 1024}>{mb} MB</option>)}
+                </select>
+              </label>
+            </div>
+          </section>
+
           <section className="bg-rose-50 p-8 rounded-[2rem] border border-rose-100">
             <h2 className="text-lg font-bold text-rose-800 mb-4">重置區域</h2>
             <button 
-              onClick={() => { if(confirm('確定要清空目前所有任務嗎？')) setState(p => ({ ...p, tasks: [] })) }}
+              onClick={() => { if(confirm('確定要清空目前所有任務嗎？')) taskStore.replaceAll([]) }}
               className="text-rose-600 font-bold hover:underline"
             >
               清空目前資料庫所有任務
@@ -196,26 +388,110 @@ const SetupView: React.FC<{
   );
 };
 
+// 同步設定：填入伺服器網址後，已完成的任務會在連線時自動上傳差異。
+const SyncSettings: React.FC = () => {
+  const [endpoint, setEndpoint] = useState(getSyncEndpoint);
+  const status = useSyncStatus();
+
+  const handleSave = () => {
+    setSyncEndpoint(endpoint);
+    setEndpoint(getSyncEndpoint());
+    syncOutbox.sync();
+  };
+
+  return (
+    <section className="bg-white p-8 rounded-[2rem] shadow-sm border border-slate-100">
+      <h2 className="text-xl font-bold text-slate-800 mb-6">結果同步</h2>
+      <div className="flex gap-3">
+        <input
+          type="url"
+          placeholder="https://sync.example.gov.tw"
+          className="flex-1 border-2 border-slate-100 bg-slate-50 rounded-2xl p-3 text-sm outline-none focus:border-emerald-500"
+          value={endpoint}
+          onChange={e => setEndpoint(e.target.value)}
+        />
+        <button onClick={handleSave} className="bg-slate-800 text-white px-6 rounded-2xl text-sm font-black hover:bg-slate-900 transition-all">
+          儲存並同步
+        </button>
+      </div>
+      <p className="text-xs font-bold text-slate-400 mt-4">
+        {status.syncing ? '同步中…' : `待上傳 ${status.pending} 筆`}
+        {status.lastSyncedAt && `，上次同步 ${new Date(status.lastSyncedAt).toLocaleTimeString()}`}
+      </p>
+      {status.error && <p className="text-xs font-bold text-rose-500 mt-2">同步失敗，稍後自動重試：{status.error}</p>}
+    </section>
+  );
+};
+
 // --- 任務清單視圖 ---
+interface ListFilters {
+  search: string;
+  status: FarmlandTask['status'] | '';
+  year: string;
+}
+
+const EMPTY_FILTERS: ListFilters = { search: '', status: '', year: '' };
+
 const TaskListView: React.FC<{ 
-  state: AppState, 
+  projectName: string, 
+  scrollRef: React.MutableRefObject<number>,
+  filters: ListFilters,
+  onFiltersChange: React.Dispatch<React.SetStateAction<ListFilters>>,
   onSelect: (id: string) => void, 
   onGoToSetup: () => void,
-  onImport: (e: React.ChangeEvent<HTMLInputElement>) => void
-}> = ({ state, onSelect, onGoToSetup, onImport }) => {
-  const [search, setSearch] = useState('');
-  const filtered = state.tasks.filter(t => t.code.includes(search) || t.owner.includes(search));
+  onGoToDashboard: () => void,
+  onImport: (e: React.ChangeEvent<HTMLInputElement>) => void,
+  onBatch: (ids: string[], op: BatchOperation) => number
+}> = ({ projectName, scrollRef, filters, onFiltersChange, onSelect, onGoToSetup, onGoToDashboard, onImport, onBatch }) => {
+  const { search, status: statusFilter, year: yearFilter } = filters;
+  const query = useDebouncedValue(search, 150);
+  const ids = useTaskIds();
+  // 只在檢索欄位（編號、業主、狀態、年度）或任務清單改變時重新篩選與繪製。
+  const indexVersion = useSearchIndexVersion();
+  const filtered = useMemo(
+    () => searchIndex.query({ text: query, status: statusFilter || undefined, year: yearFilter || undefined }),
+    [query, statusFilter, yearFilter, indexVersion]
+  );
+  const completed = searchIndex.facetCount('status', 'COMPLETED');
+  const years = useMemo(() => searchIndex.facetValues('year'), [indexVersion]);
   const fileInputRef = useRef<HTMLInputElement>(null);
+  const syncStatus = useSyncStatus();
+  const [prefetch, setPrefetch] = useState<PrefetchProgress | null>(null);
+  const prefetching = !!prefetch && prefetch.done + prefetch.failed < prefetch.total;
+  const [selected, setSelected] = useState<Set<string> | null>(null);
+  const batchHistory = useBatchHistory();
+  useScrollRestoration(scrollRef);
+
+  const toggleSelected = useCallback((id: string) => {
+    setSelected(prev => {
+      const next = new Set(prev);
+      if (next.has(id)) next.delete(id);
+      else next.add(id);
+      return next;
+    });
+  }, []);
+
+  // 出發前預載目前篩選結果（今日路線）的底圖，現場訊號不佳時仍可開啟地圖。
+  const handlePrefetch = async () => {
+    const urls = filtered.map(id => taskStore.getTask(id)?.baseImage || '');
+    const result = await prefetchBaseImages(urls, setPrefetch);
+    if (result.failed > 0) alert(`${result.failed} 張底圖下載失敗，請於訊號良好處重試。`);
+  };
 
   return (
-    <div className="min-h-screen bg-slate-50 p-6 sm:p-10">
+    <div className={`min-h-screen bg-slate-50 p-6 sm:p-10 ${selected ? 'pb-48 sm:pb-48' : ''}`}>
       <div className="max-w-5xl mx-auto space-y-8">
         <header className="flex flex-col sm:flex-row justify-between items-start sm:items-center gap-6">
           <div>
-            <h1 className="text-4xl font-black text-slate-800 tracking-tight">{state.projectName}</h1>
+            <h1 className="text-4xl font-black text-slate-800 tracking-tight">{projectName}</h1>
             <div className="flex items-center gap-3 mt-2">
                <span className="bg-emerald-100 text-emerald-700 text-[10px] font-black px-2 py-0.5 rounded uppercase tracking-widest">目前進度</span>
-               <p className="text-slate-500 text-sm font-bold">{state.tasks.filter(t => t.status === 'COMPLETED').length} / {state.tasks.length} 筆已完成</p>
+               <p className="text-slate-500 text-sm font-bold">{completed} / {ids.length} 筆已完成</p>
+               {getSyncEndpoint() && syncStatus.pending > 0 && (
+                 <span className="bg-amber-50 text-amber-600 text-[10px] font-black px-2 py-0.5 rounded uppercase tracking-widest">
+                   {syncStatus.syncing ? '同步中' : `${syncStatus.pending} 筆待同步`}
+                 </span>
+               )}
             </div>
           </div>
           <div className="flex gap-3">
@@ -227,6 +503,13 @@ const TaskListView: React.FC<{
               載入專案檔
             </button>
             <input type="file" ref={fileInputRef} className="hidden" accept=".farmland" onChange={onImport} />
+            <button 
+              onClick={onGoToDashboard}
+              className="bg-white border-2 border-slate-200 text-slate-600 px-6 py-3 rounded-2xl text-sm font-black shadow-sm hover:bg-slate-50 transition-all flex items-center gap-2"
+            >
+              <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={2.5} stroke="currentColor" className="w-4 h-4"><path strokeLinecap="round" strokeLinejoin="round" d="M3 13.125C3 12.504 3.504 12 4.125 12h2.25c.621 0 1.125.504 1.125 1.125v6.75C7.5 20.496 6.996 21 6.375 21h-2.25A1.125 1.125 0 0 1 3 19.875v-6.75ZM9.75 8.625c0-.621.504-1.125 1.125-1.125h2.25c.621 0 1.125.504 1.125 1.125v11.25c0 .621-.504 1.125-1.125 1.125h-2.25a1.125 1.125 0 0 1-1.125-1.125V8.625ZM16.5 4.125c0-.621.504-1.125 1.125-1.125h2.25C20.496 3 21 3.504 21 4.125v15.75c0 .621-.504 1.125-1.125 1.125h-2.25a1.125 1.125 0 0 1-1.125-1.125V4.125Z" /></svg>
+              統計儀表板
+            </button>
             <button 
               onClick={onGoToSetup}
               className="bg-slate-800 text-white px-6 py-3 rounded-2xl text-sm font-black shadow-lg hover:bg-slate-900 transition-all flex items-center gap-2"
@@ -248,11 +531,69 @@ const TaskListView: React.FC<{
             placeholder="輸入編號、業主或關鍵字進行檢索..." 
             className="w-full bg-white border-2 border-slate-100 rounded-3xl py-5 pl-14 pr-6 outline-none focus:border-emerald-500 focus:ring-4 focus:ring-emerald-50/50 shadow-sm transition-all font-medium text-slate-700"
             value={search}
-            onChange={e => setSearch(e.target.value)}
+            onChange={e => onFiltersChange(f => ({ ...f, search: e.target.value }))}
           />
         </div>
 
-        {state.tasks.length === 0 ? (
+        <div className="flex flex-wrap items-center gap-3">
+          {([['', '全部'], ['PENDING', '待處理'], ['COMPLETED', '已完成'], ['EDITING', '修正中']] as const).map(([value, label]) => (
+            <button
+              key={value}
+              onClick={() => onFiltersChange(f => ({ ...f, status: value }))}
+              className={`px-4 py-2 rounded-2xl text-xs font-black transition-all ${statusFilter === value ? 'bg-emerald-600 text-white shadow-lg shadow-emerald-200' : 'bg-white text-slate-500 border border-slate-100 hover:bg-slate-50'}`}
+            >
+              {label}{value && <span className="ml-2 opacity-70">{searchIndex.facetCount('status', value)}</span>}
+            </button>
+          ))}
+          {years.length > 1 && (
+            <select
+              value={yearFilter}
+              onChange={e => onFiltersChange(f => ({ ...f, year: e.target.value }))}
+              className="ml-auto bg-white border border-slate-100 rounded-2xl px-4 py-2 text-xs font-black text-slate-500 outline-none focus:border-emerald-500"
+            >
+              <option value="">全部年度</option>
+              {years.map(y => <option key={y} value={y}>{y}年度</option>)}
+            </select>
+          )}
+          {(query || statusFilter || yearFilter) && (
+            <span className="text-xs font-bold text-slate-400">共 {filtered.length} 筆</span>
+          )}
+          {batchHistory.undo && (
+            <button
+              onClick={() => taskHistory.undoBatch()}
+              className="px-4 py-2 rounded-2xl text-xs font-black bg-white text-slate-500 border border-slate-100 hover:bg-slate-50 transition-all"
+            >
+              復原批次：{batchHistory.undo.changes.length} 筆{batchHistory.undo.label}
+            </button>
+          )}
+          {batchHistory.redo && (
+            <button
+              onClick={() => taskHistory.redoBatch()}
+              className="px-4 py-2 rounded-2xl text-xs font-black bg-white text-slate-500 border border-slate-100 hover:bg-slate-50 transition-all"
+            >
+              重做批次
+            </button>
+          )}
+          {ids.length > 0 && (
+            <button
+              onClick={() => setSelected(prev => (prev ? null : new Set()))}
+              className={`${years.length > 1 ? '' : 'ml-auto '}px-4 py-2 rounded-2xl text-xs font-black transition-all ${selected ? 'bg-slate-800 text-white' : 'bg-white text-slate-500 border border-slate-100 hover:bg-slate-50'}`}
+            >
+              {selected ? '結束多選' : '多選'}
+            </button>
+          )}
+          {filtered.length > 0 && (
+            <button
+              onClick={handlePrefetch}
+              disabled={prefetching}
+              className={`px-4 py-2 rounded-2xl text-xs font-black bg-sky-600 text-white shadow-lg shadow-sky-100 hover:bg-sky-700 transition-all disabled:opacity-60`}
+            >
+              {prefetching ? `預載中 ${prefetch!.done + prefetch!.failed}/${prefetch!.total}` : `預載今日路線底圖 (${filtered.length})`}
+            </button>
+          )}
+        </div>
+
+        {ids.length === 0 ? (
           <div className="text-center py-32 bg-white rounded-[3rem] border-4 border-dashed border-slate-50">
              <div className="text-7xl mb-8">🔭</div>
              <h3 className="text-2xl font-black text-slate-800 mb-3">尚未載入現勘任務</h3>
@@ -260,31 +601,111 @@ const TaskListView: React.FC<{
              <button onClick={onGoToSetup} className="bg-emerald-600 text-white px-10 py-4 rounded-2xl font-black shadow-2xl shadow-emerald-200 hover:scale-105 active:scale-95 transition-all">前往建立任務</button>
           </div>
         ) : (
-          <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6 animate-in fade-in slide-in-from-bottom-4 duration-500">
-            {filtered.map(task => (
-              <button 
-                key={task.id}
-                onClick={() => onSelect(task.id)}
-                className="bg-white p-7 rounded-[2rem] border border-slate-100 shadow-sm hover:border-emerald-500 hover:shadow-2xl transition-all text-left group relative overflow-hidden"
-              >
-                <div className={`absolute top-0 left-0 w-2 h-full transition-colors ${task.status === 'COMPLETED' ? 'bg-emerald-500' : 'bg-amber-400'}`} />
-                <div className="flex justify-between items-start mb-6">
-                  <span className="text-xs font-black text-emerald-800 bg-emerald-50 px-3 py-1.5 rounded-xl uppercase tracking-tighter">{task.code}</span>
-                  <StatusBadge status={task.status} />
-                </div>
-                <h3 className="font-black text-slate-800 text-2xl mb-2 group-hover:text-emerald-700 transition-colors">{task.owner}</h3>
-                <p className="text-xs text-slate-400 font-bold uppercase tracking-widest">{task.year}年度 調查樣本</p>
-                
-                <div className="mt-8 flex items-center justify-between">
-                  <span className="text-[10px] font-black text-slate-300 group-hover:text-emerald-500 transition-colors uppercase tracking-[0.2em]">Enter Inspection</span>
-                  <div className="w-10 h-10 rounded-full bg-slate-50 flex items-center justify-center text-slate-300 group-hover:bg-emerald-500 group-hover:text-white transition-all shadow-inner">
-                    <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={3} stroke="currentColor" className="w-5 h-5"><path strokeLinecap="round" strokeLinejoin="round" d="m8.25 4.5 7.5 7.5-7.5 7.5" /></svg>
-                  </div>
-                </div>
-              </button>
-            ))}
+          <div className="animate-in fade-in slide-in-from-bottom-4 duration-500">
+            <Profiled id="VirtualTaskGrid">
+              <VirtualTaskGrid ids={filtered} onSelect={selected ? toggleSelected : onSelect} selected={selected || undefined} />
+            </Profiled>
           </div>
         )}
+        {selected && (
+          <BatchToolbar
+            selected={selected}
+            filtered={filtered}
+            onSelectAll={() => setSelected(new Set(filtered))}
+            onClear={() => setSelected(new Set())}
+            onBatch={op => onBatch(Array.from(selected), op)}
+          />
+        )}
+      </div>
+    </div>
+  );
+};
+
+// 多選模式的操作列：對已選任務執行批次變更。
+const BatchToolbar: React.FC<{
+  selected: Set<string>,
+  filtered: string[],
+  onSelectAll: () => void,
+  onClear: () => void,
+  onBatch: (op: BatchOperation) => number
+}> = ({ selected, filtered, onSelectAll, onClear, onBatch }) => {
+  const [template, setTemplate] = useState<FormTemplate | null>(null);
+  const count = selected.size;
+
+  const run = (op: BatchOperation) => {
+    const changed = onBatch(op);
+    if (changed === 0) alert('選取的任務內容相同，無需變更。');
+  };
+
+  const handleOwner = () => {
+    const owner = prompt(`將 ${count} 筆任務的業主改為：`)?.trim();
+    if (owner) run({ type: 'owner', owner });
+  };
+
+  const handleClearMarkers = () => {
+    if (confirm(`確定清除 ${count} 筆任務的所有標記？可於清單上方復原。`)) run({ type: 'clearMarkers' });
+  };
+
+  const toggle = (field: 'irrigationMethods' | 'landStatus', opt: string) => {
+    setTemplate(prev => {
+      if (!prev) return prev;
+      const current = prev[field];
+      return { ...prev, [field]: current.includes(opt) ? current.filter(i => i !== opt) : [...current, opt] };
+    });
+  };
+
+  const handleApplyTemplate = () => {
+    if (!template) return;
+    run({ type: 'formTemplate', template: template.landStatus.includes('其他') ? template : { ...template, otherStatus: undefined } });
+    setTemplate(null);
+  };
+
+  const actionClass = 'px-4 py-2 rounded-2xl text-xs font-black transition-all disabled:opacity-30';
+
+  return (
+    <div className="fixed bottom-6 inset-x-0 z-40 flex justify-center px-4 pointer-events-none">
+      <div className="pointer-events-auto max-w-5xl w-full bg-slate-900 text-white rounded-[2rem] shadow-2xl p-4 space-y-4">
+        {template && (
+          <div className="bg-white text-slate-800 rounded-3xl p-6 space-y-6 max-h-[60vh] overflow-y-auto">
+            <p className="text-sm font-black text-slate-500">調查表範本（覆寫灌溉方式與使用狀態，照片保留）</p>
+            <div className="grid sm:grid-cols-2 gap-3">
+              {['地下水井', '灌溉溝渠', '地下水+灌溉溝渠'].map(opt => (
+                <Checkbox key={opt} label={opt} checked={template.irrigationMethods.includes(opt)} onChange={() => toggle('irrigationMethods', opt)} />
+              ))}
+            </div>
+            <div className="grid sm:grid-cols-2 gap-3">
+              {['農地可採樣', '建物', '難以採樣', '果樹', '其他'].map(opt => (
+                <Checkbox key={opt} label={opt} checked={template.landStatus.includes(opt)} onChange={() => toggle('landStatus', opt)} />
+              ))}
+            </div>
+            {template.landStatus.includes('其他') && (
+              <input
+                type="text"
+                placeholder="請輸入其他狀態描述..."
+                className="w-full border-2 border-slate-100 rounded-2xl p-4 text-sm font-bold outline-none focus:border-emerald-500 bg-slate-50"
+                value={template.otherStatus || ''}
+                onChange={e => setTemplate(prev => prev && { ...prev, otherStatus: e.target.value })}
+              />
+            )}
+            <div className="flex justify-end gap-3">
+              <button onClick={() => setTemplate(null)} className={`${actionClass} bg-slate-100 text-slate-500 hover:bg-slate-200`}>取消</button>
+              <button onClick={handleApplyTemplate} className={`${actionClass} bg-emerald-600 text-white hover:bg-emerald-700`}>套用至 {count} 筆</button>
+            </div>
+          </div>
+        )}
+        <div className="flex flex-wrap items-center gap-2">
+          <span className="text-sm font-black px-2">已選 {count} 筆</span>
+          <button onClick={onSelectAll} className={`${actionClass} bg-slate-800 hover:bg-slate-700`}>全選目前結果 ({filtered.length})</button>
+          <button onClick={onClear} disabled={count === 0} className={`${actionClass} bg-slate-800 hover:bg-slate-700`}>清除選取</button>
+          <div className="flex flex-wrap gap-2 ml-auto">
+            {([['PENDING', '待處理'], ['COMPLETED', '已完成'], ['EDITING', '修正中']] as const).map(([status, label]) => (
+              <button key={status} onClick={() => run({ type: 'status', status })} disabled={count === 0} className={`${actionClass} bg-emerald-600 hover:bg-emerald-700`}>設為{label}</button>
+            ))}
+            <button onClick={handleOwner} disabled={count === 0} className={`${actionClass} bg-sky-600 hover:bg-sky-700`}>變更業主</button>
+            <button onClick={() => setTemplate({ irrigationMethods: [], landStatus: [] })} disabled={count === 0} className={`${actionClass} bg-indigo-600 hover:bg-indigo-700`}>套用範本</button>
+            <button onClick={handleClearMarkers} disabled={count === 0} className={`${actionClass} bg-rose-600 hover:bg-rose-700`}>清除標記</button>
+          </div>
+        </div>
       </div>
     </div>
   );
@@ -295,10 +716,30 @@ const EditorView: React.FC<{
   task: FarmlandTask, 
   isEditingMap: boolean, 
   onBack: () => void, 
-  onUpdate: (u: Partial<FarmlandTask>) => void,
+  onUpdate: (u: TaskUpdate) => void,
   toggleMapEdit: () => void
 }> = ({ task, isEditingMap, onBack, onUpdate, toggleMapEdit }) => {
   const [activeTool, setActiveTool] = useState<MarkerType | 'DRAW' | null>(null);
+  const { canUndo, canRedo } = useTaskHistory(task.id);
+
+  useEffect(() => { taskHistory.load(task.id); }, [task.id]);
+
+  // Ctrl/⌘+Z 復原、Ctrl/⌘+Shift+Z 或 Ctrl+Y 重做；文字輸入中保留瀏覽器原生的復原。
+  useEffect(() => {
+    const onKeyDown = (e: KeyboardEvent) => {
+      if (!(e.ctrlKey || e.metaKey) || (e.target as HTMLElement).closest('input, textarea')) return;
+      const key = e.key.toLowerCase();
+      if (key === 'z' && !e.shiftKey) taskHistory.undo(task.id);
+      else if ((key === 'z' && e.shiftKey) || key === 'y') taskHistory.redo(task.id);
+      else return;
+      e.preventDefault();
+    };
+    window.addEventListener('keydown', onKeyDown);
+    return () => window.removeEventListener('keydown', onKeyDown);
+  }, [task.id]);
+
+  // 開啟過的底圖一併存入離線快取；已快取者立即顯示，其餘等快取完成（最多片刻）再顯示。
+  const baseImageReady = useBaseImageReady(task.baseImage);
   
   const handleAddMarker = (type: MarkerType) => {
     const newMarker: Marker = {
@@ -310,6 +751,15 @@ const EditorView: React.FC<{
     onUpdate({ markers: [...task.markers, newMarker] });
   };
 
+  // 照片處理為非同步，以函式形式更新，避免覆蓋處理期間的其他編輯。
+  const handleAddPhotos = (category: keyof InspectionData['photos'], refs: PhotoRef[]) => {
+    onUpdate(t => {
+      const current = t.formData.photos[category];
+      const added = refs.filter((r, i) => !current.includes(r) && refs.indexOf(r) === i);
+      return { formData: { ...t.formData, photos: { ...t.formData.photos, [category]: [...current, ...added] } } };
+    });
+  };
+
   const handleStartDraw = () => {
     const newRange: PlotRange = { id: Date.now().toString(), points: [] };
     onUpdate({ ranges: [...task.ranges, newRange] });
@@ -332,6 +782,8 @@ const EditorView: React.FC<{
           </div>
         </div>
         <div className="flex gap-3">
+           <button onClick={() => taskHistory.undo(task.id)} disabled={!canUndo} title="復原 (Ctrl+Z)" className="bg-slate-800 hover:bg-slate-700 px-5 py-3 rounded-2xl text-sm font-black transition-all border border-slate-700 disabled:opacity-30">復原</button>
+           <button onClick={() => taskHistory.redo(task.id)} disabled={!canRedo} title="重做 (Ctrl+Shift+Z)" className="bg-slate-800 hover:bg-slate-700 px-5 py-3 rounded-2xl text-sm font-black transition-all border border-slate-700 disabled:opacity-30">重做</button>
            {isEditingMap ? (
              <button onClick={toggleMapEdit} className="bg-emerald-600 hover:bg-emerald-500 px-8 py-3 rounded-2xl text-sm font-black shadow-lg shadow-emerald-900/40 transition-all border border-emerald-400/30">完成編輯</button>
            ) : (
@@ -343,13 +795,26 @@ const EditorView: React.FC<{
       <div className="flex-1 flex flex-col lg:flex-row overflow-hidden bg-slate-100">
         <div className="flex-1 bg-slate-200 relative overflow-hidden flex items-center justify-center p-8">
            <div className="relative inline-block shadow-[0_40px_100px_-20px_rgba(0,0,0,0.3)] rounded-[2.5rem] overflow-hidden border-[8px] border-white bg-white">
-              <MapInterface 
-                task={task} 
-                isEditing={isEditingMap} 
-                activeTool={activeTool}
-                onUpdate={onUpdate}
-                onFinishDraw={() => setActiveTool(null)}
-              />
+              <Profiled id="Map">
+                {!baseImageReady ? (
+                  <div className="w-[60vw] max-w-3xl aspect-[3/2] bg-slate-100 animate-pulse" />
+                ) : shouldUseCanvas(task) ? (
+                  <CanvasMapLayer 
+                    task={task} 
+                    isEditing={isEditingMap} 
+                    activeTool={activeTool}
+                    onUpdate={onUpdate}
+                  />
+                ) : (
+                  <MapInterface 
+                    task={task} 
+                    isEditing={isEditingMap} 
+                    activeTool={activeTool}
+                    onUpdate={onUpdate}
+                    onFinishDraw={() => setActiveTool(null)}
+                  />
+                )}
+              </Profiled>
            </div>
 
            {isEditingMap && (
@@ -431,6 +896,8 @@ const EditorView: React.FC<{
               </div>
            </section>
 
+           {task.ranges.length > 0 && <PlotMetricsSection task={task} onUpdate={onUpdate} />}
+
            <section>
               <div className="flex items-center gap-4 mb-8">
                  <div className="w-12 h-12 bg-indigo-50 rounded-2xl flex items-center justify-center text-indigo-600">
@@ -439,15 +906,25 @@ const EditorView: React.FC<{
                  <h3 className="text-2xl font-black text-slate-800 tracking-tight">現勘照片</h3>
               </div>
               <div className="space-y-8">
-                 <PhotoUploadSection title="用水型態" photos={task.formData.photos.irrigation} onUpload={(urls) => onUpdate({ formData: { ...task.formData, photos: { ...task.formData.photos, irrigation: [...task.formData.photos.irrigation, ...urls] } } })} />
-                 <PhotoUploadSection title="農地現況" photos={task.formData.photos.land} onUpload={(urls) => onUpdate({ formData: { ...task.formData, photos: { ...task.formData.photos, land: [...task.formData.photos.land, ...urls] } } })} />
-                 <PhotoUploadSection title="周圍現況" photos={task.formData.photos.surrounding} onUpload={(urls) => onUpdate({ formData: { ...task.formData, photos: { ...task.formData.photos, surrounding: [...task.formData.photos.surrounding, ...urls] } } })} />
+                 <PhotoUploadSection title="用水型態" photos={task.formData.photos.irrigation} onUpload={(refs) => handleAddPhotos('irrigation', refs)} />
+                 <PhotoUploadSection title="農地現況" photos={task.formData.photos.land} onUpload={(refs) => handleAddPhotos('land', refs)} />
+                 <PhotoUploadSection title="周圍現況" photos={task.formData.photos.surrounding} onUpload={(refs) => handleAddPhotos('surrounding', refs)} />
               </div>
+              <PhotoAnalysisSection task={task} />
            </section>
 
            <div className="pt-12 border-t border-slate-100 pb-16">
               <button 
-                onClick={() => { onUpdate({ status: 'COMPLETED' }); alert('儲存成功！請記得回到列表匯出專案檔。'); onBack(); }}
+                onClick={() => {
+                  onUpdate({ status: 'COMPLETED' });
+                  if (getSyncEndpoint()) {
+                    syncOutbox.sync();
+                    alert('儲存成功！連線時將自動上傳至同步伺服器。');
+                  } else {
+                    alert('儲存成功！請記得回到列表匯出專案檔。');
+                  }
+                  onBack();
+                }}
                 className="w-full bg-emerald-600 text-white font-black py-6 rounded-[2rem] shadow-2xl shadow-emerald-200 hover:bg-emerald-700 active:scale-95 transition-all mb-6 text-xl tracking-tight"
               >
                 儲存現勘結果
@@ -470,7 +947,7 @@ const MapInterface: React.FC<{
   task: FarmlandTask, 
   isEditing: boolean, 
   activeTool: string | null,
-  onUpdate: (u: Partial<FarmlandTask>) => void,
+  onUpdate: (u: TaskUpdate) => void,
   onFinishDraw: () => void
 }> = ({ task, isEditing, activeTool, onUpdate, onFinishDraw }) => {
   const containerRef = useRef<HTMLDivElement>(null);
@@ -486,27 +963,10 @@ const MapInterface: React.FC<{
     onUpdate({ ranges: [...task.ranges.slice(0, -1), updatedRange] });
   };
 
-  const handleDrag = (id: string, e: React.MouseEvent | React.TouchEvent) => {
-    if (!isEditing) return;
-    const rect = containerRef.current!.getBoundingClientRect();
-    const moveHandler = (moveEvent: any) => {
-      const clientX = moveEvent.touches ? moveEvent.touches[0].clientX : moveEvent.clientX;
-      const clientY = moveEvent.touches ? moveEvent.touches[0].clientY : moveEvent.clientY;
-      const x = Math.max(0, Math.min(100, ((clientX - rect.left) / rect.width) * 100));
-      const y = Math.max(0, Math.min(100, ((clientY - rect.top) / rect.height) * 100));
-      onUpdate({ markers: task.markers.map(m => m.id === id ? { ...m, x, y } : m) });
-    };
-    const endHandler = () => {
-      document.removeEventListener('mousemove', moveHandler);
-      document.removeEventListener('mouseup', endHandler);
-      document.removeEventListener('touchmove', moveHandler);
-      document.removeEventListener('touchend', endHandler);
-    };
-    document.addEventListener('mousemove', moveHandler);
-    document.addEventListener('mouseup', endHandler);
-    document.addEventListener('touchmove', moveHandler);
-    document.addEventListener('touchend', endHandler);
-  };
+  const { drag, start, move, end } = useMarkerDrag(containerRef, (id, x, y) => {
+    onUpdate(t => ({ markers: t.markers.map(m => m.id === id ? { ...m, x, y } : m) }));
+  });
+  const metrics = getTaskMetrics(task);
 
   return (
     <div 
@@ -517,37 +977,49 @@ const MapInterface: React.FC<{
     >
       <img src={task.baseImage} className="w-full h-auto block" alt="base" />
       <svg className="absolute inset-0 w-full h-full pointer-events-none">
-        {task.ranges.map(range => (
-          <polygon 
-            key={range.id}
-            points={range.points.map(p => `${p.x}%,${p.y}%`).join(' ')}
-            fill="rgba(16, 185, 129, 0.35)"
-            stroke="#10b981"
-            strokeWidth="4"
-            className="drop-shadow-sm"
-          />
-        ))}
+        {task.ranges.map(range => {
+          const invalid = metrics.ranges.get(range.id)?.selfIntersecting;
+          return (
+            <polygon 
+              key={range.id}
+              points={range.points.map(p => `${p.x}%,${p.y}%`).join(' ')}
+              fill={invalid ? 'rgba(244, 63, 94, 0.3)' : 'rgba(16, 185, 129, 0.35)'}
+              stroke={invalid ? '#f43f5e' : '#10b981'}
+              strokeWidth="4"
+              className="drop-shadow-sm"
+            />
+          );
+        })}
       </svg>
-      {task.markers.map(m => (
-        <div 
-          key={m.id}
-          className={`absolute -translate-x-1/2 -translate-y-1/2 p-1.5 bg-white/90 backdrop-blur-md shadow-2xl rounded-full border-2 border-white transition-transform ${isEditing ? 'cursor-grab active:cursor-grabbing scale-150' : 'scale-110'}`}
-          style={{ left: `${m.x}%`, top: `${m.y}%`, zIndex: 10 }}
-          onMouseDown={(e) => handleDrag(m.id, e)}
-          onTouchStart={(e) => handleDrag(m.id, e)}
-        >
-          {m.type === 'WELL' && <WellIcon className="w-6 h-6" />}
-          {m.type === 'INLET' && <InletIcon className="w-6 h-6" />}
-          {m.type === 'SERIES_INLET' && <SeriesInletIcon className="w-6 h-6" />}
-          {m.type === 'SAMPLE' && <StarIcon className="w-6 h-6" />}
-          {isEditing && (
-            <button 
-              className="absolute -top-4 -right-4 bg-slate-900 text-white w-6 h-6 rounded-full text-[10px] font-black border-2 border-white shadow-lg flex items-center justify-center"
-              onClick={(e) => { e.stopPropagation(); onUpdate({ markers: task.markers.filter(x => x.id !== m.id) }); }}
-            >✕</button>
-          )}
-        </div>
-      ))}
+      {task.markers.map(marker => {
+        const m = drag?.id === marker.id ? { ...marker, x: drag.x, y: drag.y } : marker;
+        return (
+          <div 
+            key={m.id}
+            className={`absolute -translate-x-1/2 -translate-y-1/2 p-1.5 bg-white/90 backdrop-blur-md shadow-2xl rounded-full border-2 border-white transition-transform ${isEditing ? 'cursor-grab active:cursor-grabbing scale-150' : 'scale-110'}`}
+            style={{ left: `${m.x}%`, top: `${m.y}%`, zIndex: 10, touchAction: isEditing ? 'none' : undefined }}
+            onPointerDown={(e) => {
+              if (!isEditing || e.button !== 0 || (e.target as HTMLElement).closest('button')) return;
+              start(m.id, m.x, m.y, e);
+            }}
+            onPointerMove={move}
+            onPointerUp={end}
+            onPointerCancel={end}
+            onClick={(e) => e.stopPropagation()}
+          >
+            {m.type === 'WELL' && <WellIcon className="w-6 h-6" />}
+            {m.type === 'INLET' && <InletIcon className="w-6 h-6" />}
+            {m.type === 'SERIES_INLET' && <SeriesInletIcon className="w-6 h-6" />}
+            {m.type === 'SAMPLE' && <StarIcon className="w-6 h-6" />}
+            {isEditing && (
+              <button 
+                className="absolute -top-4 -right-4 bg-slate-900 text-white w-6 h-6 rounded-full text-[10px] font-black border-2 border-white shadow-lg flex items-center justify-center"
+                onClick={(e) => { e.stopPropagation(); onUpdate(t => ({ markers: t.markers.filter(x => x.id !== m.id) })); }}
+              >✕</button>
+            )}
+          </div>
+        );
+      })}
       {activeTool === 'DRAW' && task.ranges[task.ranges.length - 1]?.points.map((p, i) => (
         <div key={i} className="absolute w-4 h-4 bg-emerald-500 rounded-full -translate-x-1/2 -translate-y-1/2 border-2 border-white shadow-lg" style={{ left: `${p.x}%`, top: `${p.y}%` }} />
       ))}
@@ -572,15 +1044,136 @@ const Checkbox: React.FC<{ label: string, checked: boolean, onChange: () => void
   </label>
 );
 
-const PhotoUploadSection: React.FC<{ title: string, photos: string[], onUpload: (urls: string[]) => void }> = ({ title, photos, onUpload }) => {
-  const handleFile = (e: React.ChangeEvent<HTMLInputElement>) => {
+// 簡化容許誤差：已校正時為公尺，未校正時為底圖百分比。
+const SIMPLIFY_TOLERANCE_M = 1;
+const SIMPLIFY_TOLERANCE_PCT = 0.5;
+
+// 坵塊量測：面積與周長需先設定底圖比例尺（底圖實際寬度），高度依底圖長寬比推算。
+const PlotMetricsSection: React.FC<{ task: FarmlandTask, onUpdate: (u: TaskUpdate) => void }> = ({ task, onUpdate }) => {
+  useCalibrationVersion();
+  const calibration = getCalibration(task.baseImage);
+  const metrics = getTaskMetrics(task);
+  const [width, setWidth] = useState(calibration ? String(calibration.width) : '');
+
+  useEffect(() => {
+    setWidth(calibration ? String(calibration.width) : '');
+  }, [task.baseImage, calibration?.width]);
+
+  const handleCalibrate = () => {
+    const meters = Number(width);
+    if (!(meters > 0)) {
+      setCalibration(task.baseImage, undefined);
+      return;
+    }
+    const img = new Image();
+    img.onload = () => setCalibration(task.baseImage, { width: meters, height: meters * img.naturalHeight / img.naturalWidth });
+    img.onerror = () => alert('底圖載入失敗，無法推算比例尺。');
+    img.src = task.baseImage;
+  };
+
+  const handleSimplify = (rangeId: string) => {
+    const tolerance = calibration ? SIMPLIFY_TOLERANCE_M : SIMPLIFY_TOLERANCE_PCT;
+    onUpdate(t => ({
+      ranges: t.ranges.map(r => (r.id === rangeId ? { ...r, points: simplifyPolygon(r.points, tolerance, calibration) } : r))
+    }));
+  };
+
+  const typeCount = (ids: string[], type: MarkerType) => ids.filter(id => task.markers.find(m => m.id === id)?.type === type).length;
+
+  return (
+    <section>
+       <h3 className="text-2xl font-black text-slate-800 tracking-tight mb-6">坵塊量測</h3>
+       <label className="block text-sm font-bold text-slate-500 mb-6">
+          底圖實際寬度（公尺）
+          <div className="flex gap-3 mt-2">
+             <input
+               type="number" min="0" inputMode="decimal"
+               className="flex-1 border-2 border-slate-100 bg-slate-50 rounded-2xl p-3 text-sm outline-none focus:border-emerald-500"
+               value={width}
+               onChange={e => setWidth(e.target.value)}
+             />
+             <button onClick={handleCalibrate} className="bg-slate-800 text-white px-5 rounded-2xl text-sm font-black hover:bg-slate-900 transition-all">套用</button>
+          </div>
+       </label>
+       <div className="space-y-3">
+          {task.ranges.map((range, i) => {
+            const m = metrics.ranges.get(range.id);
+            if (!m) return null;
+            return (
+              <div key={range.id} className={`rounded-2xl p-4 border-2 ${m.selfIntersecting ? 'border-rose-200 bg-rose-50' : 'border-slate-100 bg-slate-50'}`}>
+                 <div className="flex items-center justify-between">
+                    <p className="text-sm font-black text-slate-700">坵塊 {i + 1}<span className="ml-2 text-xs text-slate-400">{range.points.length} 個節點</span></p>
+                    {range.points.length > 3 && (
+                      <button onClick={() => handleSimplify(range.id)} className="text-xs font-black text-emerald-600 hover:underline">簡化邊界</button>
+                    )}
+                 </div>
+                 <p className="text-xs font-bold text-slate-500 mt-2">
+                    {m.area !== undefined ? `面積 ${formatArea(m.area)}・周長 ${Math.round(m.perimeter!)} m` : '尚未設定比例尺'}
+                    ・採樣點 {typeCount(m.markerIds, 'SAMPLE')}・水井 {typeCount(m.markerIds, 'WELL')}
+                 </p>
+                 {m.selfIntersecting && <p className="text-xs font-black text-rose-500 mt-1">邊界交錯，請調整節點</p>}
+              </div>
+            );
+          })}
+       </div>
+    </section>
+  );
+};
+
+// AI 分析結果以照片為單位存回任務；已分析過的照片不會重新送出。
+const PhotoAnalysisSection: React.FC<{ task: FarmlandTask }> = ({ task }) => {
+  const [progress, setProgress] = useState<AnalysisProgress | null>(null);
+  const { irrigation, land, surrounding } = task.formData.photos;
+  const photos = Array.from(new Set([...irrigation, ...land, ...surrounding]));
+  const analysis = task.formData.analysis || {};
+  const running = !!progress && progress.done + progress.failed < progress.total;
+
+  const handleAnalyze = async () => {
+    const cropType = task.formData.landStatus.includes('果樹') ? '果樹' : '作物';
+    const result = await analyzeTaskPhotos(task.id, cropType, setProgress);
+    if (result.failed > 0) alert(`${result.failed} 張照片分析失敗，請稍後再試。`);
+  };
+
+  if (photos.length === 0) return null;
+  return (
+    <div className="mt-10 space-y-4">
+       <button
+         onClick={handleAnalyze}
+         disabled={running || photos.every(p => p in analysis)}
+         className="w-full bg-indigo-600 text-white font-black py-4 rounded-[1.5rem] shadow-lg shadow-indigo-100 hover:bg-indigo-700 active:scale-95 transition-all text-sm disabled:opacity-40 disabled:active:scale-100"
+       >
+         {running ? `AI 分析中 ${progress!.done + progress!.failed}/${progress!.total}` : 'AI 分析照片'}
+       </button>
+       {photos.filter(p => p in analysis).map(p => (
+         <div key={p} className="flex gap-4 bg-slate-50 rounded-[1.5rem] p-4">
+            <div className="flex-shrink-0 w-16 h-16 rounded-2xl overflow-hidden bg-white">
+               <PhotoThumb photoRef={p} className="w-full h-full object-cover" />
+            </div>
+            <p className="text-xs text-slate-600 font-medium leading-relaxed whitespace-pre-wrap">{analysis[p]}</p>
+         </div>
+       ))}
+    </div>
+  );
+};
+
+const PhotoUploadSection: React.FC<{ title: string, photos: PhotoRef[], onUpload: (refs: PhotoRef[]) => void }> = ({ title, photos, onUpload }) => {
+  const [processing, setProcessing] = useState(0);
+
+  const handleFile = async (e: React.ChangeEvent<HTMLInputElement>) => {
     const files = e.target.files;
     if (files) {
-      Array.from(files).forEach(file => {
-        const reader = new FileReader();
-        reader.onloadend = () => onUpload([reader.result as string]);
-        reader.readAsDataURL(file);
-      });
+      const list = Array.from(files);
+      e.target.value = '';
+      setProcessing(n => n + list.length);
+      try {
+        const images = await processImages(list);
+        onUpload(await Promise.all(images.map(img => putPhoto(img.archive, img.hash, img.thumb))));
+      } catch (err) {
+        console.error('Saving photos failed:', err);
+        alert('照片儲存失敗，請重新上傳。');
+      } finally {
+        setProcessing(n => n - list.length);
+      }
     }
   };
   return (
@@ -591,9 +1184,14 @@ const PhotoUploadSection: React.FC<{ title: string, photos: string[], onUpload:
              <PlusIcon className="w-10 h-10" />
              <input type="file" multiple accept="image/*" className="hidden" onChange={handleFile} />
           </label>
-          {photos.map((p, i) => (
-            <div key={i} className="flex-shrink-0 w-28 h-28 rounded-[2rem] overflow-hidden bg-white border-4 border-white shadow-xl relative group">
-               <img src={p} className="w-full h-full object-cover" alt="upload" />
+          {photos.map(p => (
+            <div key={p} className="flex-shrink-0 w-28 h-28 rounded-[2rem] overflow-hidden bg-white border-4 border-white shadow-xl relative group">
+               <PhotoThumb photoRef={p} className="w-full h-full object-cover" />
+            </div>
+          ))}
+          {Array.from({ length: processing }).map((_, i) => (
+            <div key={`processing-${i}`} className="flex-shrink-0 w-28 h-28 rounded-[2rem] bg-slate-100 border-4 border-white shadow-xl flex items-center justify-center animate-pulse">
+               <span className="text-[10px] font-black text-slate-400 uppercase tracking-widest">處理中</span>
             </div>
           ))}
        </div>
@@ -601,14 +1199,4 @@ const PhotoUploadSection: React.FC<{ title: string, photos: string[], onUpload:
   );
 };
 
-const StatusBadge: React.FC<{ status: string }> = ({ status }) => {
-  const styles = {
-    PENDING: 'bg-slate-100 text-slate-500',
-    COMPLETED: 'bg-emerald-500 text-white shadow-lg shadow-emerald-200',
-    EDITING: 'bg-amber-400 text-white shadow-lg shadow-amber-200'
-  }[status] || 'bg-slate-100 text-slate-600';
-  const label = { PENDING: '待處理', COMPLETED: '已完成', EDITING: '修正中' }[status] || status;
-  return <span className={`text-[10px] font-black px-4 py-1.5 rounded-full uppercase tracking-[0.1em] ${styles}`}>{label}</span>;
-};
-
 export default App;
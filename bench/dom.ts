@@ -0,0 +1,28 @@
+// 基準測試用的瀏覽器環境：jsdom 提供 DOM 與 localStorage，fake-indexeddb 提供 IndexedDB。
+// Blob、Response、CompressionStream、crypto.subtle 直接使用 Node 內建版本（jsdom 的 Blob 不支援 stream()）。
+import 'fake-indexeddb/auto';
+import { JSDOM } from 'jsdom';
+
+const dom = new JSDOM('<!DOCTYPE html><html><body><div id="root"></div></body></html>', {
+  url: 'http://localhost/',
+  pretendToBeVisual: true
+});
+const { window } = dom;
+
+const globals: Record<string, unknown> = {
+  window,
+  document: window.document,
+  navigator: window.navigator,
+  localStorage: window.localStorage,
+  HTMLElement: window.HTMLElement,
+  Node: window.Node,
+  Image: window.Image,
+  getComputedStyle: window.getComputedStyle.bind(window),
+  requestAnimationFrame: (cb: FrameRequestCallback) => setTimeout(() => cb(performance.now()), 0) as unknown as number,
+  cancelAnimationFrame: (id: number) => clearTimeout(id),
+  ResizeObserver: class { observe() {} unobserve() {} disconnect() {} },
+  IS_REACT_ACT_ENVIRONMENT: true
+};
+Object.entries(globals).forEach(([key, value]) => {
+  Object.defineProperty(globalThis, key, { value, configurable: true, writable: true });
+});
@@ -0,0 +1,77 @@
+import { FarmlandTask, Marker, MarkerType, PlotRange } from '../types';
+
+// 合成專案：與舊版 generateMockTasks 相同的欄位，另加入照片、標記與坵塊；以固定種子產生，結果可重現。
+const OWNERS = ['王大明', '林建國', '行政院農業部', '陳美玲', '張志豪', '李淑芬', '黃俊傑', '吳雅婷'];
+const IRRIGATION = ['地下水井', '灌溉溝渠', '地下水+灌溉溝渠'];
+const LAND_STATUS = ['農地可採樣', '建物', '難以採樣', '果樹'];
+const MARKER_TYPES: MarkerType[] = ['WELL', 'INLET', 'SERIES_INLET', 'SAMPLE'];
+const STATUSES: FarmlandTask['status'][] = ['PENDING', 'PENDING', 'COMPLETED', 'EDITING'];
+
+/** mulberry32 虛擬亂數。 */
+export const createRandom = (seed: number) => () => {
+  seed |= 0;
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+export const photoHashFor = (i: number) => i.toString(16).padStart(64, '0');
+
+const polygon = (rand: () => number, id: string): PlotRange => {
+  const cx = 20 + rand() * 60;
+  const cy = 20 + rand() * 60;
+  const n = 4 + Math.floor(rand() * 9);
+  const points = Array.from({ length: n }, (_, i) => {
+    const a = (i / n) * Math.PI * 2;
+    const r = 5 + rand() * 10;
+    return { x: cx + Math.cos(a) * r, y: cy + Math.sin(a) * r };
+  });
+  return { id, points };
+};
+
+export interface ProjectFixture {
+  tasks: FarmlandTask[];
+  photoPool: number;
+}
+
+/** 產生 count 筆任務；照片參照取自 photoPool 張共用照片，以控制匯出檔大小。 */
+export const generateProject = (count: number, seed = 115, photoPool = 200): ProjectFixture => {
+  const rand = createRandom(seed);
+  const pick = <T>(list: T[]) => list[Math.floor(rand() * list.length)];
+  const some = <T>(list: T[]) => list.filter(() => rand() < 0.35);
+  const photos = () => Array.from({ length: Math.floor(rand() * 4) }, () => `photo:${photoHashFor(Math.floor(rand() * photoPool))}`);
+
+  const tasks = Array.from({ length: count }, (_, i): FarmlandTask => {
+    const markers: Marker[] = Array.from({ length: Math.floor(rand() * 7) }, (_, j) => ({
+      id: `m${i}-${j}`, type: pick(MARKER_TYPES), x: rand() * 100, y: rand() * 100
+    }));
+    return {
+      id: `bench-${i}`,
+      code: `P${String(i + 1).padStart(6, '0')}`,
+      year: rand() < 0.8 ? '115' : '114',
+      owner: pick(OWNERS),
+      baseImage: `https://picsum.photos/seed/${i}/1200/800`,
+      status: pick(STATUSES),
+      markers,
+      ranges: Array.from({ length: Math.floor(rand() * 4) }, (_, j) => polygon(rand, `r${i}-${j}`)),
+      formData: {
+        irrigationMethods: some(IRRIGATION),
+        landStatus: some(LAND_STATUS),
+        photos: { irrigation: photos(), land: photos(), surrounding: photos() }
+      }
+    };
+  });
+  return { tasks, photoPool };
+};
+
+/** 匯入用 CSV：編號,業主,現勘圖網址，含表頭與少量重複編號。 */
+export const generateCsv = (count: number, seed = 7) => {
+  const rand = createRandom(seed);
+  const lines = ['編號,業主,現勘圖網址'];
+  for (let i = 0; i < count; i++) {
+    const code = rand() < 0.02 && i > 0 ? `C${String(i).padStart(6, '0')}` : `C${String(i + 1).padStart(6, '0')}`;
+    lines.push(`${code},"${OWNERS[i % OWNERS.length]}",https://picsum.photos/seed/${i}/1200/800`);
+  }
+  return lines.join('\n');
+};
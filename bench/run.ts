@@ -0,0 +1,172 @@
+// 效能基準測試：npm run bench -- --sizes=1000,10000,50000 [--json=bench-results.json]
+// 以合成專案量測持久化、檢索、單筆更新與渲染、CSV 匯入、.farmland 匯出入。
+import './dom';
+import { writeFileSync } from 'node:fs';
+import React, { act } from 'react';
+import { createRoot } from 'react-dom/client';
+import { generateProject, generateCsv, photoHashFor, createRandom } from './fixtures';
+import { openDB, transactionDone } from '../services/db';
+import { taskStore } from '../services/taskStore';
+import { searchIndex } from '../services/searchIndex';
+import { TaskPersistence, loadProject, WriteStats, DEFAULT_PROJECT_NAME } from '../services/storage';
+import { putPhoto } from '../services/photoStore';
+import { importTasksFromText } from '../services/csvImport';
+import { CsvParser } from '../services/csvParser';
+import { exportProjectArchive, readProjectArchive } from '../services/projectArchive';
+import { applyBatch } from '../services/batchOps';
+import { taskHistory } from '../services/history';
+import { VirtualTaskGrid } from '../components/VirtualTaskGrid';
+import { AppState } from '../types';
+
+interface Result {
+  size: number;
+  metric: string;
+  ms: number;
+  note?: string;
+}
+
+const args = Object.fromEntries(process.argv.slice(2).map(a => a.replace(/^--/, '').split('=')));
+const sizes = String(args.sizes || '1000,10000,50000').split(',').map(Number);
+const results: Result[] = [];
+
+const meta: AppState = { projectName: DEFAULT_PROJECT_NAME, view: 'list', isEditingMap: true };
+
+const time = async (fn: () => unknown) => {
+  const started = performance.now();
+  await fn();
+  return performance.now() - started;
+};
+
+const record = (size: number, metric: string, ms: number, note?: string) => {
+  results.push({ size, metric, ms: Math.round(ms * 100) / 100, note });
+  console.log(`  ${metric.padEnd(28)} ${ms.toFixed(2).padStart(10)} ms${note ? `  (${note})` : ''}`);
+};
+
+const clearDatabase = async () => {
+  const db = await openDB();
+  const names = Array.from(db.objectStoreNames);
+  const tx = db.transaction(names, 'readwrite');
+  names.forEach(name => tx.objectStore(name).clear());
+  await transactionDone(tx);
+};
+
+const seedPhotos = async (count: number) => {
+  for (let i = 0; i < count; i++) {
+    const bytes = new Uint8Array(8 * 1024).fill(i % 256);
+    await putPhoto(new Blob([bytes], { type: 'image/jpeg' }), photoHashFor(i), new Blob([bytes.subarray(0, 1024)], { type: 'image/jpeg' }));
+  }
+};
+
+const benchPersistence = async (size: number) => {
+  const { tasks } = generateProject(size);
+  const writes: WriteStats[] = [];
+  const persistence = new TaskPersistence(0, stats => { writes.push(stats); });
+  const last = () => writes[writes.length - 1];
+  taskStore.replaceAll([]);
+  const unsubscribe = taskStore.onChange(event => persistence.trackTasks(event, taskStore.getIds()));
+  persistence.trackMeta(meta);
+  taskStore.replaceAll(tasks);
+  record(size, 'persist: full write', await time(() => persistence.flush()), `${(last().bytes / 1048576).toFixed(1)} MB`);
+
+  const rand = createRandom(1);
+  for (let i = 0; i < 100; i++) {
+    const id = tasks[Math.floor(rand() * tasks.length)].id;
+    taskStore.update(id, t => ({ status: t.status === 'COMPLETED' ? 'PENDING' : 'COMPLETED' }));
+  }
+  record(size, 'persist: 100 edits', await time(() => persistence.flush()), `${last().tasks} tasks written`);
+  unsubscribe();
+
+  record(size, 'persist: load project', await time(() => loadProject()));
+};
+
+const benchSearch = async (size: number) => {
+  const tasks = taskStore.getAll();
+  record(size, 'search: build index', await time(() => searchIndex.build(tasks)));
+  record(size, 'search: cold query', await time(() => searchIndex.query({ text: 'P0001' })));
+  const typing = ['王', '王大', '王大明'];
+  record(size, 'search: typing 3 chars', await time(() => typing.forEach(text => searchIndex.query({ text }))));
+  record(size, 'search: facet + text', await time(() => searchIndex.query({ text: '林', status: 'COMPLETED', year: '115' })));
+};
+
+const benchRender = async (size: number) => {
+  const container = document.createElement('div');
+  document.body.appendChild(container);
+  const root = createRoot(container);
+  const ids = taskStore.getIds();
+  const mount = await time(() => act(() => { root.render(React.createElement(VirtualTaskGrid, { ids, onSelect: () => {} })); }));
+  record(size, 'render: mount list', mount, `${container.querySelectorAll('button').length} cards in DOM`);
+
+  const updates = 200;
+  const visible = ids.slice(0, 6);
+  const onScreen = await time(async () => {
+    for (let i = 0; i < updates; i++) {
+      await act(() => { taskStore.update(visible[i % visible.length], { owner: `業主${i}` }); });
+    }
+  });
+  record(size, 'render: update visible card', onScreen / updates, 'per update');
+
+  const hidden = ids.slice(-6);
+  const offScreen = await time(async () => {
+    for (let i = 0; i < updates; i++) {
+      await act(() => { taskStore.update(hidden[i % hidden.length], { owner: `業主${i}` }); });
+    }
+  });
+  record(size, 'render: update off-screen', offScreen / updates, 'per update');
+
+  await act(() => root.unmount());
+  container.remove();
+};
+
+const benchBatch = async (size: number) => {
+  const ids = taskStore.getIds().slice(0, 1000);
+  let changed = 0;
+  record(size, 'batch: set owner', await time(() => { changed = applyBatch(ids, { type: 'owner', owner: '行政院農業部' }); }), `${changed} tasks`);
+  record(size, 'batch: undo', await time(() => taskHistory.undoBatch()));
+};
+
+const benchCsv = async (size: number) => {
+  const csv = generateCsv(size);
+  const parser = new CsvParser();
+  let rows = 0;
+  record(size, 'csv: parse', await time(() => {
+    parser.push(csv, () => { rows++; });
+    parser.end(() => { rows++; });
+  }), `${rows} rows, ${(csv.length / 1048576).toFixed(1)} MB`);
+
+  taskStore.replaceAll([]);
+  let imported = 0;
+  record(size, 'csv: import + dedupe', await time(() => { imported = importTasksFromText(csv).imported; }), `${imported} imported`);
+};
+
+const benchArchive = async (size: number) => {
+  const { tasks } = generateProject(size);
+  taskStore.replaceAll(tasks);
+  let archive = new Blob();
+  record(size, 'archive: export', await time(async () => { archive = await exportProjectArchive(meta, tasks); }), `${(archive.size / 1048576).toFixed(1)} MB`);
+  let count = 0;
+  record(size, 'archive: import', await time(async () => { count = (await readProjectArchive(archive)).tasks.length; }), `${count} tasks`);
+};
+
+const main = async () => {
+  await clearDatabase();
+  await seedPhotos(generateProject(0).photoPool);
+  for (const size of sizes) {
+    console.log(`\n== ${size.toLocaleString()} tasks ==`);
+    await benchPersistence(size);
+    await benchSearch(size);
+    await benchRender(size);
+    await benchBatch(size);
+    await benchCsv(size);
+    await benchArchive(size);
+    taskStore.replaceAll([]);
+  }
+  if (args.json) {
+    writeFileSync(args.json, JSON.stringify({ node: process.version, date: new Date().toISOString(), results }, null, 2));
+    console.log(`\nResults written to ${args.json}`);
+  }
+};
+
+main().then(() => process.exit(0), err => {
+  console.error(err);
+  process.exit(1);
+});
@@ -0,0 +1,275 @@
+import React, { useState, useEffect, useLayoutEffect, useRef } from 'react';
+import { FarmlandTask, MarkerType, PlotRange } from '../types';
+import { TaskUpdate } from '../services/taskStore';
+import { getPointGrid } from '../services/spatialIndex';
+import { getTaskMetrics } from '../services/geometry';
+import { useMarkerDrag } from './useMarkerDrag';
+
+// 畫布渲染模式：底圖、坵塊與標記繪於同一張 canvas，適用標記與節點眾多的任務。
+export const CANVAS_THRESHOLD = 120;
+
+/** 標記數加上所有坵塊節點數超過門檻時改用畫布模式。 */
+export const shouldUseCanvas = (task: FarmlandTask) =>
+  task.markers.length + task.ranges.reduce((n, r) => n + r.points.length, 0) > CANVAS_THRESHOLD;
+
+const MARKER_RADIUS = 18;
+const SPRITE_SIZE = MARKER_RADIUS * 2 + 4;
+
+// 圖示顏色與 components/Icons 相同。
+const drawSymbol = (ctx: CanvasRenderingContext2D, type: MarkerType, s: number) => {
+  ctx.beginPath();
+  switch (type) {
+    case 'WELL':
+      ctx.strokeStyle = '#3b82f6';
+      ctx.lineWidth = s * 0.16;
+      ctx.moveTo(0, -s * 0.33); ctx.lineTo(0, s * 0.33);
+      ctx.moveTo(-s * 0.33, 0); ctx.lineTo(s * 0.33, 0);
+      ctx.stroke();
+      return;
+    case 'INLET':
+      ctx.moveTo(0, -s * 0.42); ctx.lineTo(s * 0.42, s * 0.33); ctx.lineTo(-s * 0.42, s * 0.33);
+      ctx.fillStyle = '#eab308';
+      break;
+    case 'SERIES_INLET':
+      ctx.moveTo(0, -s * 0.42); ctx.lineTo(s * 0.42, 0); ctx.lineTo(0, s * 0.42); ctx.lineTo(-s * 0.42, 0);
+      ctx.fillStyle = '#eab308';
+      break;
+    case 'SAMPLE':
+      for (let i = 0; i < 10; i++) {
+        const r = i % 2 === 0 ? s * 0.42 : s * 0.18;
+        const a = -Math.PI / 2 + (i * Math.PI) / 5;
+        ctx.lineTo(Math.cos(a) * r, Math.sin(a) * r);
+      }
+      ctx.fillStyle = '#ef4444';
+      break;
+  }
+  ctx.closePath();
+  ctx.fill();
+};
+
+const spriteCache = new Map<string, HTMLCanvasElement>();
+
+const getSprite = (type: MarkerType, dpr: number) => {
+  const key = `${type}@${dpr}`;
+  let sprite = spriteCache.get(key);
+  if (!sprite) {
+    sprite = document.createElement('canvas');
+    sprite.width = sprite.height = Math.ceil(SPRITE_SIZE * dpr);
+    const ctx = sprite.getContext('2d')!;
+    ctx.scale(dpr, dpr);
+    ctx.translate(SPRITE_SIZE / 2, SPRITE_SIZE / 2);
+    ctx.beginPath();
+    ctx.arc(0, 0, MARKER_RADIUS - 1, 0, Math.PI * 2);
+    ctx.fillStyle = 'rgba(255, 255, 255, 0.92)';
+    ctx.shadowColor = 'rgba(0, 0, 0, 0.35)';
+    ctx.shadowBlur = 4;
+    ctx.fill();
+    ctx.shadowColor = 'transparent';
+    drawSymbol(ctx, type, MARKER_RADIUS * 1.4);
+    spriteCache.set(key, sprite);
+  }
+  return sprite;
+};
+
+// 坵塊路徑依畫布尺寸快取；未變動的坵塊（同一物件參照）不會重新組字串或路徑。
+const pathCache = new WeakMap<PlotRange, { width: number; height: number; path: Path2D }>();
+
+const rangePath = (range: PlotRange, width: number, height: number) => {
+  const cached = pathCache.get(range);
+  if (cached && cached.width === width && cached.height === height) return cached.path;
+  const path = new Path2D();
+  range.points.forEach((p, i) => {
+    const x = (p.x / 100) * width;
+    const y = (p.y / 100) * height;
+    if (i === 0) path.moveTo(x, y);
+    else path.lineTo(x, y);
+  });
+  path.closePath();
+  pathCache.set(range, { width, height, path });
+  return path;
+};
+
+export const CanvasMapLayer: React.FC<{
+  task: FarmlandTask,
+  isEditing: boolean,
+  activeTool: string | null,
+  onUpdate: (u: TaskUpdate) => void
+}> = ({ task, isEditing, activeTool, onUpdate }) => {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const canvasRef = useRef<HTMLCanvasElement>(null);
+  const staticRef = useRef<HTMLCanvasElement | null>(null);
+  const [image, setImage] = useState<HTMLImageElement | null>(null);
+  const [imageError, setImageError] = useState(false);
+  const [size, setSize] = useState({ width: 0, height: 0 });
+  const [selected, setSelected] = useState<string | null>(null);
+  const { drag, start, move, end } = useMarkerDrag(canvasRef, (id, x, y) => {
+    onUpdate(t => ({ markers: t.markers.map(m => m.id === id ? { ...m, x, y } : m) }));
+  });
+
+  useEffect(() => {
+    const img = new Image();
+    img.decoding = 'async';
+    setImage(null);
+    setImageError(false);
+    img.onload = () => setImage(img);
+    img.onerror = () => {
+      console.error('Loading base image failed:', task.baseImage);
+      setImageError(true);
+    };
+    img.src = task.baseImage;
+    return () => {
+      img.onload = null;
+      img.onerror = null;
+    };
+  }, [task.baseImage]);
+
+  useLayoutEffect(() => {
+    const el = containerRef.current;
+    if (!el || !image) return;
+    const measure = () => {
+      const width = el.clientWidth;
+      setSize({ width, height: Math.round(width * image.naturalHeight / image.naturalWidth) });
+    };
+    measure();
+    const observer = new ResizeObserver(measure);
+    observer.observe(el);
+    return () => observer.disconnect();
+  }, [image]);
+
+  // 靜態圖層：拖曳中的標記除外，拖曳時每個影格只需貼上此圖層再畫一個標記。
+  useEffect(() => {
+    if (!image || !size.width) return;
+    const dpr = window.devicePixelRatio || 1;
+    const layer = staticRef.current || (staticRef.current = document.createElement('canvas'));
+    layer.width = Math.round(size.width * dpr);
+    layer.height = Math.round(size.height * dpr);
+    const ctx = layer.getContext('2d')!;
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    ctx.drawImage(image, 0, 0, size.width, size.height);
+
+    ctx.lineWidth = 4;
+    ctx.lineJoin = 'round';
+    const metrics = getTaskMetrics(task);
+    task.ranges.forEach(range => {
+      if (range.points.length < 2) return;
+      const invalid = metrics.ranges.get(range.id)?.selfIntersecting;
+      ctx.fillStyle = invalid ? 'rgba(244, 63, 94, 0.3)' : 'rgba(16, 185, 129, 0.35)';
+      ctx.strokeStyle = invalid ? '#f43f5e' : '#10b981';
+      const path = rangePath(range, size.width, size.height);
+      ctx.fill(path);
+      ctx.stroke(path);
+    });
+
+    task.markers.forEach(m => {
+      if (m.id === drag?.id) return;
+      ctx.drawImage(getSprite(m.type, dpr), (m.x / 100) * size.width - SPRITE_SIZE / 2, (m.y / 100) * size.height - SPRITE_SIZE / 2, SPRITE_SIZE, SPRITE_SIZE);
+    });
+  }, [image, size, task.ranges, task.markers, drag?.id]);
+
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    const layer = staticRef.current;
+    if (!canvas || !layer || !size.width) return;
+    const dpr = window.devicePixelRatio || 1;
+    if (canvas.width !== layer.width || canvas.height !== layer.height) {
+      canvas.width = layer.width;
+      canvas.height = layer.height;
+    }
+    const ctx = canvas.getContext('2d')!;
+    ctx.setTransform(1, 0, 0, 1, 0, 0);
+    ctx.drawImage(layer, 0, 0);
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+
+    if (drag) {
+      const m = task.markers.find(x => x.id === drag.id);
+      if (m) ctx.drawImage(getSprite(m.type, dpr), (drag.x / 100) * size.width - SPRITE_SIZE / 2, (drag.y / 100) * size.height - SPRITE_SIZE / 2, SPRITE_SIZE, SPRITE_SIZE);
+    }
+
+    const sel = isEditing && !drag && selected ? task.markers.find(m => m.id === selected) : undefined;
+    if (sel) {
+      ctx.beginPath();
+      ctx.arc((sel.x / 100) * size.width, (sel.y / 100) * size.height, MARKER_RADIUS + 3, 0, Math.PI * 2);
+      ctx.strokeStyle = '#0f172a';
+      ctx.lineWidth = 2;
+      ctx.stroke();
+    }
+
+    if (activeTool === 'DRAW') {
+      ctx.fillStyle = '#10b981';
+      ctx.strokeStyle = '#ffffff';
+      ctx.lineWidth = 2;
+      task.ranges[task.ranges.length - 1]?.points.forEach(p => {
+        ctx.beginPath();
+        ctx.arc((p.x / 100) * size.width, (p.y / 100) * size.height, 7, 0, Math.PI * 2);
+        ctx.fill();
+        ctx.stroke();
+      });
+    }
+  }, [image, size, task.ranges, task.markers, drag, selected, isEditing, activeTool]);
+
+  const toPercent = (e: React.PointerEvent | React.MouseEvent) => {
+    const rect = canvasRef.current!.getBoundingClientRect();
+    return {
+      x: ((e.clientX - rect.left) / rect.width) * 100,
+      y: ((e.clientY - rect.top) / rect.height) * 100,
+      rect
+    };
+  };
+
+  const handlePointerDown = (e: React.PointerEvent<HTMLCanvasElement>) => {
+    if (!isEditing || activeTool === 'DRAW' || e.button !== 0) return;
+    const { x, y, rect } = toPercent(e);
+    const hit = getPointGrid(task.markers).nearest(x, y, (MARKER_RADIUS / rect.width) * 100, (MARKER_RADIUS / rect.height) * 100);
+    setSelected(hit ? hit.id : null);
+    if (hit) start(hit.id, hit.x, hit.y, e);
+  };
+
+  const handleClick = (e: React.MouseEvent<HTMLCanvasElement>) => {
+    if (!isEditing || activeTool !== 'DRAW') return;
+    const { x, y } = toPercent(e);
+    onUpdate(t => {
+      const lastRange = t.ranges[t.ranges.length - 1];
+      if (!lastRange) return {};
+      return { ranges: [...t.ranges.slice(0, -1), { ...lastRange, points: [...lastRange.points, { x, y }] }] };
+    });
+  };
+
+  const selectedMarker = isEditing && !drag && selected ? task.markers.find(m => m.id === selected) : undefined;
+
+  return (
+    <div
+      ref={containerRef}
+      className={`relative select-none ${isEditing ? 'cursor-crosshair' : 'cursor-default'}`}
+      style={{ minWidth: '400px', maxWidth: '85vh', width: image ? `${image.naturalWidth}px` : '400px' }}
+    >
+      {!image && (imageError ? (
+        <div className="w-full aspect-[3/2] bg-slate-100 flex flex-col items-center justify-center gap-2 text-center p-6">
+          <p className="text-sm font-black text-slate-500">底圖無法載入</p>
+          <p className="text-xs font-bold text-slate-400">可能目前離線且此底圖尚未預載，請連線後重新開啟，或於出發前預載今日路線底圖。</p>
+        </div>
+      ) : (
+        <div className="w-full aspect-[3/2] bg-slate-100 animate-pulse" />
+      ))}
+      <canvas
+        ref={canvasRef}
+        className="block"
+        style={{ width: size.width || undefined, height: size.height || undefined, touchAction: isEditing ? 'none' : undefined }}
+        onPointerDown={handlePointerDown}
+        onPointerMove={move}
+        onPointerUp={end}
+        onPointerCancel={end}
+        onClick={handleClick}
+      />
+      {selectedMarker && (
+        <button
+          className="absolute bg-slate-900 text-white w-6 h-6 rounded-full text-[10px] font-black border-2 border-white shadow-lg flex items-center justify-center"
+          style={{ left: `calc(${selectedMarker.x}% + ${MARKER_RADIUS - 6}px)`, top: `calc(${selectedMarker.y}% - ${MARKER_RADIUS + 6}px)`, zIndex: 10 }}
+          onClick={() => {
+            setSelected(null);
+            onUpdate(t => ({ markers: t.markers.filter(x => x.id !== selectedMarker.id) }));
+          }}
+        >✕</button>
+      )}
+    </div>
+  );
+};
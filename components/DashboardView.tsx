@@ -0,0 +1,99 @@
+import React from 'react';
+import { BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer, PieChart, Pie, Cell, CartesianGrid } from 'recharts';
+import { useAggregates, PHOTO_BUCKETS } from '../services/aggregates';
+
+// 專案儀表板：圖表資料直接取自增量維護的統計快照。
+const STATUS_LABELS = { PENDING: '待處理', COMPLETED: '已完成', EDITING: '修正中' } as const;
+const STATUS_COLORS = { PENDING: '#94a3b8', COMPLETED: '#10b981', EDITING: '#fbbf24' } as const;
+const MARKER_LABELS = { WELL: '地下水井', INLET: '入水口', SERIES_INLET: '串聯入水', SAMPLE: '採樣點位' } as const;
+
+const toSeries = (counts: Record<string, number>) =>
+  Object.entries(counts).map(([name, value]) => ({ name, value })).sort((a, b) => b.value - a.value);
+
+const Card: React.FC<{ title: string, children: React.ReactNode }> = ({ title, children }) => (
+  <section className="bg-white p-8 rounded-[2rem] shadow-sm border border-slate-100">
+    <h2 className="text-lg font-black text-slate-800 mb-6">{title}</h2>
+    <div className="h-64">{children}</div>
+  </section>
+);
+
+const Empty: React.FC = () => (
+  <div className="h-full flex items-center justify-center text-sm font-bold text-slate-300">尚無資料</div>
+);
+
+const HorizontalBars: React.FC<{ data: { name: string, value: number }[], color: string }> = ({ data, color }) =>
+  data.length === 0 ? <Empty /> : (
+    <ResponsiveContainer width="100%" height="100%">
+      <BarChart data={data} layout="vertical" margin={{ left: 24 }}>
+        <CartesianGrid strokeDasharray="3 3" horizontal={false} />
+        <XAxis type="number" allowDecimals={false} />
+        <YAxis type="category" dataKey="name" width={110} tick={{ fontSize: 12 }} />
+        <Tooltip />
+        <Bar dataKey="value" name="筆數" fill={color} radius={[0, 8, 8, 0]} isAnimationActive={false} />
+      </BarChart>
+    </ResponsiveContainer>
+  );
+
+export const DashboardView: React.FC<{ projectName: string, onBack: () => void }> = ({ projectName, onBack }) => {
+  const stats = useAggregates();
+  const statusData = (Object.keys(STATUS_LABELS) as (keyof typeof STATUS_LABELS)[])
+    .map(key => ({ key, name: STATUS_LABELS[key], value: stats.status[key] }))
+    .filter(d => d.value > 0);
+  const markerData = (Object.keys(MARKER_LABELS) as (keyof typeof MARKER_LABELS)[])
+    .map(key => ({ name: MARKER_LABELS[key], value: stats.markers[key] }));
+  const photoData = PHOTO_BUCKETS.map(bucket => ({ name: `${bucket} 張`, value: stats.photoBuckets[bucket] }));
+  const completion = stats.total ? Math.round((stats.status.COMPLETED / stats.total) * 100) : 0;
+
+  return (
+    <div className="min-h-screen bg-slate-50 p-6 sm:p-10">
+      <div className="max-w-5xl mx-auto space-y-8">
+        <header className="flex items-center gap-5">
+          <button onClick={onBack} className="p-3 bg-white border border-slate-100 hover:bg-slate-100 rounded-2xl transition-all active:scale-90">
+            <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={3} stroke="currentColor" className="w-5 h-5"><path strokeLinecap="round" strokeLinejoin="round" d="M10.5 19.5 3 12m0 0 7.5-7.5M3 12h18" /></svg>
+          </button>
+          <div>
+            <h1 className="text-3xl font-black text-slate-800 tracking-tight">統計儀表板</h1>
+            <p className="text-slate-500 text-sm font-bold mt-1">{projectName}・共 {stats.total} 筆・完成率 {completion}%・照片 {stats.photos} 張</p>
+          </div>
+        </header>
+
+        <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
+          <Card title="完成狀態">
+            {statusData.length === 0 ? <Empty /> : (
+              <ResponsiveContainer width="100%" height="100%">
+                <PieChart>
+                  <Pie data={statusData} dataKey="value" nameKey="name" innerRadius="55%" outerRadius="85%" paddingAngle={2} isAnimationActive={false} label>
+                    {statusData.map(d => <Cell key={d.key} fill={STATUS_COLORS[d.key]} />)}
+                  </Pie>
+                  <Tooltip />
+                </PieChart>
+              </ResponsiveContainer>
+            )}
+          </Card>
+          <Card title="標記類型">
+            <HorizontalBars data={markerData} color="#6366f1" />
+          </Card>
+          <Card title="灌溉方式">
+            <HorizontalBars data={toSeries(stats.irrigation)} color="#3b82f6" />
+          </Card>
+          <Card title="農地使用狀態">
+            <HorizontalBars data={toSeries(stats.landStatus)} color="#10b981" />
+          </Card>
+          <div className="lg:col-span-2">
+            <Card title="每筆任務照片數">
+              <ResponsiveContainer width="100%" height="100%">
+                <BarChart data={photoData}>
+                  <CartesianGrid strokeDasharray="3 3" vertical={false} />
+                  <XAxis dataKey="name" />
+                  <YAxis allowDecimals={false} />
+                  <Tooltip />
+                  <Bar dataKey="value" name="任務數" fill="#f59e0b" radius={[8, 8, 0, 0]} isAnimationActive={false} />
+                </BarChart>
+              </ResponsiveContainer>
+            </Card>
+          </div>
+        </div>
+      </div>
+    </div>
+  );
+};
@@ -0,0 +1,74 @@
+import React, { Profiler, useEffect, useReducer, useState } from 'react';
+import {
+  PROFILING, recordRender, renderStats, writeLog, longTasks, longTaskCount, observeLongTasks, resetProfiler
+} from '../services/profiler';
+
+// 開發模式效能面板：每 0.5 秒讀取一次紀錄，面板本身不在量測範圍內。
+const REFRESH_MS = 500;
+
+/** 開發模式下以 React Profiler 量測子樹；正式版直接回傳子元件。 */
+export const Profiled: React.FC<{ id: string, children: React.ReactNode }> = ({ id, children }) =>
+  PROFILING ? <Profiler id={id} onRender={recordRender}>{children}</Profiler> : <>{children}</>;
+
+const formatBytes = (n: number) => (n >= 1048576 ? `${(n / 1048576).toFixed(1)} MB` : `${(n / 1024).toFixed(1)} KB`);
+
+export const DevProfiler: React.FC = () => {
+  const [open, setOpen] = useState(false);
+  const [, refresh] = useReducer((n: number) => n + 1, 0);
+
+  useEffect(() => { observeLongTasks(); }, []);
+
+  useEffect(() => {
+    if (!open) return;
+    const timer = setInterval(refresh, REFRESH_MS);
+    return () => clearInterval(timer);
+  }, [open]);
+
+  if (!open) {
+    return (
+      <button
+        onClick={() => setOpen(true)}
+        className="fixed bottom-4 right-4 z-[1000] bg-slate-900/90 text-emerald-400 text-[10px] font-black px-3 py-2 rounded-xl shadow-xl font-mono"
+      >
+        PERF{longTaskCount > 0 && ` · ${longTaskCount} long`}
+      </button>
+    );
+  }
+
+  const renders = Array.from(renderStats.entries()).sort((a, b) => b[1].total - a[1].total);
+
+  return (
+    <div className="fixed bottom-4 right-4 z-[1000] w-80 max-h-[70vh] overflow-y-auto bg-slate-900/95 text-slate-200 text-[11px] font-mono rounded-2xl shadow-2xl p-4 space-y-4">
+      <div className="flex justify-between items-center">
+        <span className="font-black text-emerald-400">效能面板</span>
+        <div className="flex gap-3">
+          <button onClick={() => { resetProfiler(); refresh(); }} className="text-slate-400 hover:text-white">重設</button>
+          <button onClick={() => setOpen(false)} className="text-slate-400 hover:text-white">✕</button>
+        </div>
+      </div>
+
+      <table className="w-full">
+        <thead><tr className="text-slate-500"><th className="text-left">渲染</th><th className="text-right">次數</th><th className="text-right">總 ms</th><th className="text-right">上次</th></tr></thead>
+        <tbody>
+          {renders.map(([id, s]) => (
+            <tr key={id}><td>{id}</td><td className="text-right">{s.count}</td><td className="text-right">{s.total.toFixed(1)}</td><td className="text-right">{s.last.toFixed(1)}</td></tr>
+          ))}
+        </tbody>
+      </table>
+
+      <div>
+        <p className="text-slate-500 mb-1">儲存寫入</p>
+        {writeLog.length === 0 ? <p className="text-slate-600">—</p> : writeLog.map(w => (
+          <p key={w.at + w.duration}>{new Date(w.at).toLocaleTimeString()}  {w.tasks} 筆{w.removed ? ` / 刪 ${w.removed}` : ''}  {formatBytes(w.bytes)}  {w.duration.toFixed(1)} ms</p>
+        ))}
+      </div>
+
+      <div>
+        <p className="text-slate-500 mb-1">長任務（&gt;50 ms）共 {longTaskCount} 次</p>
+        {longTasks.map(t => (
+          <p key={t.at} className={t.duration > 200 ? 'text-rose-400' : ''}>{new Date(t.at).toLocaleTimeString()}  {t.duration.toFixed(0)} ms</p>
+        ))}
+      </div>
+    </div>
+  );
+};
@@ -0,0 +1,20 @@
+import React, { useState, useEffect } from 'react';
+import { PhotoRef } from '../types';
+import { acquirePhotoUrl, releasePhotoUrl, PhotoVariant } from '../services/photoStore';
+
+// 照片縮圖：掛載時取得 object URL，卸載（例如關閉任務）時釋放。
+export const PhotoThumb: React.FC<{ photoRef: PhotoRef, className?: string, variant?: PhotoVariant }> = ({ photoRef, className, variant = 'thumb' }) => {
+  const [url, setUrl] = useState<string | null>(null);
+
+  useEffect(() => {
+    let active = true;
+    acquirePhotoUrl(photoRef, variant).then(u => { if (active) setUrl(u); });
+    return () => {
+      active = false;
+      releasePhotoUrl(photoRef, variant);
+    };
+  }, [photoRef, variant]);
+
+  if (!url) return <div className={`${className || ''} bg-slate-100 animate-pulse`} />;
+  return <img src={url} className={className} alt="upload" loading="lazy" decoding="async" />;
+};
@@ -0,0 +1,69 @@
+import React, { memo } from 'react';
+import { useTask } from '../services/taskStore';
+import { useBaseImageCached } from '../services/imageCache';
+import { getTaskMetrics, formatArea, useCalibrationVersion } from '../services/geometry';
+import { PROFILING, countRender } from '../services/profiler';
+
+export const StatusBadge: React.FC<{ status: string }> = ({ status }) => {
+  const styles = {
+    PENDING: 'bg-slate-100 text-slate-500',
+    COMPLETED: 'bg-emerald-500 text-white shadow-lg shadow-emerald-200',
+    EDITING: 'bg-amber-400 text-white shadow-lg shadow-amber-200'
+  }[status] || 'bg-slate-100 text-slate-600';
+  const label = { PENDING: '待處理', COMPLETED: '已完成', EDITING: '修正中' }[status] || status;
+  return <span className={`text-[10px] font-black px-4 py-1.5 rounded-full uppercase tracking-[0.1em] ${styles}`}>{label}</span>;
+};
+
+const OfflineBadge: React.FC<{ url: string }> = ({ url }) => {
+  const cached = useBaseImageCached(url);
+  return (
+    <span className={`text-[10px] font-black px-2 py-0.5 rounded uppercase tracking-widest ${cached ? 'bg-sky-50 text-sky-600' : 'bg-slate-50 text-slate-300'}`}>
+      {cached ? '底圖已離線' : '底圖未快取'}
+    </span>
+  );
+};
+
+// 任務卡片：只訂閱自己的任務，其他任務被編輯時不會重新渲染。
+export const TaskCard = memo<{ id: string, onSelect: (id: string) => void, selected?: boolean }>(({ id, onSelect, selected }) => {
+  const task = useTask(id);
+  useCalibrationVersion();
+  if (PROFILING) countRender('TaskCard');
+  if (!task) return null;
+  const metrics = task.ranges.length > 0 ? getTaskMetrics(task) : null;
+  return (
+    <button
+      onClick={() => onSelect(task.id)}
+      aria-pressed={selected}
+      className={`bg-white p-7 rounded-[2rem] border shadow-sm hover:border-emerald-500 hover:shadow-2xl transition-all text-left group relative overflow-hidden ${selected ? 'border-emerald-500 ring-4 ring-emerald-100' : 'border-slate-100'}`}
+    >
+      <div className={`absolute top-0 left-0 w-2 h-full transition-colors ${task.status === 'COMPLETED' ? 'bg-emerald-500' : 'bg-amber-400'}`} />
+      <div className="flex justify-between items-start mb-6">
+        <span className="text-xs font-black text-emerald-800 bg-emerald-50 px-3 py-1.5 rounded-xl uppercase tracking-tighter">{task.code}</span>
+        <StatusBadge status={task.status} />
+      </div>
+      <h3 className="font-black text-slate-800 text-2xl mb-2 group-hover:text-emerald-700 transition-colors">{task.owner}</h3>
+      <div className="flex items-center gap-3">
+        <p className="text-xs text-slate-400 font-bold uppercase tracking-widest">{task.year}年度 調查樣本</p>
+        <OfflineBadge url={task.baseImage} />
+      </div>
+
+      <div className="mt-8 flex items-center justify-between">
+        {metrics ? (
+          <span className="text-xs font-bold text-slate-500">
+            {task.ranges.length} 個坵塊{metrics.totalArea !== undefined && `・${formatArea(metrics.totalArea)}`}
+            {metrics.invalid > 0 && <span className="text-rose-500">・{metrics.invalid} 個邊界交錯</span>}
+          </span>
+        ) : (
+          <span className="text-[10px] font-black text-slate-300 group-hover:text-emerald-500 transition-colors uppercase tracking-[0.2em]">Enter Inspection</span>
+        )}
+        <div className={`w-10 h-10 rounded-full flex items-center justify-center transition-all shadow-inner ${selected ? 'bg-emerald-500 text-white' : 'bg-slate-50 text-slate-300 group-hover:bg-emerald-500 group-hover:text-white'}`}>
+          {selected === undefined ? (
+            <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={3} stroke="currentColor" className="w-5 h-5"><path strokeLinecap="round" strokeLinejoin="round" d="m8.25 4.5 7.5 7.5-7.5 7.5" /></svg>
+          ) : (
+            <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={3} stroke="currentColor" className={`w-5 h-5 ${selected ? '' : 'opacity-0 group-hover:opacity-100'}`}><path strokeLinecap="round" strokeLinejoin="round" d="m4.5 12.75 6 6 9-13.5" /></svg>
+          )}
+        </div>
+      </div>
+    </button>
+  );
+});
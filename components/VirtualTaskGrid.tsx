@@ -0,0 +1,76 @@
+import React, { useState, useLayoutEffect, useRef } from 'react';
+import { TaskCard } from './TaskCard';
+
+// 虛擬化任務網格：依視窗捲動位置只渲染可見列，DOM 節點數與專案大小無關。
+const ROW_HEIGHT = 248;
+const GAP = 24;
+const OVERSCAN_ROWS = 3;
+
+// 與 Tailwind 的 sm / lg 斷點一致：1 / 2 / 3 欄。
+const columnsFor = (width: number) => (width >= 1024 ? 3 : width >= 640 ? 2 : 1);
+
+// 多選模式下傳入 selected，卡片點擊改為切換選取。
+export const VirtualTaskGrid: React.FC<{
+  ids: string[],
+  onSelect: (id: string) => void,
+  selected?: ReadonlySet<string>
+}> = ({ ids, onSelect, selected }) => {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const [columns, setColumns] = useState(() => columnsFor(window.innerWidth));
+  const [range, setRange] = useState({ start: 0, end: 0 });
+
+  const rowCount = Math.ceil(ids.length / columns);
+  const stride = ROW_HEIGHT + GAP;
+
+  useLayoutEffect(() => {
+    let frame = 0;
+    const measure = () => {
+      frame = 0;
+      const el = containerRef.current;
+      if (!el) return;
+      const cols = columnsFor(window.innerWidth);
+      const top = el.getBoundingClientRect().top;
+      const first = Math.floor(Math.max(0, -top) / stride);
+      const visible = Math.ceil(window.innerHeight / stride) + 1;
+      setColumns(cols);
+      setRange(prev => {
+        const start = Math.max(0, first - OVERSCAN_ROWS);
+        const end = first + visible + OVERSCAN_ROWS;
+        return prev.start === start && prev.end === end ? prev : { start, end };
+      });
+    };
+    const schedule = () => { if (!frame) frame = requestAnimationFrame(measure); };
+    measure();
+    window.addEventListener('scroll', schedule, { passive: true });
+    window.addEventListener('resize', schedule);
+    return () => {
+      if (frame) cancelAnimationFrame(frame);
+      window.removeEventListener('scroll', schedule);
+      window.removeEventListener('resize', schedule);
+    };
+  }, [stride, ids.length]);
+
+  const start = Math.min(range.start, rowCount);
+  const end = Math.min(range.end, rowCount);
+  const visibleIds = ids.slice(start * columns, end * columns);
+
+  return (
+    <div ref={containerRef} className="relative" style={{ height: Math.max(0, rowCount * stride - GAP) }}>
+      <div
+        className="absolute inset-x-0 grid gap-6"
+        style={{ top: start * stride, gridTemplateColumns: `repeat(${columns}, minmax(0, 1fr))`, gridAutoRows: ROW_HEIGHT }}
+      >
+        {visibleIds.map(id => <TaskCard key={id} id={id} onSelect={onSelect} selected={selected?.has(id)} />)}
+      </div>
+    </div>
+  );
+};
+
+/** 保存並還原清單捲動位置，從編輯器返回時回到原處。 */
+export const useScrollRestoration = (positionRef: React.MutableRefObject<number>) => {
+  useLayoutEffect(() => {
+    window.scrollTo(0, positionRef.current);
+    return () => { positionRef.current = window.scrollY; };
+  }, []);
+};
+
@@ -0,0 +1,64 @@
+import React, { useState, useRef, useEffect } from 'react';
+
+// 標記拖曳：拖曳中的位置只存在元件內，每個動畫影格最多重繪一次，
+// 放開時才寫回任務庫一次。
+export interface DragState {
+  id: string;
+  x: number;
+  y: number;
+}
+
+interface ActiveDrag extends DragState {
+  rect: DOMRect;
+  pointerId: number;
+  moved: boolean;
+  frame: number;
+}
+
+const clamp = (v: number) => Math.max(0, Math.min(100, v));
+
+export const useMarkerDrag = (
+  containerRef: React.RefObject<HTMLElement | null>,
+  onCommit: (id: string, x: number, y: number) => void
+) => {
+  const [drag, setDrag] = useState<DragState | null>(null);
+  const active = useRef<ActiveDrag | null>(null);
+
+  useEffect(() => () => {
+    if (active.current?.frame) cancelAnimationFrame(active.current.frame);
+  }, []);
+
+  const start = (id: string, x: number, y: number, e: React.PointerEvent<Element>) => {
+    if (!containerRef.current || active.current) return;
+    e.preventDefault();
+    e.stopPropagation();
+    e.currentTarget.setPointerCapture(e.pointerId);
+    active.current = { id, x, y, rect: containerRef.current.getBoundingClientRect(), pointerId: e.pointerId, moved: false, frame: 0 };
+  };
+
+  const move = (e: React.PointerEvent<Element>) => {
+    const d = active.current;
+    if (!d || e.pointerId !== d.pointerId) return;
+    d.x = clamp(((e.clientX - d.rect.left) / d.rect.width) * 100);
+    d.y = clamp(((e.clientY - d.rect.top) / d.rect.height) * 100);
+    d.moved = true;
+    if (!d.frame) {
+      d.frame = requestAnimationFrame(() => {
+        d.frame = 0;
+        setDrag({ id: d.id, x: d.x, y: d.y });
+      });
+    }
+  };
+
+  const end = (e: React.PointerEvent<Element>) => {
+    const d = active.current;
+    if (!d || e.pointerId !== d.pointerId) return;
+    active.current = null;
+    if (d.frame) cancelAnimationFrame(d.frame);
+    if (e.currentTarget.hasPointerCapture(e.pointerId)) e.currentTarget.releasePointerCapture(e.pointerId);
+    setDrag(null);
+    if (d.moved && e.type !== 'pointercancel') onCommit(d.id, d.x, d.y);
+  };
+
+  return { drag, start, move, end };
+};
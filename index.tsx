@@ -2,6 +2,9 @@
 import React from 'react';
 import ReactDOM from 'react-dom/client';
 import App from './App';
+import { registerServiceWorker } from './services/imageCache';
+import { DevProfiler } from './components/DevProfiler';
+import { PROFILING } from './services/profiler';
 
 const rootElement = document.getElementById('root');
 if (!rootElement) {
@@ -12,5 +15,8 @@ const root = ReactDOM.createRoot(rootElement);
 root.render(
   <React.StrictMode>
     <App />
+    {PROFILING && <DevProfiler />}
   </React.StrictMode>
 );
+
+registerServiceWorker();
@@ -0,0 +1,66 @@
+// 離線 Service Worker：
+//   - 應用程式外殼（頁面、打包資源、CDN 腳本與字型）採 stale-while-revalidate 快取。
+//   - 現勘底圖只讀取 services/imageCache.ts 預載的快取，容量與淘汰由頁面端管理。
+const SHELL_CACHE = 'farmland-shell-v1';
+const BASE_IMAGE_CACHE = 'farmland-base-images'; // 與 services/imageCache.ts 相同
+const SHELL_URLS = ['/', '/index.html'];
+const CDN_HOSTS = ['cdn.tailwindcss.com', 'esm.sh', 'fonts.googleapis.com', 'fonts.gstatic.com'];
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(SHELL_CACHE).then(cache => cache.addAll(SHELL_URLS)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k.startsWith('farmland-shell-') && k !== SHELL_CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+const staleWhileRevalidate = async (event, request) => {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(request);
+  const network = fetch(request).then(response => {
+    if (response.ok || response.type === 'opaque') cache.put(request, response.clone());
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => undefined));
+    return cached;
+  }
+  return network;
+};
+
+// 頁面導覽優先走網路，離線時退回快取的 index.html。
+const networkFirstPage = async request => {
+  const cache = await caches.open(SHELL_CACHE);
+  try {
+    const response = await fetch(request);
+    if (response.ok) cache.put('/index.html', response.clone());
+    return response;
+  } catch (err) {
+    const cached = await cache.match('/index.html');
+    if (cached) return cached;
+    throw err;
+  }
+};
+
+const baseImageOrNetwork = async request => {
+  const cache = await caches.open(BASE_IMAGE_CACHE);
+  return (await cache.match(request.url)) || fetch(request);
+};
+
+self.addEventListener('fetch', event => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+
+  if (request.mode === 'navigate') {
+    event.respondWith(networkFirstPage(request));
+  } else if (request.destination === 'image') {
+    event.respondWith(baseImageOrNetwork(request));
+  } else if (url.origin === self.location.origin || CDN_HOSTS.includes(url.hostname)) {
+    event.respondWith(staleWhileRevalidate(event, request));
+  }
+});
@@ -0,0 +1,102 @@
+// AI 分析佇列整合檢查：啟動 mock-gemini.mjs，以 services/analysisQueue.ts 實際走完並行、重試、快取與寫回流程。
+// 用法：npm run analysis:check
+import '../bench/dom';
+import assert from 'node:assert/strict';
+import { spawn } from 'node:child_process';
+import path from 'node:path';
+import { PhotoRef } from '../types';
+import { generateProject, photoHashFor } from '../bench/fixtures';
+import { taskStore } from '../services/taskStore';
+import { putPhoto, toPhotoRef } from '../services/photoStore';
+import { analyzePhoto, analyzeTaskPhotos } from '../services/analysisQueue';
+
+const PORT = Number(process.env.PORT || 18787);
+const endpoint = `http://localhost:${PORT}`;
+// 與 services/analysisQueue.ts 的 CONCURRENCY 一致。
+const CONCURRENCY = 2;
+// 前兩個請求分別回應 429 與 503，其後一律成功。
+const FAIL_FIRST = [429, 503];
+
+const startServer = () => new Promise<ReturnType<typeof spawn>>((resolve, reject) => {
+  const server = spawn(process.execPath, [path.resolve('scripts/mock-gemini.mjs')], {
+    env: { ...process.env, PORT: String(PORT), FAIL_RATE: '0', DELAY: '200', FAIL_FIRST: FAIL_FIRST.join(',') },
+    stdio: ['ignore', 'pipe', 'inherit']
+  });
+  server.stdout!.on('data', chunk => { if (String(chunk).includes('listening')) resolve(server); });
+  server.on('exit', code => reject(new Error(`mock gemini exited with ${code}`)));
+});
+
+const serverStats = async (): Promise<{ requests: number, inflight: number, maxInflight: number }> =>
+  (await fetch(`${endpoint}/stats`)).json();
+
+const step = async (name: string, fn: () => Promise<void>) => {
+  await fn();
+  console.log(`ok - ${name}`);
+};
+
+const main = async () => {
+  const server = await startServer();
+  // geminiService 於第一次請求時才建立用戶端，此時設定即可生效。
+  process.env.API_KEY = 'mock-key';
+  process.env.GEMINI_BASE_URL = endpoint;
+
+  const refs: PhotoRef[] = [];
+  for (let i = 0; i < 6; i++) {
+    refs.push(await putPhoto(new Blob([new Uint8Array(256).fill(i)], { type: 'image/jpeg' }), photoHashFor(i)));
+  }
+  const [task, twin] = generateProject(2).tasks.map(t => ({
+    ...t,
+    formData: { ...t.formData, photos: { irrigation: refs.slice(0, 2), land: refs.slice(2, 4), surrounding: refs.slice(4) }, analysis: undefined }
+  }));
+  taskStore.replaceAll([task, twin]);
+
+  let elapsed = 0;
+  await step('analyzeTaskPhotos writes every result back to the task', async () => {
+    const started = performance.now();
+    const progress = await analyzeTaskPhotos(task.id, '水稻');
+    assert.deepEqual(progress, { done: refs.length, failed: 0, total: refs.length });
+    const analysis = taskStore.getTask(task.id)!.formData.analysis!;
+    assert.deepEqual(Object.keys(analysis).sort(), [...refs].sort());
+    Object.values(analysis).forEach(text => assert.match(text, /模擬分析/));
+    elapsed = performance.now() - started;
+  });
+
+  await step('429 and 5xx responses are retried with backoff', async () => {
+    const stats = await serverStats();
+    assert.equal(stats.requests, refs.length + FAIL_FIRST.length);
+    // 第一次重試至少等待 BASE_DELAY 的一半（1000ms × 0.5）。
+    assert.ok(elapsed >= 500, `finished in ${elapsed.toFixed(0)}ms without backing off`);
+  });
+
+  await step(`no more than ${CONCURRENCY} requests are in flight`, async () => {
+    const stats = await serverStats();
+    assert.equal(stats.maxInflight, CONCURRENCY);
+    assert.equal(stats.inflight, 0);
+  });
+
+  await step('the same photo and crop type is served from cache', async () => {
+    const before = (await serverStats()).requests;
+    assert.match(await analyzePhoto(refs[0], '水稻'), /模擬分析/);
+    const progress = await analyzeTaskPhotos(twin.id, '水稻');
+    assert.deepEqual(progress, { done: refs.length, failed: 0, total: refs.length });
+    assert.equal((await serverStats()).requests, before);
+  });
+
+  await step('a different crop type is analyzed again', async () => {
+    const before = (await serverStats()).requests;
+    await analyzePhoto(toPhotoRef(photoHashFor(0)), '玉米');
+    assert.equal((await serverStats()).requests, before + 1);
+  });
+
+  await step('tasks with results are skipped', async () => {
+    const progress = await analyzeTaskPhotos(task.id, '水稻');
+    assert.deepEqual(progress, { done: 0, failed: 0, total: 0 });
+  });
+
+  server.kill();
+};
+
+main().then(() => process.exit(0), err => {
+  console.error(err);
+  process.exit(1);
+});
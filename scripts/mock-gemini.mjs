@@ -0,0 +1,63 @@
+// 本機 Gemini API 模擬服務，供開發時驗證分析佇列（並行、重試、快取）而不消耗配額。
+// 用法：npm run mock:gemini，並於 .env.local 設定 GEMINI_BASE_URL=http://localhost:8787
+// 環境變數：PORT、FAIL_RATE（回應 429 的機率，0-1）、DELAY（回應延遲 ms）、
+// FAIL_FIRST（前幾個請求依序回應的錯誤狀態碼，例如 429,503）
+// GET /stats 回傳請求數與同時處理中的最大請求數，供 npm run analysis:check 檢查。
+import http from 'node:http';
+
+const PORT = Number(process.env.PORT || 8787);
+const FAIL_RATE = Number(process.env.FAIL_RATE || 0.2);
+const DELAY = Number(process.env.DELAY || 600);
+const FAIL_FIRST = (process.env.FAIL_FIRST || '').split(',').filter(Boolean).map(Number);
+
+const ERRORS = {
+  429: 'RESOURCE_EXHAUSTED',
+  500: 'INTERNAL',
+  503: 'UNAVAILABLE'
+};
+
+let requests = 0;
+let inflight = 0;
+let maxInflight = 0;
+
+const send = (res, status, body) => {
+  res.writeHead(status, {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
+  });
+  res.end(JSON.stringify(body));
+};
+
+http.createServer((req, res) => {
+  if (req.method === 'OPTIONS') return send(res, 204, {});
+  if (req.method === 'GET' && req.url === '/stats') return send(res, 200, { requests, inflight, maxInflight });
+  if (req.method !== 'POST' || !/:generateContent$/.test(req.url.split('?')[0])) {
+    return send(res, 404, { error: { code: 404, message: 'Not found', status: 'NOT_FOUND' } });
+  }
+
+  let bytes = 0;
+  req.on('data', chunk => { bytes += chunk.length; });
+  req.on('end', () => {
+    const n = ++requests;
+    maxInflight = Math.max(maxInflight, ++inflight);
+    setTimeout(() => {
+      inflight--;
+      const status = FAIL_FIRST[n - 1] ?? (Math.random() < FAIL_RATE ? 429 : 200);
+      if (status !== 200) {
+        console.log(`#${n} ${req.url} ${bytes}B -> ${status}`);
+        return send(res, status, { error: { code: status, message: `Mock error ${status}`, status: ERRORS[status] || 'UNKNOWN' } });
+      }
+      console.log(`#${n} ${req.url} ${bytes}B -> 200`);
+      send(res, 200, {
+        candidates: [{
+          content: { role: 'model', parts: [{ text: `（模擬分析 #${n}）作物生長狀態良好，未見明顯病蟲害或缺水跡象。照片大小 ${bytes} 位元組。` }] },
+          finishReason: 'STOP'
+        }]
+      });
+    }, DELAY);
+  });
+}).listen(PORT, () => {
+  console.log(`Mock Gemini API listening on http://localhost:${PORT} (FAIL_RATE=${FAIL_RATE}, DELAY=${DELAY}ms${FAIL_FIRST.length ? `, FAIL_FIRST=${FAIL_FIRST}` : ''})`);
+});
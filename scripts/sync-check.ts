@@ -0,0 +1,114 @@
+// 同步協定整合檢查：啟動 sync-server.mjs，以 services/syncOutbox.ts 實際走完上傳、重送、衝突與刪除流程。
+// 用法：npm run sync:check
+import '../bench/dom';
+import assert from 'node:assert/strict';
+import { spawn } from 'node:child_process';
+import { mkdtempSync, existsSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import path from 'node:path';
+import { generateProject, photoHashFor } from '../bench/fixtures';
+import { taskStore } from '../services/taskStore';
+import { putPhoto } from '../services/photoStore';
+import { syncOutbox, setSyncEndpoint, TaskDelta, DeltaResult } from '../services/syncOutbox';
+
+const PORT = Number(process.env.PORT || 18788);
+const endpoint = `http://localhost:${PORT}`;
+const dataDir = mkdtempSync(path.join(tmpdir(), 'farmland-sync-'));
+
+const startServer = () => new Promise<ReturnType<typeof spawn>>((resolve, reject) => {
+  const server = spawn(process.execPath, [path.resolve('scripts/sync-server.mjs')], {
+    env: { ...process.env, PORT: String(PORT), DATA_DIR: dataDir },
+    stdio: ['ignore', 'pipe', 'inherit']
+  });
+  server.stdout!.on('data', chunk => { if (String(chunk).includes('listening')) resolve(server); });
+  server.on('exit', code => reject(new Error(`sync server exited with ${code}`)));
+});
+
+const serverTasks = async (): Promise<Record<string, { version: number, fields: any }>> =>
+  (await fetch(`${endpoint}/tasks`)).json();
+
+const postDeltas = async (deviceId: string, deltas: TaskDelta[]) => {
+  const res = await fetch(`${endpoint}/sync`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ deviceId, deltas }) });
+  return (await res.json()).results as DeltaResult[];
+};
+
+const step = async (name: string, fn: () => Promise<void>) => {
+  await fn();
+  console.log(`ok - ${name}`);
+};
+
+const main = async () => {
+  const server = await startServer();
+  setSyncEndpoint(endpoint);
+
+  const { tasks } = generateProject(12, 115, 4);
+  for (let i = 0; i < 4; i++) {
+    await putPhoto(new Blob([new Uint8Array(256).fill(i)], { type: 'image/jpeg' }), photoHashFor(i));
+  }
+  taskStore.replaceAll(tasks.map((t, i) => ({ ...t, status: i < 6 ? 'COMPLETED' : 'PENDING' })));
+  const stop = await syncOutbox.start();
+
+  await step('completed tasks are uploaded with their photos', async () => {
+    await syncOutbox.sync();
+    assert.equal(syncOutbox.getStatus().pending, 0);
+    const remote = await serverTasks();
+    assert.deepEqual(Object.keys(remote).sort(), tasks.slice(0, 6).map(t => t.id).sort());
+    Object.values(remote).forEach(t => assert.equal(t.version, 1));
+    const refs = tasks.slice(0, 6).flatMap(t => Object.values(t.formData.photos).flat());
+    new Set(refs.map(r => r.slice('photo:'.length))).forEach(hash => {
+      assert.ok(existsSync(path.join(dataDir, 'photos', hash)), `photo ${hash} uploaded`);
+    });
+  });
+
+  const edited = tasks[0].id;
+  await step('edits are sent as field deltas', async () => {
+    taskStore.update(edited, { markers: [] });
+    await syncOutbox.sync();
+    const remote = (await serverTasks())[edited];
+    assert.equal(remote.version, 2);
+    assert.deepEqual(remote.fields.markers, []);
+  });
+
+  await step('resending an applied version is a duplicate', async () => {
+    const delta = { taskId: edited, code: tasks[0].code, baseVersion: 1, version: 2, changes: { markers: [] } };
+    const [result] = await postDeltas(localStorage.getItem('farmland_device_id')!, [delta]);
+    assert.equal(result.status, 'duplicate');
+  });
+
+  await step('a conflicting version falls back to the full task', async () => {
+    await postDeltas('other-device', [{ taskId: edited, code: tasks[0].code, baseVersion: 2, version: 3, changes: { status: 'EDITING' } }]);
+    taskStore.update(edited, { status: 'COMPLETED', markers: tasks[1].markers });
+    await syncOutbox.sync();
+    assert.equal(syncOutbox.getStatus().pending, 1);
+    await syncOutbox.sync();
+    assert.equal(syncOutbox.getStatus().pending, 0);
+    const remote = (await serverTasks())[edited];
+    assert.equal(remote.version, 4);
+    assert.equal(remote.fields.status, 'COMPLETED');
+    assert.deepEqual(remote.fields.markers, tasks[1].markers);
+  });
+
+  await step('tasks deleted before syncing do not stay pending', async () => {
+    taskStore.update(tasks[7].id, { status: 'COMPLETED' });
+    taskStore.update(tasks[8].id, { status: 'COMPLETED' });
+    assert.equal(syncOutbox.getStatus().pending, 2);
+    taskStore.remove([tasks[7].id]);
+    taskStore.replaceAll([]);
+    assert.equal(syncOutbox.getStatus().pending, 0);
+    await syncOutbox.sync();
+    assert.equal(syncOutbox.getStatus().pending, 0);
+    assert.ok(!(tasks[7].id in await serverTasks()));
+  });
+
+  stop();
+  server.kill();
+};
+
+main().then(() => {
+  rmSync(dataDir, { recursive: true, force: true });
+  process.exit(0);
+}, err => {
+  console.error(err);
+  rmSync(dataDir, { recursive: true, force: true });
+  process.exit(1);
+});
@@ -0,0 +1,88 @@
+// 同步參考伺服器：實作 services/syncOutbox.ts 使用的協定，供開發與整合驗證。
+// 用法：npm run sync:server，於管理中心「結果同步」填入 http://localhost:8788
+// 環境變數：PORT、DATA_DIR（資料存放目錄，預設 .sync-data）
+//
+//   POST /sync            { deviceId, deltas: TaskDelta[] } -> { results: DeltaResult[] }
+//   POST /photos/missing  { hashes: string[] }              -> { missing: string[] }
+//   PUT  /photos/:hash    照片二進位內容（hash 為照片內容的 SHA-256；舊版裝置以縮圖前的原始檔計算，故不重新驗證）
+//   GET  /tasks           目前合併後的任務內容
+import http from 'node:http';
+import fs from 'node:fs';
+import path from 'node:path';
+
+const PORT = Number(process.env.PORT || 8788);
+const DATA_DIR = path.resolve(process.env.DATA_DIR || '.sync-data');
+const STATE_FILE = path.join(DATA_DIR, 'tasks.json');
+const PHOTO_DIR = path.join(DATA_DIR, 'photos');
+
+fs.mkdirSync(PHOTO_DIR, { recursive: true });
+
+// tasks[taskId] = { code, version, fields, applied: { [version]: deviceId } }
+const tasks = fs.existsSync(STATE_FILE) ? JSON.parse(fs.readFileSync(STATE_FILE, 'utf8')) : {};
+const save = () => fs.writeFileSync(STATE_FILE, JSON.stringify(tasks));
+
+const send = (res, status, body) => {
+  res.writeHead(status, {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS'
+  });
+  res.end(body === undefined ? '' : JSON.stringify(body));
+};
+
+const readBody = req => new Promise((resolve, reject) => {
+  const chunks = [];
+  req.on('data', c => chunks.push(c));
+  req.on('end', () => resolve(Buffer.concat(chunks)));
+  req.on('error', reject);
+});
+
+/** 依版本號套用差異：同一裝置重送的版本視為重複，基準版本不符視為衝突。 */
+const applyDelta = (deviceId, delta) => {
+  const task = tasks[delta.taskId] || (tasks[delta.taskId] = { code: delta.code, version: 0, fields: { formData: {} }, applied: {} });
+  if (task.applied[delta.version] === deviceId) return { taskId: delta.taskId, status: 'duplicate', version: task.version };
+  if (delta.baseVersion !== task.version) return { taskId: delta.taskId, status: 'conflict', version: task.version };
+  const { formData, ...rest } = delta.changes;
+  task.fields = { ...task.fields, ...rest, formData: { ...task.fields.formData, ...formData } };
+  task.version = delta.version;
+  task.applied[delta.version] = deviceId;
+  return { taskId: delta.taskId, status: 'applied', version: task.version };
+};
+
+http.createServer(async (req, res) => {
+  const url = new URL(req.url, `http://${req.headers.host}`);
+  try {
+    if (req.method === 'OPTIONS') return send(res, 204);
+
+    if (req.method === 'POST' && url.pathname === '/sync') {
+      const { deviceId, deltas } = JSON.parse(await readBody(req));
+      const results = deltas.map(d => applyDelta(deviceId, d));
+      save();
+      console.log(`sync ${deviceId}: ${results.map(r => `${r.taskId}@${r.version} ${r.status}`).join(', ')}`);
+      return send(res, 200, { results });
+    }
+
+    if (req.method === 'POST' && url.pathname === '/photos/missing') {
+      const { hashes } = JSON.parse(await readBody(req));
+      return send(res, 200, { missing: hashes.filter(h => !fs.existsSync(path.join(PHOTO_DIR, path.basename(h)))) });
+    }
+
+    const photo = url.pathname.match(/^\/photos\/([0-9a-f]{64})$/);
+    if (req.method === 'PUT' && photo) {
+      const body = await readBody(req);
+      fs.writeFileSync(path.join(PHOTO_DIR, photo[1]), body);
+      console.log(`photo ${photo[1].slice(0, 12)}… ${body.length}B`);
+      return send(res, 201);
+    }
+
+    if (req.method === 'GET' && url.pathname === '/tasks') return send(res, 200, tasks);
+
+    send(res, 404, { error: 'Not found' });
+  } catch (err) {
+    console.error(err);
+    send(res, 400, { error: String(err) });
+  }
+}).listen(PORT, () => {
+  console.log(`Sync server listening on http://localhost:${PORT} (data in ${DATA_DIR})`);
+});
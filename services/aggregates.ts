@@ -0,0 +1,108 @@
+import { useSyncExternalStore } from 'react';
+import { FarmlandTask, MarkerType } from '../types';
+import { taskStore, TaskStoreEvent } from './taskStore';
+
+// 專案統計：各項計數隨任務庫異動增量維護（減去舊內容、加上新內容），
+// 儀表板開啟時直接讀取，不需走訪全部任務。
+export const PHOTO_BUCKETS = ['0', '1-2', '3-5', '6-10', '10+'] as const;
+
+export interface AggregateSnapshot {
+  total: number;
+  photos: number;
+  status: Record<FarmlandTask['status'], number>;
+  irrigation: Record<string, number>;
+  landStatus: Record<string, number>;
+  markers: Record<MarkerType, number>;
+  photoBuckets: Record<(typeof PHOTO_BUCKETS)[number], number>;
+}
+
+const photoCount = (task: FarmlandTask) => {
+  const { irrigation, land, surrounding } = task.formData.photos;
+  return irrigation.length + land.length + surrounding.length;
+};
+
+const bucketOf = (n: number): (typeof PHOTO_BUCKETS)[number] =>
+  n === 0 ? '0' : n <= 2 ? '1-2' : n <= 5 ? '3-5' : n <= 10 ? '6-10' : '10+';
+
+const emptySnapshot = (): AggregateSnapshot => ({
+  total: 0,
+  photos: 0,
+  status: { PENDING: 0, COMPLETED: 0, EDITING: 0 },
+  irrigation: {},
+  landStatus: {},
+  markers: { WELL: 0, INLET: 0, SERIES_INLET: 0, SAMPLE: 0 },
+  photoBuckets: { '0': 0, '1-2': 0, '3-5': 0, '6-10': 0, '10+': 0 }
+});
+
+const bump = (counts: Record<string, number>, key: string, delta: number) => {
+  const next = (counts[key] || 0) + delta;
+  if (next === 0) delete counts[key];
+  else counts[key] = next;
+};
+
+export class ProjectAggregates {
+  private counts = emptySnapshot();
+  private snapshot: AggregateSnapshot | null = null;
+  private listeners = new Set<() => void>();
+
+  build(tasks: FarmlandTask[]) {
+    this.counts = emptySnapshot();
+    tasks.forEach(t => this.add(t, 1));
+    this.changed();
+  }
+
+  apply(event: TaskStoreEvent) {
+    let changed = false;
+    event.changes.forEach(({ before, after }) => {
+      if (before === after) return;
+      if (before) this.add(before, -1);
+      if (after) this.add(after, 1);
+      changed = true;
+    });
+    if (changed) this.changed();
+  }
+
+  private add(task: FarmlandTask, sign: 1 | -1) {
+    const c = this.counts;
+    const photos = photoCount(task);
+    c.total += sign;
+    c.photos += sign * photos;
+    c.status[task.status] = (c.status[task.status] || 0) + sign;
+    c.photoBuckets[bucketOf(photos)] += sign;
+    task.formData.irrigationMethods.forEach(m => bump(c.irrigation, m, sign));
+    task.formData.landStatus.forEach(s => bump(c.landStatus, s, sign));
+    task.markers.forEach(m => { c.markers[m.type] += sign; });
+  }
+
+  private changed() {
+    this.snapshot = null;
+    this.listeners.forEach(l => l());
+  }
+
+  /** 回傳不可變的快照；同一版本重複呼叫取得同一物件。 */
+  getSnapshot = (): AggregateSnapshot => {
+    if (!this.snapshot) {
+      const c = this.counts;
+      this.snapshot = {
+        ...c,
+        status: { ...c.status },
+        irrigation: { ...c.irrigation },
+        landStatus: { ...c.landStatus },
+        markers: { ...c.markers },
+        photoBuckets: { ...c.photoBuckets }
+      };
+    }
+    return this.snapshot;
+  };
+
+  subscribe = (listener: () => void) => {
+    this.listeners.add(listener);
+    return () => { this.listeners.delete(listener); };
+  };
+}
+
+export const projectAggregates = new ProjectAggregates();
+projectAggregates.build(taskStore.getAll());
+taskStore.onChange(event => projectAggregates.apply(event));
+
+export const useAggregates = () => useSyncExternalStore(projectAggregates.subscribe, projectAggregates.getSnapshot);
@@ -0,0 +1,181 @@
+import { PhotoRef } from '../types';
+import { openDB, requestToPromise } from './db';
+import { getPhotoBlob, hashBlob, isPhotoRef, photoHash } from './photoStore';
+import { processImage, DEFAULT_IMAGE_OPTIONS } from './imagePipeline';
+import { requestCropAnalysis } from './geminiService';
+import { taskStore } from './taskStore';
+
+// AI 照片分析佇列：限制並行數、失敗退避重試，並以「照片內容雜湊 + 作物類型」快取結果，
+// 同一張照片不會重複送出分析。
+const CONCURRENCY = 2;
+const MAX_ATTEMPTS = 4;
+const BASE_DELAY = 1000;
+const ANALYSIS_MAX_SIZE = 768;
+// 無法縮圖時，原檔不超過此大小才直接送出（例如已是小圖）；否則在主執行緒縮圖或放棄。
+const ANALYSIS_MAX_BYTES = 300 * 1024;
+
+interface AnalysisRecord {
+  key: string;
+  text: string;
+  createdAt: number;
+}
+
+interface Job {
+  key: string;
+  ref: PhotoRef;
+  cropType: string;
+  resolve: (text: string) => void;
+  reject: (err: unknown) => void;
+}
+
+const memoryCache = new Map<string, string>();
+const inflight = new Map<string, Promise<string>>();
+const queue: Job[] = [];
+let running = 0;
+
+const cacheKey = async (ref: PhotoRef, cropType: string) => {
+  const hash = isPhotoRef(ref) ? photoHash(ref) : await hashBlob((await getPhotoBlob(ref))!);
+  return `${hash}:${cropType}`;
+};
+
+const readCache = async (key: string) => {
+  if (memoryCache.has(key)) return memoryCache.get(key);
+  const db = await openDB();
+  const record: AnalysisRecord | undefined = await requestToPromise(db.transaction('analysis').objectStore('analysis').get(key));
+  if (record) memoryCache.set(key, record.text);
+  return record?.text;
+};
+
+const writeCache = async (key: string, text: string) => {
+  memoryCache.set(key, text);
+  const db = await openDB();
+  const record: AnalysisRecord = { key, text, createdAt: Date.now() };
+  await requestToPromise(db.transaction('analysis', 'readwrite').objectStore('analysis').put(record));
+};
+
+// 分段轉字串，避免大陣列展開超出呼叫參數上限；不依賴 FileReader，Node 檢查腳本也能執行。
+const toBase64 = async (blob: Blob) => {
+  const bytes = new Uint8Array(await blob.arrayBuffer());
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 0x8000) binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+  return btoa(binary);
+};
+
+/** 模型回傳空白內容；不寫入快取，視為暫時性錯誤重試。 */
+class EmptyResponseError extends Error {}
+
+// 429 與 5xx、網路錯誤及空白回應才重試；其餘（例如金鑰錯誤）直接失敗。
+const isRetryable = (err: any) => {
+  if (err instanceof EmptyResponseError) return true;
+  const status = err?.status ?? err?.code;
+  if (typeof status === 'number') return status === 429 || status >= 500;
+  return /fetch|network|429|5\d\d|unavailable|overloaded/i.test(String(err?.message ?? err));
+};
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+/** Worker 無法使用時（不支援或已停用）以主執行緒的 canvas 縮圖。 */
+const downscaleOnMainThread = async (blob: Blob) => {
+  if (typeof createImageBitmap === 'undefined' || typeof document === 'undefined') {
+    throw new Error('Photo is too large to analyze and cannot be downscaled here');
+  }
+  const bitmap = await createImageBitmap(blob, { imageOrientation: 'from-image' });
+  const scale = Math.min(1, ANALYSIS_MAX_SIZE / Math.max(bitmap.width, bitmap.height));
+  const canvas = document.createElement('canvas');
+  canvas.width = Math.max(1, Math.round(bitmap.width * scale));
+  canvas.height = Math.max(1, Math.round(bitmap.height * scale));
+  canvas.getContext('2d')!.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+  bitmap.close();
+  return new Promise<Blob>((resolve, reject) => {
+    canvas.toBlob(b => (b ? resolve(b) : reject(new Error('Encoding downscaled photo failed'))), 'image/jpeg', DEFAULT_IMAGE_OPTIONS.quality);
+  });
+};
+
+/** 取得送分析用的縮圖；影像管線退回原檔時不直接上傳大檔。 */
+const scaledForAnalysis = async (blob: Blob) => {
+  const { archive } = await processImage(blob, { ...DEFAULT_IMAGE_OPTIONS, maxSize: ANALYSIS_MAX_SIZE, type: 'image/jpeg' });
+  if (archive !== blob || blob.size <= ANALYSIS_MAX_BYTES) return archive;
+  return downscaleOnMainThread(blob);
+};
+
+const runJob = async ({ key, ref, cropType }: Job) => {
+  const blob = await getPhotoBlob(ref);
+  if (!blob) throw new Error(`Photo not found: ${ref}`);
+  const scaled = await scaledForAnalysis(blob);
+  const data = await toBase64(scaled);
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const text = await requestCropAnalysis(data, scaled.type || 'image/jpeg', cropType);
+      if (!text.trim()) throw new EmptyResponseError('Empty analysis response');
+      await writeCache(key, text);
+      return text;
+    } catch (err) {
+      if (attempt >= MAX_ATTEMPTS || !isRetryable(err)) throw err;
+      await sleep(BASE_DELAY * 2 ** (attempt - 1) * (0.5 + Math.random()));
+    }
+  }
+};
+
+const pump = () => {
+  while (running < CONCURRENCY && queue.length > 0) {
+    const job = queue.shift()!;
+    running++;
+    runJob(job)
+      .then(job.resolve, job.reject)
+      .finally(() => {
+        running--;
+        pump();
+      });
+  }
+};
+
+/** 分析單張照片；已有快取或正在分析中的相同照片會共用結果。 */
+export const analyzePhoto = async (ref: PhotoRef, cropType: string): Promise<string> => {
+  const key = await cacheKey(ref, cropType);
+  const cached = await readCache(key);
+  if (cached !== undefined) return cached;
+  let pending = inflight.get(key);
+  if (!pending) {
+    pending = new Promise<string>((resolve, reject) => {
+      queue.push({ key, ref, cropType, resolve, reject });
+      pump();
+    }).finally(() => inflight.delete(key));
+    inflight.set(key, pending);
+  }
+  return pending;
+};
+
+export interface AnalysisProgress {
+  done: number;
+  failed: number;
+  total: number;
+}
+
+/** 分析任務中尚無結果的照片，每完成一張即寫回任務。 */
+export const analyzeTaskPhotos = async (
+  taskId: string,
+  cropType: string,
+  onProgress?: (p: AnalysisProgress) => void
+): Promise<AnalysisProgress> => {
+  const task = taskStore.getTask(taskId);
+  if (!task) return { done: 0, failed: 0, total: 0 };
+  const { irrigation, land, surrounding } = task.formData.photos;
+  const existing = task.formData.analysis || {};
+  const refs = Array.from(new Set([...irrigation, ...land, ...surrounding])).filter(r => !(r in existing));
+  const progress: AnalysisProgress = { done: 0, failed: 0, total: refs.length };
+  onProgress?.({ ...progress });
+
+  await Promise.all(refs.map(async ref => {
+    try {
+      const text = await analyzePhoto(ref, cropType);
+      taskStore.update(taskId, t => ({ formData: { ...t.formData, analysis: { ...t.formData.analysis, [ref]: text } } }));
+      progress.done++;
+    } catch (err) {
+      console.error('AI Analysis failed:', err);
+      progress.failed++;
+    }
+    onProgress?.({ ...progress });
+  }));
+  return progress;
+};
@@ -0,0 +1,43 @@
+import { FarmlandTask, InspectionData } from '../types';
+import { TaskUpdate } from './taskStore';
+import { taskHistory } from './history';
+
+// 批次操作：對多筆任務套用同一變更，整批為一次任務庫異動
+// （持久化、索引與統計各只處理一次）並可一次復原。
+export type FormTemplate = Pick<InspectionData, 'irrigationMethods' | 'landStatus' | 'otherStatus'>;
+
+export type BatchOperation =
+  | { type: 'status'; status: FarmlandTask['status'] }
+  | { type: 'owner'; owner: string }
+  | { type: 'clearMarkers' }
+  | { type: 'formTemplate'; template: FormTemplate };
+
+const STATUS_LABELS: Record<FarmlandTask['status'], string> = { PENDING: '待處理', COMPLETED: '已完成', EDITING: '修正中' };
+
+const updateFor = (op: BatchOperation): TaskUpdate => {
+  switch (op.type) {
+    case 'status':
+      return { status: op.status };
+    case 'owner':
+      return { owner: op.owner };
+    case 'clearMarkers':
+      return task => (task.markers.length > 0 ? { markers: [] } : {});
+    case 'formTemplate':
+      // 只覆寫勾選欄位，照片與 AI 建議保留。
+      return task => ({ formData: { ...task.formData, ...op.template } });
+  }
+};
+
+/** 操作的顯示名稱，用於批次復原按鈕。 */
+export const describeBatch = (op: BatchOperation) => {
+  switch (op.type) {
+    case 'status': return `設為${STATUS_LABELS[op.status]}`;
+    case 'owner': return `業主改為 ${op.owner}`;
+    case 'clearMarkers': return '清除標記';
+    case 'formTemplate': return '套用調查表範本';
+  }
+};
+
+/** 對指定任務執行批次操作，回傳實際變更的筆數。 */
+export const applyBatch = (ids: string[], op: BatchOperation) =>
+  taskHistory.updateMany(ids, updateFor(op), describeBatch(op));
@@ -0,0 +1,123 @@
+import { FarmlandTask } from '../types';
+import { CsvParser, ImportRow, RowError, toImportRow, isRowError } from './csvParser';
+import type { CsvImportMessage, CsvImportRequest } from './csvImportWorker';
+import { taskStore } from './taskStore';
+import { searchIndex } from './searchIndex';
+
+// 現勘名單匯入：檔案交由 Worker 串流解析，主執行緒分批去重後寫入任務庫。
+const CHUNK_SIZE = 500;
+
+export interface ImportProgress {
+  imported: number;
+  duplicates: number;
+  errors: RowError[];
+  bytesRead: number;
+  totalBytes: number;
+  encoding?: string;
+  done: boolean;
+}
+
+const newTask = (row: ImportRow, seq: number, batchId: number): FarmlandTask => ({
+  id: `task-${batchId}-${seq}`,
+  code: row.code,
+  year: '115',
+  owner: row.owner || '未知業主',
+  baseImage: row.baseImage || `https://picsum.photos/seed/${seq}/1200/800`,
+  status: 'PENDING',
+  markers: [],
+  ranges: [],
+  formData: {
+    irrigationMethods: [],
+    landStatus: [],
+    photos: { irrigation: [], land: [], surrounding: [] }
+  }
+});
+
+/** 依編號去重（現有任務與同批先前列皆比對）並寫入任務庫，回傳新增的任務 id。 */
+const createAppender = (progress: ImportProgress) => {
+  const batchId = Date.now();
+  const seen = new Set<string>();
+  let seq = 0;
+  return (rows: ImportRow[], errors: RowError[]) => {
+    const tasks: FarmlandTask[] = [];
+    rows.forEach(row => {
+      const key = row.code.normalize('NFKC').toLowerCase();
+      if (seen.has(key) || searchIndex.hasCode(row.code)) {
+        progress.duplicates++;
+        return;
+      }
+      seen.add(key);
+      tasks.push(newTask(row, seq++, batchId));
+    });
+    taskStore.append(tasks);
+    progress.imported += tasks.length;
+    progress.errors.push(...errors);
+    return tasks.map(t => t.id);
+  };
+};
+
+const emptyProgress = (totalBytes: number): ImportProgress => ({
+  imported: 0, duplicates: 0, errors: [], bytesRead: 0, totalBytes, done: false
+});
+
+export const importTasksFromFile = (file: File, onProgress: (p: ImportProgress) => void): Promise<ImportProgress> => {
+  const progress = emptyProgress(file.size);
+  let append = createAppender(progress);
+  let appended: string[] = [];
+  const worker = new Worker(new URL('./csvImportWorker.ts', import.meta.url), { type: 'module' });
+
+  return new Promise((resolve, reject) => {
+    worker.onmessage = (e: MessageEvent<CsvImportMessage>) => {
+      const msg = e.data;
+      if (msg.type === 'rows') {
+        appended.push(...append(msg.rows, msg.errors));
+        progress.bytesRead = msg.bytesRead;
+        onProgress({ ...progress });
+      } else if (msg.type === 'restart') {
+        // 前段以 UTF-8 解出的資料列可能是亂碼，撤回後以實際編碼重新匯入。
+        taskStore.remove(appended);
+        appended = [];
+        Object.assign(progress, emptyProgress(file.size), { encoding: msg.encoding });
+        append = createAppender(progress);
+        onProgress({ ...progress });
+      } else if (msg.type === 'done') {
+        worker.terminate();
+        progress.bytesRead = progress.totalBytes;
+        progress.encoding = msg.encoding;
+        progress.done = true;
+        onProgress({ ...progress });
+        resolve(progress);
+      } else {
+        worker.terminate();
+        reject(new Error(msg.error));
+      }
+    };
+    worker.onerror = (e) => {
+      worker.terminate();
+      reject(new Error(e.message));
+    };
+    const request: CsvImportRequest = { file, chunkSize: CHUNK_SIZE };
+    worker.postMessage(request);
+  });
+};
+
+/** 貼上文字的少量名單，直接在主執行緒以相同解析規則處理。 */
+export const importTasksFromText = (text: string): ImportProgress => {
+  const progress = emptyProgress(text.length);
+  const append = createAppender(progress);
+  const parser = new CsvParser();
+  const rows: ImportRow[] = [];
+  const errors: RowError[] = [];
+  const onRow = (fields: string[], line: number) => {
+    const row = toImportRow(fields, line);
+    if (!row) return;
+    if (isRowError(row)) errors.push(row);
+    else rows.push(row);
+  };
+  parser.push(text.replace(/^\uFEFF/, ''), onRow);
+  parser.end(onRow);
+  append(rows, errors);
+  progress.bytesRead = text.length;
+  progress.done = true;
+  return progress;
+};
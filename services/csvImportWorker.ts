@@ -0,0 +1,98 @@
+/// <reference lib="webworker" />
+// CSV 匯入 Worker：串流讀檔、判斷編碼並解析，分批回傳資料列與錯誤。
+import { CsvParser, ImportRow, RowError, toImportRow, isRowError } from './csvParser';
+
+export interface CsvImportRequest {
+  file: Blob;
+  chunkSize: number;
+}
+
+export type CsvImportMessage =
+  | { type: 'rows'; rows: ImportRow[]; errors: RowError[]; bytesRead: number; totalBytes: number }
+  | { type: 'restart'; encoding: string }
+  | { type: 'done'; encoding: string }
+  | { type: 'failed'; error: string };
+
+// 有 BOM 依 BOM 判定；否則以嚴格 UTF-8 解碼整個檔案，遇到無效位元組即改以 Big5
+// （政府機關常見匯出格式）從頭重讀。只看開頭無法判斷：Big5 前段常恰好是合法 UTF-8。
+const bomEncoding = (head: Uint8Array) => {
+  if (head[0] === 0xef && head[1] === 0xbb && head[2] === 0xbf) return 'utf-8';
+  if (head[0] === 0xff && head[1] === 0xfe) return 'utf-16le';
+  if (head[0] === 0xfe && head[1] === 0xff) return 'utf-16be';
+  return null;
+};
+
+/** 嚴格解碼時遇到無效位元組。 */
+class InvalidEncodingError extends Error {}
+
+const parseFile = async (
+  file: Blob,
+  encoding: string,
+  fatal: boolean,
+  chunkSize: number,
+  post: (msg: CsvImportMessage) => void
+) => {
+  const reader = file.stream().getReader();
+  const parser = new CsvParser();
+  const decoder = new TextDecoder(encoding, { fatal });
+  const decode = (chunk?: Uint8Array) => {
+    try {
+      return chunk ? decoder.decode(chunk, { stream: true }) : decoder.decode();
+    } catch (err) {
+      if (err instanceof TypeError) throw new InvalidEncodingError(err.message);
+      throw err;
+    }
+  };
+  let bytesRead = 0;
+  let rows: ImportRow[] = [];
+  let errors: RowError[] = [];
+
+  const flush = () => {
+    if (rows.length === 0 && errors.length === 0) return;
+    post({ type: 'rows', rows, errors, bytesRead, totalBytes: file.size });
+    rows = [];
+    errors = [];
+  };
+  const onRow = (fields: string[], line: number) => {
+    const row = toImportRow(fields, line);
+    if (!row) return;
+    if (isRowError(row)) errors.push(row);
+    else rows.push(row);
+    if (rows.length >= chunkSize) flush();
+  };
+
+  try {
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      bytesRead += value.byteLength;
+      parser.push(decode(value), onRow);
+      flush();
+    }
+  } finally {
+    reader.releaseLock();
+  }
+  parser.push(decode(), onRow);
+  parser.end(onRow);
+  flush();
+};
+
+self.onmessage = async (e: MessageEvent<CsvImportRequest>) => {
+  const { file, chunkSize } = e.data;
+  const post = (msg: CsvImportMessage) => self.postMessage(msg);
+  try {
+    const bom = bomEncoding(new Uint8Array(await file.slice(0, 3).arrayBuffer()));
+    let encoding = bom || 'utf-8';
+    try {
+      await parseFile(file, encoding, !bom, chunkSize, post);
+    } catch (err) {
+      if (bom || !(err instanceof InvalidEncodingError)) throw err;
+      encoding = 'big5';
+      post({ type: 'restart', encoding });
+      await parseFile(file, encoding, false, chunkSize, post);
+    }
+    post({ type: 'done', encoding });
+  } catch (err) {
+    post({ type: 'failed', error: String(err) });
+  }
+};
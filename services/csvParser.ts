@@ -0,0 +1,98 @@
+// 可分段餵入的 CSV 解析器（RFC 4180）：支援引號欄位、欄位內換行與跳脫的雙引號，
+// 文字可在任意位置切段，適合搭配串流讀檔。
+export type RowHandler = (fields: string[], line: number) => void;
+
+export class CsvParser {
+  private field = '';
+  private row: string[] = [];
+  private inQuotes = false;
+  private quotePending = false;
+  private skipLf = false;
+  private line = 1;
+  private rowLine = 1;
+
+  push(text: string, onRow: RowHandler) {
+    for (let i = 0; i < text.length; i++) {
+      const ch = text[i];
+
+      if (this.skipLf) {
+        this.skipLf = false;
+        if (ch === '\n') continue;
+      }
+
+      if (this.quotePending) {
+        this.quotePending = false;
+        if (ch === '"') {
+          this.field += '"';
+          continue;
+        }
+        this.inQuotes = false;
+      }
+
+      if (this.inQuotes) {
+        if (ch === '"') this.quotePending = true;
+        else {
+          if (ch === '\n') this.line++;
+          this.field += ch;
+        }
+        continue;
+      }
+
+      if (ch === '"' && this.field === '') this.inQuotes = true;
+      else if (ch === ',') this.endField();
+      else if (ch === '\n' || ch === '\r') {
+        this.endRow(onRow);
+        this.line++;
+        this.rowLine = this.line;
+        this.skipLf = ch === '\r';
+      } else this.field += ch;
+    }
+  }
+
+  /** 輸入結束，送出最後一列（若無換行結尾）。 */
+  end(onRow: RowHandler) {
+    this.quotePending = false;
+    this.inQuotes = false;
+    if (this.field !== '' || this.row.length > 0) this.endRow(onRow);
+  }
+
+  private endField() {
+    this.row.push(this.field);
+    this.field = '';
+  }
+
+  private endRow(onRow: RowHandler) {
+    this.endField();
+    const row = this.row;
+    this.row = [];
+    // 空白行直接略過。
+    if (row.length === 1 && row[0].trim() === '') return;
+    onRow(row, this.rowLine);
+  }
+}
+
+export interface ImportRow {
+  line: number;
+  code: string;
+  owner: string;
+  baseImage: string;
+}
+
+export interface RowError {
+  line: number;
+  message: string;
+}
+
+const HEADER_NAMES = ['編號', '地號', 'code'];
+
+/** 將一列欄位驗證為匯入資料；格式：編號,業主,現勘圖網址。 */
+export const toImportRow = (fields: string[], line: number): ImportRow | RowError | null => {
+  const [code = '', owner = '', baseImage = ''] = fields.map(f => f.trim());
+  if (line === 1 && HEADER_NAMES.includes(code.toLowerCase())) return null;
+  if (!code) return { line, message: '缺少編號' };
+  if (fields.length > 3) return { line, message: `欄位數過多（${fields.length} 欄），可能含有未加引號的逗號` };
+  if (baseImage && !/^https?:\/\//i.test(baseImage)) return { line, message: '現勘圖網址格式錯誤' };
+  return { line, code, owner, baseImage };
+};
+
+export const isRowError = (row: ImportRow | RowError): row is RowError => 'message' in row;
@@ -0,0 +1,50 @@
+// 共用 IndexedDB 連線：所有本機資料（任務、專案設定、照片、AI 分析快取、底圖快取紀錄、同步外寄匣、復原紀錄）皆存於同一個資料庫。
+const DB_NAME = 'farmland_app';
+const DB_VERSION = 6;
+
+// 物件倉庫定義；新增倉庫時請一併調升 DB_VERSION。
+const STORES: Record<string, IDBObjectStoreParameters | undefined> = {
+  tasks: { keyPath: 'id' },
+  meta: undefined,
+  photos: { keyPath: 'hash' },
+  analysis: { keyPath: 'key' },
+  imageCache: { keyPath: 'url' },
+  outbox: { keyPath: 'taskId' },
+  syncedPhotos: { keyPath: 'hash' },
+  history: { keyPath: 'taskId' }
+};
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+
+export const openDB = (): Promise<IDBDatabase> => {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve, reject) => {
+      const req = indexedDB.open(DB_NAME, DB_VERSION);
+      req.onupgradeneeded = () => {
+        const db = req.result;
+        Object.entries(STORES).forEach(([name, options]) => {
+          if (!db.objectStoreNames.contains(name)) db.createObjectStore(name, options);
+        });
+      };
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => {
+        dbPromise = null;
+        reject(req.error);
+      };
+    });
+  }
+  return dbPromise;
+};
+
+export const requestToPromise = <T>(req: IDBRequest<T>): Promise<T> =>
+  new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+
+export const transactionDone = (tx: IDBTransaction): Promise<void> =>
+  new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
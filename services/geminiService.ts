@@ -1,29 +1,35 @@
 
 import { GoogleGenAI } from "@google/genai";
 
-export const analyzeCropImage = async (base64Image: string, cropType: string) => {
-  const ai = new GoogleGenAI({ apiKey: process.env.API_KEY });
-  
-  const prompt = `你是一位專業的農業專家。請分析這張${cropType || '作物'}的照片。
+// 共用同一個用戶端；設定 GEMINI_BASE_URL 時改連本機模擬服務（見 scripts/mock-gemini.mjs）。
+let client: GoogleGenAI | null = null;
+
+const getClient = () => {
+  if (!client) {
+    client = new GoogleGenAI({
+      apiKey: process.env.API_KEY,
+      ...(process.env.GEMINI_BASE_URL ? { httpOptions: { baseUrl: process.env.GEMINI_BASE_URL } } : {})
+    });
+  }
+  return client;
+};
+
+const buildPrompt = (cropType: string) => `你是一位專業的農業專家。請分析這張${cropType || '作物'}的照片。
   1. 辨識照片中的作物狀態。
   2. 檢查是否有病蟲害或缺水的跡象。
   3. 提供 3-5 句專業的現勘建議。
   請用繁體中文回答，語氣要專業且易懂。`;
 
-  try {
-    const response = await ai.models.generateContent({
-      model: 'gemini-3-flash-preview',
-      contents: {
-        parts: [
-          { inlineData: { mimeType: 'image/jpeg', data: base64Image.split(',')[1] } },
-          { text: prompt }
-        ]
-      }
-    });
-
-    return response.text;
-  } catch (error) {
-    console.error("AI Analysis failed:", error);
-    return "無法完成 AI 分析，請手動輸入觀察結果。";
-  }
+/** 送出單張照片分析；失敗時拋出錯誤，由呼叫端決定是否重試。 */
+export const requestCropAnalysis = async (base64Data: string, mimeType: string, cropType: string) => {
+  const response = await getClient().models.generateContent({
+    model: 'gemini-3-flash-preview',
+    contents: {
+      parts: [
+        { inlineData: { mimeType, data: base64Data } },
+        { text: buildPrompt(cropType) }
+      ]
+    }
+  });
+  return response.text || '';
 };
@@ -0,0 +1,373 @@
+import { useSyncExternalStore } from 'react';
+import { FarmlandTask, Marker, PlotRange, Point } from '../types';
+import { loadCalibrations, saveCalibrations } from './storage';
+import { taskStore } from './taskStore';
+
+// 坵塊幾何：座標為底圖的 0-100 百分比，依各底圖的比例尺換算為公尺。
+// 每個坵塊的面積、周長與自相交數依任務 id、坵塊 id 快取；新增或移動單一節點時只更新受影響的邊，
+// 任務層級的結果則以任務物件為鍵快取，清單頁讀取時不會重新計算。任務或坵塊刪除時一併釋放快取。
+
+/** 底圖涵蓋的實際範圍（公尺）。 */
+export interface Calibration {
+  width: number;
+  height: number;
+}
+
+export interface RangeMetrics {
+  area?: number;          // 平方公尺，未校正時為 undefined
+  perimeter?: number;     // 公尺
+  selfIntersecting: boolean;
+  markerIds: string[];    // 落在坵塊內的採樣點與水井
+}
+
+export interface TaskMetrics {
+  ranges: Map<string, RangeMetrics>;
+  totalArea?: number;
+  invalid: number;
+}
+
+const MEMBER_TYPES: Marker['type'][] = ['SAMPLE', 'WELL'];
+
+// --- 比例尺 ---
+
+type Listener = () => void;
+
+let calibrations = new Map<string, Calibration>();
+let calibrationVersion = 0;
+let calibrationsLoaded: Promise<void> | null = null;
+const calibrationListeners = new Set<Listener>();
+
+const ensureCalibrations = () => {
+  if (!calibrationsLoaded) {
+    calibrationsLoaded = loadCalibrations()
+      .then(saved => {
+        calibrations = new Map([...Object.entries(saved), ...calibrations]);
+        calibrationVersion++;
+        calibrationListeners.forEach(l => l());
+      })
+      .catch(err => console.error('Loading calibrations failed:', err));
+  }
+  return calibrationsLoaded;
+};
+
+export const getCalibration = (baseImage: string) => calibrations.get(baseImage);
+
+export const setCalibration = async (baseImage: string, calibration: Calibration | undefined) => {
+  await ensureCalibrations();
+  if (calibration) calibrations.set(baseImage, calibration);
+  else calibrations.delete(baseImage);
+  calibrationVersion++;
+  calibrationListeners.forEach(l => l());
+  await saveCalibrations(Object.fromEntries(calibrations));
+};
+
+const subscribeCalibrations = (listener: Listener) => {
+  ensureCalibrations();
+  calibrationListeners.add(listener);
+  return () => { calibrationListeners.delete(listener); };
+};
+
+/** 比例尺變更時重新渲染；回傳版本號供 useMemo 依賴。 */
+export const useCalibrationVersion = () => useSyncExternalStore(subscribeCalibrations, () => calibrationVersion);
+
+// --- 基本運算 ---
+
+const cross = (a: Point, b: Point) => a.x * b.y - b.x * a.y;
+
+const orient = (a: Point, b: Point, c: Point) => Math.sign((b.x - a.x) * (c.y - a.y) - (b.y - a.y) * (c.x - a.x));
+
+const segmentsIntersect = (a: Point, b: Point, c: Point, d: Point) => {
+  const o1 = orient(a, b, c);
+  const o2 = orient(a, b, d);
+  const o3 = orient(c, d, a);
+  const o4 = orient(c, d, b);
+  return o1 !== o2 && o3 !== o4 && o1 !== 0 && o2 !== 0 && o3 !== 0 && o4 !== 0;
+};
+
+/** 點是否在多邊形內（射線法）。 */
+export const pointInPolygon = (p: Point, points: Point[]) => {
+  let inside = false;
+  for (let i = 0, j = points.length - 1; i < points.length; j = i++) {
+    const a = points[i];
+    const b = points[j];
+    if ((a.y > p.y) !== (b.y > p.y) && p.x < ((b.x - a.x) * (p.y - a.y)) / (b.y - a.y) + a.x) inside = !inside;
+  }
+  return inside;
+};
+
+// --- 坵塊快取與增量更新 ---
+
+interface RangeState {
+  points: Point[];
+  twiceArea: number;      // 百分比座標下的兩倍有號面積
+  crossings: number;      // 非相鄰邊的相交對數
+  sx: number;
+  sy: number;
+  perimeter: number;      // 以 sx/sy 換算後的周長
+}
+
+// 任務 id → 坵塊 id → 狀態
+const rangeStates = new Map<string, Map<string, RangeState>>();
+
+const cacheOf = <T>(caches: Map<string, Map<string, T>>, taskId: string) => {
+  let cache = caches.get(taskId);
+  if (!cache) caches.set(taskId, cache = new Map());
+  return cache;
+};
+
+// 第 i 條邊為 points[i] → points[i+1]（最後一條為閉合邊）。
+const edge = (points: Point[], i: number): [Point, Point] => [points[i], points[(i + 1) % points.length]];
+
+const edgeLength = (a: Point, b: Point, sx: number, sy: number) => Math.hypot((b.x - a.x) * sx, (b.y - a.y) * sy);
+
+const adjacent = (i: number, j: number, n: number) => i === j || (i + 1) % n === j || (j + 1) % n === i;
+
+/** 邊 i 與其他非相鄰邊的相交數；skip 內的邊不計（避免重複計算）。 */
+const crossingsOf = (points: Point[], i: number, skip?: Set<number>) => {
+  const n = points.length;
+  if (n < 4) return 0;
+  const [a, b] = edge(points, i);
+  let count = 0;
+  for (let j = 0; j < n; j++) {
+    if (adjacent(i, j, n) || skip?.has(j)) continue;
+    const [c, d] = edge(points, j);
+    if (segmentsIntersect(a, b, c, d)) count++;
+  }
+  return count;
+};
+
+const fullState = (points: Point[], sx: number, sy: number): RangeState => {
+  const n = points.length;
+  let twiceArea = 0;
+  let perimeter = 0;
+  let crossings = 0;
+  for (let i = 0; i < n; i++) {
+    const [a, b] = edge(points, i);
+    twiceArea += cross(a, b);
+    perimeter += edgeLength(a, b, sx, sy);
+    for (let j = i + 2; j < n; j++) {
+      if (adjacent(i, j, n)) continue;
+      const [c, d] = edge(points, j);
+      if (segmentsIntersect(a, b, c, d)) crossings++;
+    }
+  }
+  return { points, twiceArea, crossings, sx, sy, perimeter: n > 1 ? perimeter : 0 };
+};
+
+/** 在末端新增一點：移除舊閉合邊，加入兩條新邊。 */
+const appendPoint = (prev: RangeState, points: Point[]): RangeState => {
+  const n = points.length;
+  const { sx, sy } = prev;
+  const old = prev.points;
+  const first = old[0];
+  const last = old[old.length - 1];
+  const added = points[n - 1];
+  const oldClosing = old.length - 1;
+  const crossings = prev.crossings - crossingsOf(old, oldClosing) + crossingsOf(points, n - 2) + crossingsOf(points, n - 1, new Set([n - 2]));
+  return {
+    points, sx, sy, crossings,
+    twiceArea: prev.twiceArea - cross(last, first) + cross(last, added) + cross(added, first),
+    perimeter: prev.perimeter - (old.length > 1 ? edgeLength(last, first, sx, sy) : 0) + edgeLength(last, added, sx, sy) + edgeLength(added, first, sx, sy)
+  };
+};
+
+/** 移動單一節點 k：只有邊 k-1 與 k 改變。 */
+const movePoint = (prev: RangeState, points: Point[], k: number): RangeState => {
+  const n = points.length;
+  const { sx, sy } = prev;
+  const edges = [(k - 1 + n) % n, k];
+  const affected = new Set(edges);
+  let { twiceArea, perimeter, crossings } = prev;
+  edges.forEach(i => {
+    const [a, b] = edge(prev.points, i);
+    const [c, d] = edge(points, i);
+    twiceArea += cross(c, d) - cross(a, b);
+    perimeter += edgeLength(c, d, sx, sy) - edgeLength(a, b, sx, sy);
+  });
+  // 兩條受影響的邊彼此相鄰，只需計算與其他邊的相交。
+  edges.forEach(i => {
+    crossings += crossingsOf(points, i, affected) - crossingsOf(prev.points, i, affected);
+  });
+  return { points, sx, sy, twiceArea, perimeter, crossings };
+};
+
+const changedIndex = (a: Point[], b: Point[]) => {
+  let found = -1;
+  for (let i = 0; i < a.length; i++) {
+    if (a[i] === b[i] || (a[i].x === b[i].x && a[i].y === b[i].y)) continue;
+    if (found !== -1) return -2;
+    found = i;
+  }
+  return found;
+};
+
+const isPrefix = (prefix: Point[], points: Point[]) => prefix.every((p, i) => p === points[i]);
+
+const rangeState = (states: Map<string, RangeState>, range: PlotRange, sx: number, sy: number) => {
+  const prev = states.get(range.id);
+  const { points } = range;
+  let next: RangeState;
+  if (!prev || prev.sx !== sx || prev.sy !== sy || points.length < 3 || prev.points.length < 3) {
+    next = prev && prev.points === points && prev.sx === sx && prev.sy === sy ? prev : fullState(points, sx, sy);
+  } else if (prev.points === points) {
+    next = prev;
+  } else if (points.length === prev.points.length + 1 && isPrefix(prev.points, points)) {
+    next = appendPoint(prev, points);
+  } else if (points.length === prev.points.length) {
+    const k = changedIndex(prev.points, points);
+    next = k === -1 ? { ...prev, points } : k >= 0 ? movePoint(prev, points, k) : fullState(points, sx, sy);
+  } else {
+    next = fullState(points, sx, sy);
+  }
+  states.set(range.id, next);
+  return next;
+};
+
+// --- 任務層級 ---
+
+interface MembershipCache {
+  range: PlotRange;
+  markers: Map<string, { marker: Marker; inside: boolean }>;
+}
+
+const membershipCache = new Map<string, Map<string, MembershipCache>>();
+const taskMetricsCache = new WeakMap<FarmlandTask, { version: number; metrics: TaskMetrics }>();
+
+const bbox = (points: Point[]) => {
+  let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+  points.forEach(p => {
+    if (p.x < minX) minX = p.x;
+    if (p.x > maxX) maxX = p.x;
+    if (p.y < minY) minY = p.y;
+    if (p.y > maxY) maxY = p.y;
+  });
+  return { minX, minY, maxX, maxY };
+};
+
+/** 坵塊未變動時沿用各標記的判定結果，只重算新增或移動過的標記。 */
+const membersOf = (cache: Map<string, MembershipCache>, range: PlotRange, markers: Marker[]) => {
+  if (range.points.length < 3) return [];
+  const prev = cache.get(range.id);
+  const reuse = prev && prev.range.points === range.points ? prev.markers : null;
+  const box = bbox(range.points);
+  const next = new Map<string, { marker: Marker; inside: boolean }>();
+  const ids: string[] = [];
+  markers.forEach(m => {
+    if (!MEMBER_TYPES.includes(m.type)) return;
+    const cached = reuse?.get(m.id);
+    const inside = cached && cached.marker === m
+      ? cached.inside
+      : m.x >= box.minX && m.x <= box.maxX && m.y >= box.minY && m.y <= box.maxY && pointInPolygon(m, range.points);
+    next.set(m.id, { marker: m, inside });
+    if (inside) ids.push(m.id);
+  });
+  cache.set(range.id, { range, markers: next });
+  return ids;
+};
+
+/** 取得任務的坵塊量測結果；同一任務物件與比例尺版本下直接回傳快取。 */
+export const getTaskMetrics = (task: FarmlandTask): TaskMetrics => {
+  const cached = taskMetricsCache.get(task);
+  if (cached && cached.version === calibrationVersion) return cached.metrics;
+
+  const calibration = calibrations.get(task.baseImage);
+  const sx = calibration ? calibration.width / 100 : 1;
+  const sy = calibration ? calibration.height / 100 : 1;
+  const ranges = new Map<string, RangeMetrics>();
+  let totalArea = 0;
+  let invalid = 0;
+  const states = cacheOf(rangeStates, task.id);
+  const members = cacheOf(membershipCache, task.id);
+  task.ranges.forEach(range => {
+    const state = rangeState(states, range, sx, sy);
+    const closed = range.points.length >= 3;
+    const area = Math.abs(state.twiceArea) / 2 * sx * sy;
+    const selfIntersecting = state.crossings > 0;
+    if (selfIntersecting) invalid++;
+    if (closed) totalArea += area;
+    ranges.set(range.id, {
+      area: calibration && closed ? area : undefined,
+      perimeter: calibration && closed ? state.perimeter : undefined,
+      selfIntersecting,
+      markerIds: membersOf(members, range, task.markers)
+    });
+  });
+  const metrics: TaskMetrics = { ranges, totalArea: calibration ? totalArea : undefined, invalid };
+  taskMetricsCache.set(task, { version: calibrationVersion, metrics });
+  return metrics;
+};
+
+// 任務刪除或整筆被取代時釋放其坵塊快取；坵塊被移除時只釋放該坵塊。
+taskStore.onChange(event => {
+  event.changes.forEach(({ id, before, after, replaced }) => {
+    if (!after || replaced) {
+      rangeStates.delete(id);
+      membershipCache.delete(id);
+    } else if (before && before.ranges !== after.ranges) {
+      const live = new Set(after.ranges.map(r => r.id));
+      [rangeStates.get(id), membershipCache.get(id)].forEach(cache => {
+        cache?.forEach((_, rangeId) => { if (!live.has(rangeId)) cache.delete(rangeId); });
+      });
+    }
+  });
+});
+
+// --- 簡化 ---
+
+const perpendicularDistance = (p: Point, a: Point, b: Point, sx: number, sy: number) => {
+  const dx = (b.x - a.x) * sx;
+  const dy = (b.y - a.y) * sy;
+  const px = (p.x - a.x) * sx;
+  const py = (p.y - a.y) * sy;
+  const len = Math.hypot(dx, dy);
+  if (len === 0) return Math.hypot(px, py);
+  return Math.abs(dx * py - dy * px) / len;
+};
+
+const douglasPeucker = (points: Point[], tolerance: number, sx: number, sy: number): Point[] => {
+  const keep = new Uint8Array(points.length);
+  keep[0] = keep[points.length - 1] = 1;
+  const stack: [number, number][] = [[0, points.length - 1]];
+  while (stack.length > 0) {
+    const [start, end] = stack.pop()!;
+    let maxDist = 0;
+    let index = -1;
+    for (let i = start + 1; i < end; i++) {
+      const d = perpendicularDistance(points[i], points[start], points[end], sx, sy);
+      if (d > maxDist) {
+        maxDist = d;
+        index = i;
+      }
+    }
+    if (index !== -1 && maxDist > tolerance) {
+      keep[index] = 1;
+      stack.push([start, index], [index, end]);
+    }
+  }
+  return points.filter((_, i) => keep[i]);
+};
+
+/**
+ * 以 Douglas-Peucker 簡化坵塊邊界。tolerance 為公尺（已校正）或百分比（未校正）。
+ * 多邊形自距起點最遠的節點切成兩段分別簡化，結果至少保留三個節點。
+ */
+export const simplifyPolygon = (points: Point[], tolerance: number, calibration?: Calibration): Point[] => {
+  if (points.length <= 3) return points;
+  const sx = calibration ? calibration.width / 100 : 1;
+  const sy = calibration ? calibration.height / 100 : 1;
+  let far = 0;
+  let farDist = -1;
+  points.forEach((p, i) => {
+    const d = Math.hypot((p.x - points[0].x) * sx, (p.y - points[0].y) * sy);
+    if (d > farDist) {
+      farDist = d;
+      far = i;
+    }
+  });
+  const first = douglasPeucker(points.slice(0, far + 1), tolerance, sx, sy);
+  const second = douglasPeucker([...points.slice(far), points[0]], tolerance, sx, sy);
+  const result = [...first, ...second.slice(1, -1)];
+  return result.length >= 3 ? result : points;
+};
+
+export const formatArea = (m2: number) => (m2 >= 10000 ? `${(m2 / 10000).toFixed(2)} 公頃` : `${Math.round(m2).toLocaleString()} m²`);
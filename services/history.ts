@@ -0,0 +1,397 @@
+import { useCallback, useSyncExternalStore } from 'react';
+import { FarmlandTask, Marker, PlotRange } from '../types';
+import { taskStore, TaskUpdate } from './taskStore';
+import { loadTaskHistory, saveTaskHistory } from './storage';
+
+// 復原 / 重做：每次編輯只記錄變動部分的正向與反向修補，不複製整筆任務。
+// 標記與坵塊以 id 定位，即使其間有其他來源（例如 AI 分析）修改任務也能正確套用。
+// 每筆任務各自一組紀錄，限制筆數與大小，並延遲寫入 IndexedDB 以便重新整理後保留；
+// 記憶體中只保留編輯中的任務，其餘寫出後即釋放。
+const MAX_ENTRIES = 100;
+const MAX_BYTES = 128 * 1024;
+const TYPING_WINDOW = 1000;
+const SAVE_DELAY = 1000;
+const MAX_BATCHES = 20;
+
+type ItemField = 'markers' | 'ranges';
+type Item = Marker | PlotRange;
+
+export type Patch =
+  | { op: 'set'; path: string[]; value: unknown }
+  | { op: 'insert'; field: ItemField; index: number; item: Item }
+  | { op: 'remove'; field: ItemField; id: string }
+  | { op: 'replace'; field: ItemField; item: Item };
+
+export interface HistoryEntry {
+  forward: Patch[];
+  inverse: Patch[];
+  mergeKey?: string;
+  at: number;
+  size: number;
+}
+
+/** 批次操作：多筆任務的修補合為一個復原步驟，僅保留於記憶體。 */
+export interface BatchEntry {
+  label: string;
+  changes: { taskId: string; forward: Patch[]; inverse: Patch[] }[];
+  at: number;
+}
+
+export interface TaskHistoryRecord {
+  taskId: string;
+  undo: HistoryEntry[];
+  redo: HistoryEntry[];
+}
+
+const diffItems = (field: ItemField, before: Item[], after: Item[], forward: Patch[], inverse: Patch[]) => {
+  const beforeById = new Map(before.map(i => [i.id, i]));
+  const afterById = new Map(after.map(i => [i.id, i]));
+  before.forEach((item, index) => {
+    if (!afterById.has(item.id)) {
+      forward.push({ op: 'remove', field, id: item.id });
+      inverse.push({ op: 'insert', field, index, item });
+    }
+  });
+  after.forEach((item, index) => {
+    const prev = beforeById.get(item.id);
+    if (!prev) {
+      forward.push({ op: 'insert', field, index, item });
+      inverse.unshift({ op: 'remove', field, id: item.id });
+    } else if (prev !== item && JSON.stringify(prev) !== JSON.stringify(item)) {
+      forward.push({ op: 'replace', field, item });
+      inverse.push({ op: 'replace', field, item: prev });
+    }
+  });
+};
+
+const diffValue = (path: string[], before: unknown, after: unknown, forward: Patch[], inverse: Patch[]) => {
+  if (before === after || JSON.stringify(before) === JSON.stringify(after)) return;
+  forward.push({ op: 'set', path, value: after });
+  inverse.push({ op: 'set', path, value: before });
+};
+
+/** 比對編輯前後的任務，產生正向與反向修補；表單與照片依子欄位記錄。 */
+export const createPatches = (before: FarmlandTask, after: FarmlandTask) => {
+  const forward: Patch[] = [];
+  const inverse: Patch[] = [];
+  (Object.keys(after) as (keyof FarmlandTask)[]).forEach(key => {
+    if (before[key] === after[key]) return;
+    if (key === 'markers' || key === 'ranges') {
+      diffItems(key, before[key], after[key], forward, inverse);
+    } else if (key === 'formData') {
+      const keys = new Set([...Object.keys(before.formData), ...Object.keys(after.formData)]);
+      keys.forEach(k => {
+        const prev = (before.formData as any)[k];
+        const next = (after.formData as any)[k];
+        if (k === 'photos' && prev && next) {
+          Object.keys(next).forEach(cat => diffValue(['formData', 'photos', cat], prev[cat], next[cat], forward, inverse));
+        } else {
+          diffValue(['formData', k], prev, next, forward, inverse);
+        }
+      });
+    } else {
+      diffValue([key], before[key], after[key], forward, inverse);
+    }
+  });
+  return { forward, inverse };
+};
+
+const setPath = (target: any, path: string[], value: unknown): any => {
+  const [head, ...rest] = path;
+  const next = rest.length === 0 ? value : setPath(target?.[head] ?? {}, rest, value);
+  if (next === undefined) {
+    const { [head]: _removed, ...others } = target;
+    return others;
+  }
+  return { ...target, [head]: next };
+};
+
+/** 依序套用修補；標記與坵塊以 id 定位。 */
+export const applyPatches = (task: FarmlandTask, patches: Patch[]): Partial<FarmlandTask> => {
+  let result: any = task;
+  patches.forEach(p => {
+    if (p.op === 'set') {
+      result = setPath(result, p.path, p.value);
+      return;
+    }
+    const items: Item[] = result[p.field];
+    let next: Item[];
+    if (p.op === 'insert') {
+      next = items.filter(i => i.id !== p.item.id);
+      next.splice(Math.min(p.index, next.length), 0, p.item);
+    } else if (p.op === 'remove') {
+      next = items.filter(i => i.id !== p.id);
+    } else {
+      next = items.some(i => i.id === p.item.id) ? items.map(i => (i.id === p.item.id ? p.item : i)) : items;
+    }
+    result = { ...result, [p.field]: next };
+  });
+  return result;
+};
+
+/** 短時間內連續輸入同一欄位時，合併為一個復原步驟（標記拖曳本身每次只提交一次）。 */
+const mergeKeyOf = (forward: Patch[]) => {
+  if (forward.length !== 1) return undefined;
+  const [f] = forward;
+  if (f.op === 'set' && typeof f.value === 'string') return `type:${f.path.join('.')}`;
+  return undefined;
+};
+
+const sizeOf = (forward: Patch[], inverse: Patch[]) => JSON.stringify(forward).length + JSON.stringify(inverse).length;
+
+type Listener = () => void;
+
+export class TaskHistory {
+  private records = new Map<string, TaskHistoryRecord>();
+  private loading = new Map<string, Promise<void>>();
+  private dirty = new Set<string>();
+  private listeners = new Map<string, Set<Listener>>();
+  private versions = new Map<string, number>();
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private active: string | null = null;
+  private batchUndo: BatchEntry[] = [];
+  private batchRedo: BatchEntry[] = [];
+  private batchListeners = new Set<Listener>();
+  private batchVersion = 0;
+
+  private record(taskId: string) {
+    let record = this.records.get(taskId);
+    if (!record) this.records.set(taskId, record = { taskId, undo: [], redo: [] });
+    return record;
+  }
+
+  /** 載入編輯中任務的既有紀錄；載入前已記錄的步驟接在後面。 */
+  load(taskId: string) {
+    this.active = taskId;
+    this.evict(Array.from(this.records.keys()));
+    let pending = this.loading.get(taskId);
+    if (!pending) {
+      pending = loadTaskHistory(taskId)
+        .then(saved => {
+          // 載入期間紀錄已被清除（任務刪除或被取代）時捨棄讀到的舊紀錄。
+          if (!saved || this.loading.get(taskId) !== pending) return;
+          const current = this.records.get(taskId);
+          this.records.set(taskId, current
+            ? { taskId, undo: [...saved.undo, ...current.undo], redo: current.undo.length > 0 ? current.redo : saved.redo }
+            : saved);
+          this.trim(this.records.get(taskId)!);
+          this.changed(taskId, false);
+        })
+        .catch(err => console.error('Loading history failed:', err));
+      this.loading.set(taskId, pending);
+    }
+    return pending;
+  }
+
+  /** 套用一次編輯並記錄為一個復原步驟。 */
+  update(taskId: string, update: TaskUpdate) {
+    const before = taskStore.getTask(taskId);
+    const after = taskStore.update(taskId, update);
+    if (!before || !after) return;
+    const { forward, inverse } = createPatches(before, after);
+    if (forward.length === 0) return;
+
+    const record = this.record(taskId);
+    const now = Date.now();
+    const mergeKey = mergeKeyOf(forward);
+    const last = record.undo[record.undo.length - 1];
+    const mergeable = last && mergeKey && last.mergeKey === mergeKey && record.redo.length === 0 &&
+      now - last.at < TYPING_WINDOW;
+    if (mergeable) {
+      last.forward = forward;
+      last.at = now;
+      last.size = sizeOf(last.forward, last.inverse);
+    } else {
+      record.undo.push({ forward, inverse, mergeKey, at: now, size: sizeOf(forward, inverse) });
+    }
+    record.redo = [];
+    this.trim(record);
+    this.changed(taskId);
+  }
+
+  undo(taskId: string) {
+    this.step(taskId, 'undo');
+  }
+
+  redo(taskId: string) {
+    this.step(taskId, 'redo');
+  }
+
+  private step(taskId: string, direction: 'undo' | 'redo') {
+    const record = this.records.get(taskId);
+    const entry = record?.[direction].pop();
+    if (!record || !entry) return;
+    const patches = direction === 'undo' ? entry.inverse : entry.forward;
+    taskStore.update(taskId, task => applyPatches(task, patches));
+    entry.mergeKey = undefined;
+    (direction === 'undo' ? record.redo : record.undo).push(entry);
+    this.changed(taskId);
+  }
+
+  /**
+   * 在單一任務庫異動中對多筆任務套用同一編輯，整批記錄為一個復原步驟。
+   * 內容不變的任務略過，不產生寫入；回傳實際變更的筆數。
+   */
+  updateMany(ids: string[], update: TaskUpdate, label: string) {
+    const changes: BatchEntry['changes'] = [];
+    taskStore.batch(() => {
+      ids.forEach(taskId => {
+        const before = taskStore.getTask(taskId);
+        if (!before) return;
+        const updates = typeof update === 'function' ? update(before) : update;
+        const { forward, inverse } = createPatches(before, { ...before, ...updates });
+        if (forward.length === 0) return;
+        taskStore.update(taskId, updates);
+        changes.push({ taskId, forward, inverse });
+      });
+    });
+    if (changes.length === 0) return 0;
+    this.batchUndo.push({ label, changes, at: Date.now() });
+    if (this.batchUndo.length > MAX_BATCHES) this.batchUndo.shift();
+    this.batchRedo = [];
+    this.batchChanged();
+    return changes.length;
+  }
+
+  undoBatch() {
+    this.stepBatch('undo');
+  }
+
+  redoBatch() {
+    this.stepBatch('redo');
+  }
+
+  private stepBatch(direction: 'undo' | 'redo') {
+    const entry = (direction === 'undo' ? this.batchUndo : this.batchRedo).pop();
+    if (!entry) return;
+    taskStore.batch(() => {
+      entry.changes.forEach(({ taskId, forward, inverse }) => {
+        taskStore.update(taskId, task => applyPatches(task, direction === 'undo' ? inverse : forward));
+      });
+    });
+    (direction === 'undo' ? this.batchRedo : this.batchUndo).push(entry);
+    this.batchChanged();
+  }
+
+  /** 自批次紀錄移除已刪除的任務。 */
+  forgetTasks(ids: Set<string>) {
+    const prune = (entries: BatchEntry[]) => entries
+      .map(e => ({ ...e, changes: e.changes.filter(c => !ids.has(c.taskId)) }))
+      .filter(e => e.changes.length > 0);
+    if (this.batchUndo.length === 0 && this.batchRedo.length === 0) return;
+    this.batchUndo = prune(this.batchUndo);
+    this.batchRedo = prune(this.batchRedo);
+    this.batchChanged();
+  }
+
+  getBatchState = () => this.batchVersion;
+  nextBatchUndo = () => this.batchUndo[this.batchUndo.length - 1];
+  nextBatchRedo = () => this.batchRedo[this.batchRedo.length - 1];
+
+  subscribeBatch = (listener: Listener) => {
+    this.batchListeners.add(listener);
+    return () => { this.batchListeners.delete(listener); };
+  };
+
+  private batchChanged() {
+    this.batchVersion++;
+    this.batchListeners.forEach(l => l());
+  }
+
+  /** 復原與重做合計超出筆數或大小上限時，先捨棄最舊的復原步驟，再捨棄最遠的重做步驟。 */
+  private trim(record: TaskHistoryRecord) {
+    let bytes = 0;
+    record.undo.forEach(e => { bytes += e.size; });
+    record.redo.forEach(e => { bytes += e.size; });
+    const over = () => record.undo.length + record.redo.length > MAX_ENTRIES || bytes > MAX_BYTES;
+    while (record.undo.length > 0 && over()) bytes -= record.undo.shift()!.size;
+    while (record.redo.length > 0 && over()) bytes -= record.redo.shift()!.size;
+  }
+
+  /** 清除紀錄（含已寫入 IndexedDB 者，不論本次是否載入過）。 */
+  clear(taskIds: Iterable<string>) {
+    for (const taskId of taskIds) {
+      this.records.set(taskId, { taskId, undo: [], redo: [] });
+      this.loading.delete(taskId);
+      this.versions.set(taskId, this.getVersion(taskId) + 1);
+      this.listeners.get(taskId)?.forEach(l => l());
+      this.dirty.add(taskId);
+    }
+    this.scheduleSave();
+  }
+
+  canUndo = (taskId: string) => (this.records.get(taskId)?.undo.length || 0) > 0;
+  canRedo = (taskId: string) => (this.records.get(taskId)?.redo.length || 0) > 0;
+  getVersion = (taskId: string) => this.versions.get(taskId) || 0;
+
+  subscribe = (taskId: string, listener: Listener) => {
+    let set = this.listeners.get(taskId);
+    if (!set) this.listeners.set(taskId, set = new Set());
+    set.add(listener);
+    return () => {
+      set!.delete(listener);
+      if (set!.size === 0) this.listeners.delete(taskId);
+    };
+  };
+
+  private changed(taskId: string, persist = true) {
+    this.versions.set(taskId, this.getVersion(taskId) + 1);
+    this.listeners.get(taskId)?.forEach(l => l());
+    if (!persist) return;
+    this.dirty.add(taskId);
+    this.scheduleSave();
+  }
+
+  private scheduleSave() {
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = setTimeout(() => { this.flush(); }, SAVE_DELAY);
+  }
+
+  /** 寫出待存的復原紀錄；頁面隱藏或關閉前呼叫。 */
+  flush() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    if (this.dirty.size === 0) return Promise.resolve();
+    const records = Array.from(this.dirty, id => this.records.get(id)!);
+    this.dirty.clear();
+    return saveTaskHistory(records)
+      .then(() => this.evict(records.map(r => r.taskId)))
+      .catch(err => console.error('Saving history failed:', err));
+  }
+
+  /** 釋放已寫出、且非編輯中任務的紀錄；之後開啟時再從 IndexedDB 載入。 */
+  private evict(taskIds: string[]) {
+    taskIds.forEach(taskId => {
+      if (taskId === this.active || this.dirty.has(taskId)) return;
+      this.records.delete(taskId);
+      this.loading.delete(taskId);
+      this.versions.delete(taskId);
+    });
+  }
+}
+
+export const taskHistory = new TaskHistory();
+
+// 任務被刪除或整筆被取代（清空、匯入專案）時，舊的修補已不適用，一併清除其紀錄與批次紀錄。
+taskStore.onChange(event => {
+  const stale = new Set<string>();
+  event.changes.forEach(({ id, after, replaced }) => {
+    if (!after || replaced) stale.add(id);
+  });
+  if (stale.size === 0) return;
+  taskHistory.clear(stale);
+  taskHistory.forgetTasks(stale);
+});
+
+export const useTaskHistory = (taskId: string) => {
+  const subscribe = useCallback((l: Listener) => taskHistory.subscribe(taskId, l), [taskId]);
+  useSyncExternalStore(subscribe, () => taskHistory.getVersion(taskId));
+  return { canUndo: taskHistory.canUndo(taskId), canRedo: taskHistory.canRedo(taskId) };
+};
+
+export const useBatchHistory = () => {
+  useSyncExternalStore(taskHistory.subscribeBatch, taskHistory.getBatchState);
+  return { undo: taskHistory.nextBatchUndo(), redo: taskHistory.nextBatchRedo() };
+};
@@ -0,0 +1,218 @@
+import { useCallback, useEffect, useState, useSyncExternalStore } from 'react';
+import { openDB, requestToPromise, transactionDone } from './db';
+
+// 現勘底圖離線快取：影像存於 Cache Storage（由 public/sw.js 提供給 <img>），
+// 大小與最後使用時間記錄在 IndexedDB，超出容量時依最久未使用淘汰。
+const CACHE_NAME = 'farmland-base-images'; // 與 public/sw.js 相同
+const BUDGET_KEY = 'farmland_image_cache_budget';
+const PREFETCH_CONCURRENCY = 3;
+// 不支援 CORS 的圖源只能取得 opaque 回應，無法得知實際大小，以估計值計入容量。
+const OPAQUE_SIZE_ESTIMATE = 1024 * 1024;
+
+export const DEFAULT_CACHE_BUDGET = 300 * 1024 * 1024;
+
+interface CacheEntry {
+  url: string;
+  size: number;
+  lastUsed: number;
+}
+
+export interface PrefetchProgress {
+  done: number;
+  failed: number;
+  total: number;
+}
+
+type Listener = () => void;
+
+const supported = typeof caches !== 'undefined';
+const entries = new Map<string, CacheEntry>();
+const listeners = new Map<string, Set<Listener>>();
+let loading: Promise<void> | null = null;
+
+const notify = (url: string) => listeners.get(url)?.forEach(l => l());
+
+/** 載入快取紀錄，並剔除已不在 Cache Storage 中的項目（例如使用者清除網站資料）。 */
+const ensureLoaded = () => {
+  if (!loading) {
+    loading = (async () => {
+      if (!supported) return;
+      const db = await openDB();
+      const records: CacheEntry[] = await requestToPromise(db.transaction('imageCache').objectStore('imageCache').getAll());
+      const cache = await caches.open(CACHE_NAME);
+      const present = new Set((await cache.keys()).map(r => r.url));
+      const stale: string[] = [];
+      records.forEach(r => {
+        if (present.has(r.url)) entries.set(r.url, r);
+        else stale.push(r.url);
+      });
+      if (stale.length > 0) await writeEntries([], stale);
+      records.forEach(r => notify(r.url));
+    })().catch(err => console.error('Loading image cache failed:', err));
+  }
+  return loading;
+};
+
+const writeEntries = async (put: CacheEntry[], remove: string[]) => {
+  const db = await openDB();
+  const tx = db.transaction('imageCache', 'readwrite');
+  const store = tx.objectStore('imageCache');
+  put.forEach(e => store.put(e));
+  remove.forEach(url => store.delete(url));
+  await transactionDone(tx);
+};
+
+export const getCacheBudget = () => Number(localStorage.getItem(BUDGET_KEY)) || DEFAULT_CACHE_BUDGET;
+
+export const setCacheBudget = async (bytes: number) => {
+  localStorage.setItem(BUDGET_KEY, String(bytes));
+  await ensureLoaded();
+  await evict(new Set());
+};
+
+export const getCacheUsage = () => {
+  let bytes = 0;
+  entries.forEach(e => { bytes += e.size; });
+  return { bytes, count: entries.size, budget: getCacheBudget() };
+};
+
+/** 淘汰最久未使用的影像直到低於容量上限；protect 內的網址（本次預載路線）不淘汰。 */
+const evict = async (protect: Set<string>) => {
+  const budget = getCacheBudget();
+  let { bytes } = getCacheUsage();
+  if (bytes <= budget) return;
+  const cache = await caches.open(CACHE_NAME);
+  const removed: string[] = [];
+  const candidates = Array.from(entries.values()).filter(e => !protect.has(e.url)).sort((a, b) => a.lastUsed - b.lastUsed);
+  for (const entry of candidates) {
+    if (bytes <= budget) break;
+    await cache.delete(entry.url);
+    entries.delete(entry.url);
+    removed.push(entry.url);
+    bytes -= entry.size;
+  }
+  await writeEntries([], removed);
+  removed.forEach(notify);
+};
+
+const download = async (url: string) => {
+  try {
+    const response = await fetch(url, { mode: 'cors' });
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    return response;
+  } catch {
+    return fetch(url, { mode: 'no-cors' });
+  }
+};
+
+const store = async (url: string, protect: Set<string>) => {
+  const response = await download(url);
+  if (response.type !== 'opaque' && !response.ok) throw new Error(`HTTP ${response.status}`);
+  const blob = await response.clone().blob();
+  const size = response.type === 'opaque' ? OPAQUE_SIZE_ESTIMATE : blob.size;
+  if (size > getCacheBudget()) throw new Error('Image exceeds cache budget');
+  const cache = await caches.open(CACHE_NAME);
+  await cache.put(url, response);
+  const entry: CacheEntry = { url, size, lastUsed: Date.now() };
+  entries.set(url, entry);
+  await writeEntries([entry], []);
+  notify(url);
+  await evict(protect);
+};
+
+/** 確保底圖已快取；已快取者只更新最後使用時間。 */
+export const cacheBaseImage = async (url: string, protect: Set<string> = new Set([url])) => {
+  if (!supported || !url) return;
+  await ensureLoaded();
+  const entry = entries.get(url);
+  if (entry) {
+    entry.lastUsed = Date.now();
+    await writeEntries([entry], []);
+    return;
+  }
+  await store(url, protect);
+};
+
+/** 預載一組任務的底圖（例如今日路線），回傳成功與失敗數。 */
+export const prefetchBaseImages = async (
+  urls: string[],
+  onProgress?: (p: PrefetchProgress) => void
+): Promise<PrefetchProgress> => {
+  const unique = Array.from(new Set(urls.filter(Boolean)));
+  const progress: PrefetchProgress = { done: 0, failed: 0, total: unique.length };
+  onProgress?.({ ...progress });
+  if (!supported) return { ...progress, failed: unique.length };
+
+  const protect = new Set(unique);
+  const pending = [...unique];
+  const worker = async () => {
+    for (let url = pending.shift(); url !== undefined; url = pending.shift()) {
+      try {
+        await cacheBaseImage(url, protect);
+        progress.done++;
+      } catch (err) {
+        console.error('Prefetching base image failed:', url, err);
+        progress.failed++;
+      }
+      onProgress?.({ ...progress });
+    }
+  };
+  await Promise.all(Array.from({ length: PREFETCH_CONCURRENCY }, worker));
+  return progress;
+};
+
+export const isBaseImageCached = (url: string) => entries.has(url);
+
+export const subscribeBaseImage = (url: string, listener: Listener) => {
+  ensureLoaded();
+  let set = listeners.get(url);
+  if (!set) listeners.set(url, set = new Set());
+  set.add(listener);
+  return () => {
+    set!.delete(listener);
+    if (set!.size === 0) listeners.delete(url);
+  };
+};
+
+export const useBaseImageCached = (url: string) => {
+  const subscribe = useCallback((l: Listener) => subscribeBaseImage(url, l), [url]);
+  return useSyncExternalStore(subscribe, () => isBaseImageCached(url));
+};
+
+// 等待快取完成的上限；逾時即先顯示 <img>，快取於背景繼續。
+const READY_TIMEOUT = 1500;
+
+/** 頁面由 Service Worker 控制時，<img> 才會自快取取得底圖。 */
+const servedFromCache = () => typeof navigator !== 'undefined' && !!navigator.serviceWorker?.controller;
+
+/**
+ * 底圖是否可顯示：已快取者立即顯示；未快取者在背景存入快取，完成或逾時後才顯示，
+ * 多數情況下 <img> 會由 Service Worker 自快取供應而只下載一次。沒有 Service Worker
+ * （開發模式或首次載入）時等待無益，立即顯示。
+ */
+export const useBaseImageReady = (url: string) => {
+  const cached = useBaseImageCached(url);
+  const [ready, setReady] = useState<string | null>(null);
+  useEffect(() => {
+    let cancelled = false;
+    const show = () => { if (!cancelled) setReady(url); };
+    if (!servedFromCache()) show();
+    const timer = setTimeout(show, READY_TIMEOUT);
+    cacheBaseImage(url)
+      .catch(err => console.error('Caching base image failed:', err))
+      .finally(show);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [url]);
+  return cached || ready === url;
+};
+
+/** 註冊 Service Worker；開發模式下不註冊，避免快取干擾熱更新。 */
+export const registerServiceWorker = () => {
+  if (!import.meta.env.PROD || !('serviceWorker' in navigator)) return;
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js').catch(err => console.error('Service worker registration failed:', err));
+  });
+};
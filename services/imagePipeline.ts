@@ -0,0 +1,128 @@
+import type { ResizeRequest, ResizeResponse } from './imageWorker';
+import { hashBlob } from './photoStore';
+
+// 照片上傳管線：以固定數量的 Worker 並行處理，產生縮圖與限制解析度的存檔影像。
+const OPTIONS_KEY = 'farmland_image_options';
+
+export interface ImageOptions {
+  maxSize: number;      // 存檔影像長邊上限 (px)，0 表示維持原尺寸
+  thumbSize: number;    // 縮圖長邊 (px)
+  quality: number;      // 0-1
+  type: 'image/jpeg' | 'image/webp';
+}
+
+export const DEFAULT_IMAGE_OPTIONS: ImageOptions = {
+  maxSize: 2048,
+  thumbSize: 240,
+  quality: 0.82,
+  type: 'image/jpeg'
+};
+
+export interface ProcessedImage {
+  hash: string;         // archive 內容的 SHA-256，即照片庫的鍵
+  archive: Blob;
+  thumb?: Blob;
+}
+
+export const getImageOptions = (): ImageOptions => {
+  try {
+    return { ...DEFAULT_IMAGE_OPTIONS, ...JSON.parse(localStorage.getItem(OPTIONS_KEY) || '{}') };
+  } catch {
+    return DEFAULT_IMAGE_OPTIONS;
+  }
+};
+
+export const setImageOptions = (options: Partial<ImageOptions>) => {
+  localStorage.setItem(OPTIONS_KEY, JSON.stringify({ ...getImageOptions(), ...options }));
+};
+
+const supportsWorkerResize = () =>
+  typeof Worker !== 'undefined' && typeof OffscreenCanvas !== 'undefined' && typeof createImageBitmap !== 'undefined';
+
+const POOL_SIZE = Math.max(1, Math.min(3, (navigator.hardwareConcurrency || 2) - 1));
+// Worker 連續當掉（例如模組載入失敗）達此次數後停用，改走主執行緒的保存原檔流程。
+const MAX_CRASHES = 3;
+
+interface Job {
+  file: Blob;
+  options: ImageOptions;
+  resolve: (result: ProcessedImage) => void;
+  reject: (err: unknown) => void;
+}
+
+const queue: Job[] = [];
+const idle: Worker[] = [];
+let poolCount = 0;
+let nextId = 0;
+let crashes = 0;
+
+// Worker 無法處理的格式（例如部分 HEIC）退回保存原檔。
+const fallback = async (file: Blob): Promise<ProcessedImage> => ({ hash: await hashBlob(file), archive: file });
+
+const run = (worker: Worker, job: Job) => {
+  const id = nextId++;
+  const detach = () => {
+    worker.removeEventListener('message', onMessage);
+    worker.removeEventListener('error', onError);
+  };
+  const onMessage = (e: MessageEvent<ResizeResponse>) => {
+    if (e.data.id !== id) return;
+    crashes = 0;
+    if ('error' in e.data) {
+      console.warn('Image resize failed, keeping original:', e.data.error);
+      fallback(job.file).then(job.resolve, job.reject);
+    } else {
+      job.resolve({ hash: e.data.hash, archive: e.data.archive, thumb: e.data.thumb });
+    }
+    detach();
+    release(worker);
+  };
+  // 當掉的 Worker 不再回應後續訊息，直接終止並移出池，不放回閒置清單。
+  const onError = (e: ErrorEvent) => {
+    console.warn('Image worker crashed, keeping original:', e.message);
+    detach();
+    worker.terminate();
+    poolCount--;
+    crashes++;
+    fallback(job.file).then(job.resolve, job.reject);
+    dispatch();
+  };
+  worker.addEventListener('message', onMessage);
+  worker.addEventListener('error', onError);
+  const request: ResizeRequest = { id, file: job.file, ...job.options };
+  worker.postMessage(request);
+};
+
+const release = (worker: Worker) => {
+  const job = queue.shift();
+  if (job) run(worker, job);
+  else idle.push(worker);
+};
+
+const dispatch = () => {
+  if (crashes >= MAX_CRASHES) {
+    queue.splice(0).forEach(job => fallback(job.file).then(job.resolve, job.reject));
+    return;
+  }
+  while (queue.length > 0) {
+    let worker = idle.pop();
+    if (!worker && poolCount < POOL_SIZE) {
+      worker = new Worker(new URL('./imageWorker.ts', import.meta.url), { type: 'module' });
+      poolCount++;
+    }
+    if (!worker) return;
+    run(worker, queue.shift()!);
+  }
+};
+
+export const processImage = (file: Blob, options: ImageOptions = getImageOptions()): Promise<ProcessedImage> => {
+  if (!supportsWorkerResize() || crashes >= MAX_CRASHES) return fallback(file);
+  return new Promise((resolve, reject) => {
+    queue.push({ file, options, resolve, reject });
+    dispatch();
+  });
+};
+
+/** 處理多張照片；並行數受 Worker 池大小限制，結果依輸入順序回傳。 */
+export const processImages = (files: Blob[], options: ImageOptions = getImageOptions()) =>
+  Promise.all(files.map(f => processImage(f, options)));
@@ -0,0 +1,48 @@
+/// <reference lib="webworker" />
+// 影像處理 Worker：在主執行緒之外解碼、縮放並重新編碼照片。
+
+export interface ResizeRequest {
+  id: number;
+  file: Blob;
+  maxSize: number;
+  thumbSize: number;
+  quality: number;
+  type: string;
+}
+
+export type ResizeResponse =
+  | { id: number; hash: string; archive: Blob; thumb: Blob; width: number; height: number }
+  | { id: number; error: string };
+
+const digest = async (blob: Blob) => {
+  const buf = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  return Array.from(new Uint8Array(buf), b => b.toString(16).padStart(2, '0')).join('');
+};
+
+const encode = (bitmap: ImageBitmap, maxSize: number, type: string, quality: number) => {
+  const scale = maxSize > 0 ? Math.min(1, maxSize / Math.max(bitmap.width, bitmap.height)) : 1;
+  const width = Math.max(1, Math.round(bitmap.width * scale));
+  const height = Math.max(1, Math.round(bitmap.height * scale));
+  const canvas = new OffscreenCanvas(width, height);
+  const ctx = canvas.getContext('2d')!;
+  ctx.imageSmoothingQuality = 'high';
+  ctx.drawImage(bitmap, 0, 0, width, height);
+  return canvas.convertToBlob({ type, quality });
+};
+
+self.onmessage = async (e: MessageEvent<ResizeRequest>) => {
+  const { id, file, maxSize, thumbSize, quality, type } = e.data;
+  try {
+    const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    const archive = await encode(bitmap, maxSize, type, quality);
+    // 雜湊以實際保存的存檔影像計算，與照片庫其他來源的鍵規則一致。
+    const hash = await digest(archive);
+    const thumb = await encode(bitmap, thumbSize, type, 0.7);
+    const response: ResizeResponse = { id, hash, archive, thumb, width: bitmap.width, height: bitmap.height };
+    bitmap.close();
+    self.postMessage(response);
+  } catch (err) {
+    const response: ResizeResponse = { id, error: String(err) };
+    self.postMessage(response);
+  }
+};
@@ -0,0 +1,102 @@
+import { FarmlandTask, PhotoRef } from '../types';
+import { openDB, requestToPromise, transactionDone } from './db';
+
+// 以內容雜湊為鍵的照片庫：鍵一律是實際保存的 blob 的 SHA-256，相同內容只存一份，
+// 任務中僅保存參照字串。
+const PHOTO_REF_PREFIX = 'photo:';
+
+export interface PhotoRecord {
+  hash: string;
+  blob: Blob;
+  thumb?: Blob;
+  type: string;
+  size: number;
+  createdAt: number;
+}
+
+export const isPhotoRef = (ref: PhotoRef) => ref.startsWith(PHOTO_REF_PREFIX);
+export const toPhotoRef = (hash: string): PhotoRef => `${PHOTO_REF_PREFIX}${hash}`;
+export const photoHash = (ref: PhotoRef) => ref.slice(PHOTO_REF_PREFIX.length);
+
+export const hashBlob = async (blob: Blob): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+};
+
+/** 存入照片並回傳參照；hash 須為 blob 的 SHA-256（省略時於此計算），已存在相同內容時不重複寫入。 */
+export const putPhoto = async (blob: Blob, hash?: string, thumb?: Blob): Promise<PhotoRef> => {
+  const key = hash || await hashBlob(blob);
+  const db = await openDB();
+  const tx = db.transaction('photos', 'readwrite');
+  const store = tx.objectStore('photos');
+  const exists = await requestToPromise(store.count(key));
+  if (!exists) {
+    const record: PhotoRecord = { hash: key, blob, thumb, type: blob.type, size: blob.size, createdAt: Date.now() };
+    store.put(record);
+  }
+  await transactionDone(tx);
+  return toPhotoRef(key);
+};
+
+export const getPhoto = async (ref: PhotoRef): Promise<PhotoRecord | undefined> => {
+  if (!isPhotoRef(ref)) return undefined;
+  const db = await openDB();
+  return requestToPromise(db.transaction('photos').objectStore('photos').get(photoHash(ref)));
+};
+
+export const getPhotoBlob = async (ref: PhotoRef): Promise<Blob | undefined> => {
+  if (!isPhotoRef(ref)) return ref.startsWith('data:') ? (await fetch(ref)).blob() : undefined;
+  return (await getPhoto(ref))?.blob;
+};
+
+// --- 顯示用 object URL：依參照計數共用，最後一個使用者釋放時撤銷 ---
+export type PhotoVariant = 'thumb' | 'full';
+
+const urlCache = new Map<string, { url: Promise<string | null>; count: number }>();
+
+const loadVariant = async (ref: PhotoRef, variant: PhotoVariant) => {
+  const record = await getPhoto(ref);
+  return variant === 'thumb' ? (record?.thumb || record?.blob) : record?.blob;
+};
+
+export const acquirePhotoUrl = (ref: PhotoRef, variant: PhotoVariant = 'full'): Promise<string | null> => {
+  if (!isPhotoRef(ref)) return Promise.resolve(ref);
+  const key = `${ref}#${variant}`;
+  let entry = urlCache.get(key);
+  if (!entry) {
+    entry = {
+      url: loadVariant(ref, variant).then(blob => (blob ? URL.createObjectURL(blob) : null)),
+      count: 0
+    };
+    urlCache.set(key, entry);
+  }
+  entry.count++;
+  return entry.url;
+};
+
+export const releasePhotoUrl = (ref: PhotoRef, variant: PhotoVariant = 'full') => {
+  const key = `${ref}#${variant}`;
+  const entry = urlCache.get(key);
+  if (!entry || --entry.count > 0) return;
+  urlCache.delete(key);
+  entry.url.then(url => { if (url) URL.revokeObjectURL(url); });
+};
+
+// --- 舊資料相容：data URL 轉為參照 ---
+const PHOTO_CATEGORIES = ['irrigation', 'land', 'surrounding'] as const;
+
+export const hasInlinePhotos = (task: FarmlandTask) =>
+  PHOTO_CATEGORIES.some(c => task.formData.photos[c].some(p => p.startsWith('data:')));
+
+/** 將任務中的 data URL 照片移入照片庫，改存參照。 */
+export const migrateTaskPhotos = async (task: FarmlandTask): Promise<FarmlandTask> => {
+  if (!hasInlinePhotos(task)) return task;
+  const photos = { ...task.formData.photos };
+  for (const c of PHOTO_CATEGORIES) {
+    const refs = await Promise.all(photos[c].map(async p =>
+      p.startsWith('data:') ? putPhoto(await (await fetch(p)).blob()) : p
+    ));
+    photos[c] = Array.from(new Set(refs));
+  }
+  return { ...task, formData: { ...task.formData, photos } };
+};
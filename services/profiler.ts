@@ -0,0 +1,68 @@
+import type { ProfilerOnRenderCallback } from 'react';
+import type { WriteStats } from './storage';
+
+// 開發用效能紀錄：各區塊渲染次數與耗時、儲存寫入大小與耗時、長任務。
+// 僅在開發模式由 components/DevProfiler 讀取；正式版不會呼叫這些函式。
+const HISTORY = 20;
+
+export const PROFILING = !!import.meta.env?.DEV;
+
+export interface RenderStat {
+  count: number;
+  total: number;
+  last: number;
+}
+
+export interface WriteRecord extends WriteStats {
+  at: number;
+}
+
+export interface LongTaskRecord {
+  at: number;
+  duration: number;
+}
+
+export const renderStats = new Map<string, RenderStat>();
+export const writeLog: WriteRecord[] = [];
+export const longTasks: LongTaskRecord[] = [];
+export let longTaskCount = 0;
+
+export const recordRender: ProfilerOnRenderCallback = (id, _phase, actualDuration) => {
+  const stat = renderStats.get(id);
+  if (stat) {
+    stat.count++;
+    stat.total += actualDuration;
+    stat.last = actualDuration;
+  } else {
+    renderStats.set(id, { count: 1, total: actualDuration, last: actualDuration });
+  }
+};
+
+/** 手動計數，用於數量多、不適合各自包 Profiler 的元件（例如任務卡片）。 */
+export const countRender = (id: string) => recordRender(id, 'update', 0, 0, 0, 0);
+
+export const recordWrite = (stats: WriteStats) => {
+  writeLog.unshift({ ...stats, at: Date.now() });
+  writeLog.length = Math.min(writeLog.length, HISTORY);
+};
+
+let observing = false;
+
+export const observeLongTasks = () => {
+  if (observing || typeof PerformanceObserver === 'undefined' || !PerformanceObserver.supportedEntryTypes?.includes('longtask')) return;
+  observing = true;
+  new PerformanceObserver(list => {
+    list.getEntries().forEach(entry => {
+      longTaskCount++;
+      longTasks.unshift({ at: performance.timeOrigin + entry.startTime, duration: entry.duration });
+    });
+    longTasks.length = Math.min(longTasks.length, HISTORY);
+  }).observe({ type: 'longtask', buffered: true });
+};
+
+export const resetProfiler = () => {
+  renderStats.clear();
+  writeLog.length = 0;
+  longTasks.length = 0;
+  longTaskCount = 0;
+};
@@ -0,0 +1,166 @@
+import { AppState, FarmlandTask, ProjectSnapshot } from '../types';
+import { getPhoto, isPhotoRef, putPhoto, migrateTaskPhotos } from './photoStore';
+
+// .farmland v2 專案檔：
+//   "FARMLAND/2\n" 之後為連續的項目，每項為
+//   [4 位元組 big-endian 標頭長度][標頭 JSON][內容]
+// 任務以 NDJSON 分段並 gzip 壓縮；照片以原始二進位存放（本身已是壓縮格式）。
+// 整個檔案由 Blob 片段組成，不會在記憶體中建立完整字串。
+const MAGIC = 'FARMLAND/2\n';
+const TASKS_PER_ENTRY = 500;
+
+interface EntryHeader {
+  name: string;
+  size: number;
+  encoding?: 'gzip';
+  type?: string;
+  thumbSize?: number;
+  thumbType?: string;
+}
+
+interface ProjectEntry extends AppState {
+  format: 2;
+  taskCount: number;
+  exportedAt: string;
+}
+
+const encoder = new TextEncoder();
+const canCompress = typeof CompressionStream !== 'undefined';
+
+const compress = async (text: string): Promise<{ blob: Blob; encoding?: 'gzip' }> => {
+  const raw = new Blob([text]);
+  if (!canCompress) return { blob: raw };
+  return { blob: await new Response(raw.stream().pipeThrough(new CompressionStream('gzip'))).blob(), encoding: 'gzip' };
+};
+
+const decompressText = (blob: Blob, encoding?: string) => {
+  if (encoding !== 'gzip') return blob.text();
+  return new Response(blob.stream().pipeThrough(new DecompressionStream('gzip'))).text();
+};
+
+const headerPart = (header: EntryHeader) => {
+  const json = encoder.encode(JSON.stringify(header));
+  const prefix = new Uint8Array(4);
+  new DataView(prefix.buffer).setUint32(0, json.byteLength);
+  return [prefix, json];
+};
+
+const collectPhotoRefs = (tasks: FarmlandTask[]) => {
+  const refs = new Set<string>();
+  tasks.forEach(t => {
+    const { irrigation, land, surrounding } = t.formData.photos;
+    [...irrigation, ...land, ...surrounding].forEach(p => { if (isPhotoRef(p)) refs.add(p); });
+  });
+  return refs;
+};
+
+export const exportProjectArchive = async (meta: AppState, tasks: FarmlandTask[]): Promise<Blob> => {
+  const parts: BlobPart[] = [encoder.encode(MAGIC)];
+  const addEntry = (header: EntryHeader, ...payload: Blob[]) => {
+    parts.push(...headerPart(header), ...payload);
+  };
+
+  const project: ProjectEntry = { ...meta, format: 2, taskCount: tasks.length, exportedAt: new Date().toISOString() };
+  const projectBlob = await compress(JSON.stringify(project));
+  addEntry({ name: 'project.json', size: projectBlob.blob.size, encoding: projectBlob.encoding }, projectBlob.blob);
+
+  for (let i = 0; i < tasks.length; i += TASKS_PER_ENTRY) {
+    const chunk = tasks.slice(i, i + TASKS_PER_ENTRY).map(t => JSON.stringify(t)).join('\n');
+    const { blob, encoding } = await compress(chunk);
+    addEntry({ name: `tasks/${String(i / TASKS_PER_ENTRY).padStart(5, '0')}.ndjson`, size: blob.size, encoding }, blob);
+  }
+
+  for (const ref of collectPhotoRefs(tasks)) {
+    const record = await getPhoto(ref);
+    if (!record) continue;
+    const payload = record.thumb ? [record.blob, record.thumb] : [record.blob];
+    addEntry({
+      name: `photos/${record.hash}`,
+      size: record.blob.size + (record.thumb?.size || 0),
+      type: record.type,
+      thumbSize: record.thumb?.size,
+      thumbType: record.thumb?.type
+    }, ...payload);
+  }
+
+  return new Blob(parts, { type: 'application/octet-stream' });
+};
+
+/** 專案檔毀損或不是本程式產生的檔案。 */
+export class ArchiveFormatError extends Error {}
+
+/** 讀取 v1 純 JSON 專案檔，data URL 照片移入照片庫。 */
+const readLegacy = async (file: Blob): Promise<ProjectSnapshot> => {
+  let snapshot: ProjectSnapshot;
+  try {
+    snapshot = JSON.parse(await file.text());
+  } catch (err) {
+    throw new ArchiveFormatError(`Not a project file: ${err}`);
+  }
+  if (!Array.isArray(snapshot?.tasks)) throw new ArchiveFormatError('Missing tasks in legacy project file');
+  const { tasks, ...meta } = snapshot;
+  return { ...meta, tasks: await Promise.all(tasks.map(migrateTaskPhotos)) };
+};
+
+/** 解析項目內容；JSON 或解壓縮錯誤一律轉為格式錯誤。 */
+const parseEntry = async <T>(name: string, parse: () => Promise<T>): Promise<T> => {
+  try {
+    return await parse();
+  } catch (err) {
+    throw new ArchiveFormatError(`Corrupt entry ${name}: ${err}`);
+  }
+};
+
+/**
+ * 依序讀取專案檔項目；每次只切出單一項目，不一次載入整個檔案。
+ * 照片在整個檔案解析成功後才寫入照片庫，毀損的檔案不會留下孤立照片。
+ */
+export const readProjectArchive = async (file: Blob): Promise<ProjectSnapshot> => {
+  const head = new TextDecoder().decode(await file.slice(0, MAGIC.length).arrayBuffer());
+  if (head !== MAGIC) return readLegacy(file);
+
+  let project: ProjectEntry | null = null;
+  const tasks: FarmlandTask[] = [];
+  const photos: { hash: string; blob: Blob; thumb?: Blob }[] = [];
+  let offset = MAGIC.length;
+
+  while (offset < file.size) {
+    if (offset + 4 > file.size) throw new ArchiveFormatError(`Truncated entry header at byte ${offset}`);
+    const headerLength = new DataView(await file.slice(offset, offset + 4).arrayBuffer()).getUint32(0);
+    offset += 4;
+    if (offset + headerLength > file.size) throw new ArchiveFormatError(`Truncated entry header at byte ${offset}`);
+    const header = await parseEntry<EntryHeader | null>(`header at byte ${offset}`, async () => JSON.parse(await file.slice(offset, offset + headerLength).text()));
+    if (!header || typeof header.name !== 'string' || !Number.isSafeInteger(header.size) || header.size < 0) {
+      throw new ArchiveFormatError(`Invalid entry header at byte ${offset}`);
+    }
+    offset += headerLength;
+    const { name, size, thumbSize = 0 } = header;
+    if (offset + size > file.size) throw new ArchiveFormatError(`Truncated entry ${name}`);
+    const payload = file.slice(offset, offset + size);
+    offset += size;
+
+    if (name === 'project.json') {
+      project = await parseEntry(name, async () => JSON.parse(await decompressText(payload, header.encoding)));
+    } else if (name.startsWith('tasks/')) {
+      await parseEntry(name, async () => {
+        (await decompressText(payload, header.encoding)).split('\n').forEach(line => {
+          if (line) tasks.push(JSON.parse(line));
+        });
+      });
+    } else if (name.startsWith('photos/')) {
+      if (!Number.isSafeInteger(thumbSize) || thumbSize < 0 || thumbSize > size) throw new ArchiveFormatError(`Invalid thumbnail size in ${name}`);
+      // 縮圖接在原圖之後，同屬此項目的內容。
+      const photoSize = size - thumbSize;
+      photos.push({
+        hash: name.slice('photos/'.length),
+        blob: payload.slice(0, photoSize, header.type),
+        thumb: thumbSize ? payload.slice(photoSize, size, header.thumbType) : undefined
+      });
+    }
+  }
+
+  if (!project) throw new ArchiveFormatError('Missing project.json entry');
+  for (const { hash, blob, thumb } of photos) await putPhoto(blob, hash, thumb);
+  const { format, taskCount, exportedAt, ...meta } = project;
+  return { ...meta, tasks };
+};
@@ -0,0 +1,191 @@
+import { useEffect, useState, useSyncExternalStore } from 'react';
+import { FarmlandTask } from '../types';
+import { taskStore, TaskStoreEvent } from './taskStore';
+
+// 任務檢索索引：編號與業主以單字 / 雙字 n-gram 建立倒排表（適用中文姓名），
+// 另以狀態、年度建立分面集合，並保留編號精確比對表；隨任務庫異動增量維護。
+// 倒排表直接存放文件（含其在任務庫中的位置），查詢時以位置標記命中、依序收集，結果不需再排序。
+export interface SearchQuery {
+  text: string;
+  status?: FarmlandTask['status'];
+  year?: string;
+}
+
+type FacetField = 'status' | 'year';
+
+interface IndexedDoc {
+  id: string;
+  pos: number;   // 在任務庫排序中的位置
+  code: string;
+  owner: string;
+  status: string;
+  year: string;
+}
+
+const normalize = (s: string) => s.normalize('NFKC').toLowerCase().trim();
+
+const gramsOf = (text: string, n: number) => {
+  const chars = Array.from(text);
+  const out = new Set<string>();
+  for (let i = 0; i + n <= chars.length; i++) out.add(chars.slice(i, i + n).join(''));
+  return out;
+};
+
+export class TaskSearchIndex {
+  private unigrams = new Map<string, Set<IndexedDoc>>();
+  private bigrams = new Map<string, Set<IndexedDoc>>();
+  private facets: Record<FacetField, Map<string, Set<IndexedDoc>>> = { status: new Map(), year: new Map() };
+  private docs = new Map<string, IndexedDoc>();
+  private codes = new Map<string, Set<IndexedDoc>>();
+  private ids: string[] = [];
+  private version = 0;
+  private last: { key: string; text: string; version: number; result: string[] } | null = null;
+  private listeners = new Set<() => void>();
+
+  getVersion = () => this.version;
+
+  /** 訂閱索引內容變更；只影響非檢索欄位（標記、照片等）的異動不會通知。 */
+  subscribe = (listener: () => void) => {
+    this.listeners.add(listener);
+    return () => { this.listeners.delete(listener); };
+  };
+
+  build(tasks: FarmlandTask[]) {
+    this.unigrams.clear();
+    this.bigrams.clear();
+    this.facets = { status: new Map(), year: new Map() };
+    this.docs.clear();
+    this.codes.clear();
+    tasks.forEach(t => this.add(t));
+    this.setOrder(tasks.map(t => t.id));
+    this.listeners.forEach(l => l());
+  }
+
+  /** 套用任務庫異動；僅在檢索相關欄位改變時更新倒排表。 */
+  apply(event: TaskStoreEvent, ids: string[]) {
+    let changed = false;
+    event.changes.forEach(({ id, after }) => {
+      const prev = this.docs.get(id);
+      if (after && prev && prev.code === normalize(after.code) && prev.owner === normalize(after.owner) && prev.status === after.status && prev.year === after.year) return;
+      if (prev) this.remove(id, prev);
+      if (after) this.add(after, prev ? prev.pos : -1);
+      changed = true;
+    });
+    if (event.idsChanged) this.setOrder(ids);
+    if (!changed && !event.idsChanged) return;
+    this.version++;
+    this.listeners.forEach(l => l());
+  }
+
+  private setOrder(ids: string[]) {
+    this.ids = ids;
+    ids.forEach((id, i) => { this.docs.get(id)!.pos = i; });
+    this.version++;
+  }
+
+  private add(task: FarmlandTask, pos = -1) {
+    const doc: IndexedDoc = { id: task.id, pos, code: normalize(task.code), owner: normalize(task.owner), status: task.status, year: task.year };
+    this.docs.set(task.id, doc);
+    [doc.code, doc.owner].forEach(field => {
+      gramsOf(field, 1).forEach(g => addPosting(this.unigrams, g, doc));
+      gramsOf(field, 2).forEach(g => addPosting(this.bigrams, g, doc));
+    });
+    addPosting(this.facets.status, doc.status, doc);
+    addPosting(this.facets.year, doc.year, doc);
+    addPosting(this.codes, doc.code, doc);
+  }
+
+  private remove(id: string, doc: IndexedDoc) {
+    this.docs.delete(id);
+    [doc.code, doc.owner].forEach(field => {
+      gramsOf(field, 1).forEach(g => removePosting(this.unigrams, g, doc));
+      gramsOf(field, 2).forEach(g => removePosting(this.bigrams, g, doc));
+    });
+    removePosting(this.facets.status, doc.status, doc);
+    removePosting(this.facets.year, doc.year, doc);
+    removePosting(this.codes, doc.code, doc);
+  }
+
+  /** 編號是否已存在（忽略大小寫與全半形）。 */
+  hasCode(code: string) {
+    return this.codes.has(normalize(code));
+  }
+
+  facetCount(field: FacetField, value: string) {
+    return this.facets[field].get(value)?.size || 0;
+  }
+
+  facetValues(field: FacetField) {
+    return Array.from(this.facets[field].keys()).sort();
+  }
+
+  /** 回傳符合條件的任務 id，維持任務庫原有排序。 */
+  query({ text, status, year }: SearchQuery): string[] {
+    const q = normalize(text);
+    if (!q && !status && !year) return this.ids;
+
+    // 連續輸入時新字串以前次字串開頭，只需在前次結果中過濾。
+    const key = `${status || ''}|${year || ''}`;
+    const last = this.last;
+    if (last && last.key === key && last.version === this.version && q.startsWith(last.text) && last.text) {
+      const result = last.result.filter(id => this.matches(id, q));
+      this.last = { key, text: q, version: this.version, result };
+      return result;
+    }
+
+    const sets: Set<IndexedDoc>[] = [];
+    if (status) sets.push(this.facets.status.get(status) || new Set());
+    if (year) sets.push(this.facets.year.get(year) || new Set());
+    if (q) {
+      const chars = Array.from(q);
+      const index = chars.length === 1 ? this.unigrams : this.bigrams;
+      gramsOf(q, chars.length === 1 ? 1 : 2).forEach(g => sets.push(index.get(g) || new Set()));
+    }
+    sets.sort((a, b) => a.size - b.size);
+
+    const [smallest, ...rest] = sets;
+    const hits = new Uint8Array(this.ids.length);
+    smallest.forEach(doc => {
+      if (rest.every(s => s.has(doc)) && (!q || doc.code.includes(q) || doc.owner.includes(q))) hits[doc.pos] = 1;
+    });
+    const result: string[] = [];
+    for (let i = 0; i < hits.length; i++) {
+      if (hits[i]) result.push(this.ids[i]);
+    }
+    this.last = { key, text: q, version: this.version, result };
+    return result;
+  }
+
+  private matches(id: string, q: string) {
+    const doc = this.docs.get(id);
+    return !!doc && (doc.code.includes(q) || doc.owner.includes(q));
+  }
+}
+
+const addPosting = (index: Map<string, Set<IndexedDoc>>, key: string, doc: IndexedDoc) => {
+  let set = index.get(key);
+  if (!set) index.set(key, set = new Set());
+  set.add(doc);
+};
+
+const removePosting = (index: Map<string, Set<IndexedDoc>>, key: string, doc: IndexedDoc) => {
+  const set = index.get(key);
+  if (!set) return;
+  set.delete(doc);
+  if (set.size === 0) index.delete(key);
+};
+
+export const searchIndex = new TaskSearchIndex();
+searchIndex.build(taskStore.getAll());
+taskStore.onChange(event => searchIndex.apply(event, taskStore.getIds()));
+
+export const useSearchIndexVersion = () => useSyncExternalStore(searchIndex.subscribe, searchIndex.getVersion);
+
+export const useDebouncedValue = <T>(value: T, delay: number) => {
+  const [debounced, setDebounced] = useState(value);
+  useEffect(() => {
+    const timer = setTimeout(() => setDebounced(value), delay);
+    return () => clearTimeout(timer);
+  }, [value, delay]);
+  return debounced;
+};
@@ -0,0 +1,60 @@
+import { Point } from '../types';
+
+// 均勻網格空間索引：座標為 0-100 百分比，用於畫布模式的點選與拖曳命中判定。
+export class PointGrid<T extends Point & { id: string }> {
+  private cells = new Map<number, T[]>();
+  private readonly perRow: number;
+
+  constructor(items: T[], private cellSize = 5) {
+    this.perRow = Math.ceil(100 / cellSize) + 1;
+    items.forEach(item => {
+      const key = this.key(this.cell(item.x), this.cell(item.y));
+      const bucket = this.cells.get(key);
+      if (bucket) bucket.push(item);
+      else this.cells.set(key, [item]);
+    });
+  }
+
+  private cell(v: number) {
+    return Math.max(0, Math.min(this.perRow - 1, Math.floor(v / this.cellSize)));
+  }
+
+  private key(cx: number, cy: number) {
+    return cy * this.perRow + cx;
+  }
+
+  /**
+   * 找出距離 (x, y) 最近、且落在橢圓半徑 (rx, ry) 內的項目。
+   * 半徑以百分比表示，x / y 分開給定以對應非正方形底圖。
+   */
+  nearest(x: number, y: number, rx: number, ry: number): T | undefined {
+    let best: T | undefined;
+    let bestDist = 1;
+    for (let cy = this.cell(y - ry); cy <= this.cell(y + ry); cy++) {
+      for (let cx = this.cell(x - rx); cx <= this.cell(x + rx); cx++) {
+        this.cells.get(this.key(cx, cy))?.forEach(item => {
+          const dx = (item.x - x) / rx;
+          const dy = (item.y - y) / ry;
+          const dist = dx * dx + dy * dy;
+          if (dist <= bestDist) {
+            best = item;
+            bestDist = dist;
+          }
+        });
+      }
+    }
+    return best;
+  }
+}
+
+const gridCache = new WeakMap<object, PointGrid<any>>();
+
+/** 依陣列參照快取索引；任務未變動時重複使用。 */
+export const getPointGrid = <T extends Point & { id: string }>(items: T[]): PointGrid<T> => {
+  let grid = gridCache.get(items);
+  if (!grid) {
+    grid = new PointGrid(items);
+    gridCache.set(items, grid);
+  }
+  return grid;
+};
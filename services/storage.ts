@@ -0,0 +1,239 @@
+import { AppState, FarmlandTask, ProjectSnapshot } from '../types';
+import { openDB, requestToPromise, transactionDone } from './db';
+import { hasInlinePhotos, migrateTaskPhotos } from './photoStore';
+import { TaskStoreEvent } from './taskStore';
+import type { TaskHistoryRecord } from './history';
+import type { Calibration } from './geometry';
+
+// 舊版整包存於 localStorage 的鍵值，載入時會搬移至 IndexedDB。
+const LEGACY_KEYS = ['farmland_app_v4', 'farmland_app_v3'];
+const META_KEY = 'project';
+const ORDER_KEY = 'taskOrder';
+const CALIBRATION_KEY = 'calibrations';
+
+export const DEFAULT_PROJECT_NAME = '115年度農地現勘專案';
+
+export type ProjectMeta = AppState;
+
+export interface WriteStats {
+  tasks: number;
+  removed: number;
+  bytes: number;     // 寫入任務的 JSON 大小估計
+  duration: number;
+}
+
+const readAll = async (): Promise<ProjectSnapshot | null> => {
+  const db = await openDB();
+  const tx = db.transaction(['tasks', 'meta'], 'readonly');
+  const [meta, order, records] = await Promise.all([
+    requestToPromise(tx.objectStore('meta').get(META_KEY)) as Promise<ProjectMeta | undefined>,
+    requestToPromise(tx.objectStore('meta').get(ORDER_KEY)) as Promise<string[] | undefined>,
+    requestToPromise(tx.objectStore('tasks').getAll()) as Promise<FarmlandTask[]>
+  ]);
+  if (!meta) return null;
+
+  const byId = new Map(records.map(t => [t.id, t]));
+  const tasks: FarmlandTask[] = [];
+  (order || []).forEach(id => {
+    const task = byId.get(id);
+    if (task) {
+      tasks.push(task);
+      byId.delete(id);
+    }
+  });
+  // 排序表遺失的任務（例如寫入中斷）仍附加在最後，避免資料消失。
+  byId.forEach(task => tasks.push(task));
+  return { ...meta, tasks };
+};
+
+const migrateLegacy = async (): Promise<ProjectSnapshot | null> => {
+  const key = LEGACY_KEYS.find(k => localStorage.getItem(k) !== null);
+  if (!key) return null;
+
+  let legacy: Partial<ProjectSnapshot>;
+  try {
+    legacy = JSON.parse(localStorage.getItem(key)!);
+  } catch (err) {
+    console.error('Legacy state is corrupted:', err);
+    return null;
+  }
+
+  const state: ProjectSnapshot = {
+    projectName: legacy.projectName || DEFAULT_PROJECT_NAME,
+    tasks: await Promise.all((legacy.tasks || []).map(migrateTaskPhotos)),
+    view: legacy.view === 'editor' && !legacy.currentTaskId ? 'list' : (legacy.view || 'list'),
+    currentTaskId: legacy.currentTaskId,
+    isEditingMap: legacy.isEditingMap ?? true
+  };
+
+  const db = await openDB();
+  const tx = db.transaction(['tasks', 'meta'], 'readwrite');
+  const taskStore = tx.objectStore('tasks');
+  state.tasks.forEach(t => taskStore.put(t));
+  const { tasks, ...meta } = state;
+  tx.objectStore('meta').put(meta, META_KEY);
+  tx.objectStore('meta').put(tasks.map(t => t.id), ORDER_KEY);
+  await transactionDone(tx);
+
+  LEGACY_KEYS.forEach(k => localStorage.removeItem(k));
+  return state;
+};
+
+/** 啟動時載入專案；若只有舊版 localStorage 資料則先完成搬移。 */
+export const loadProject = async (): Promise<ProjectSnapshot | null> => {
+  const stored = await readAll();
+  if (!stored) return migrateLegacy();
+
+  // 早期版本直接以 data URL 存照片，載入時一併移入照片庫。
+  const inline = stored.tasks.filter(hasInlinePhotos);
+  if (inline.length === 0) return stored;
+  const migrated = new Map((await Promise.all(inline.map(migrateTaskPhotos))).map(t => [t.id, t]));
+  const db = await openDB();
+  const tx = db.transaction('tasks', 'readwrite');
+  migrated.forEach(t => tx.objectStore('tasks').put(t));
+  await transactionDone(tx);
+  return { ...stored, tasks: stored.tasks.map(t => migrated.get(t.id) || t) };
+};
+
+const sameOrder = (a: string[], b: string[]) =>
+  a === b || (a.length === b.length && a.every((id, i) => id === b[i]));
+
+/**
+ * 以任務為單位的增量寫入器。
+ * 由任務庫的異動通知得知變動過的任務，延遲合併後在單一交易中寫入，
+ * 不再於每次狀態更新時序列化整個專案。
+ */
+export class TaskPersistence {
+  private saved = new Map<string, FarmlandTask>();
+  private savedOrder: string[] = [];
+  private savedMeta: ProjectMeta | null = null;
+  private dirty = new Set<string>();
+  private removed = new Set<string>();
+  private pendingOrder: string[] | null = null;
+  private pendingMeta: ProjectMeta | null = null;
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private writing: Promise<void> = Promise.resolve();
+
+  constructor(private delay = 400, private onWrite?: (stats: WriteStats) => void) {}
+
+  /** 記錄已存在於資料庫中的狀態，作為之後比對的基準。 */
+  prime(state: ProjectSnapshot) {
+    this.saved = new Map(state.tasks.map(t => [t.id, t]));
+    this.savedOrder = state.tasks.map(t => t.id);
+    const { tasks, ...meta } = state;
+    this.savedMeta = meta;
+  }
+
+  /** 記錄一次任務庫異動；與已儲存內容相同參照的任務（例如剛載入者）會略過。 */
+  trackTasks(event: TaskStoreEvent, ids: string[]) {
+    event.changes.forEach(({ id, after }) => {
+      if (after) {
+        if (this.saved.get(id) === after) return;
+        this.saved.set(id, after);
+        this.dirty.add(id);
+        this.removed.delete(id);
+      } else if (this.saved.has(id)) {
+        this.saved.delete(id);
+        this.dirty.delete(id);
+        this.removed.add(id);
+      }
+    });
+    if (event.idsChanged && !sameOrder(ids, this.savedOrder)) {
+      this.savedOrder = ids;
+      this.pendingOrder = ids;
+    }
+    this.schedule();
+  }
+
+  trackMeta(meta: ProjectMeta) {
+    const prev = this.savedMeta;
+    if (prev && (Object.keys(meta) as (keyof ProjectMeta)[]).every(k => prev[k] === meta[k])) return;
+    this.savedMeta = meta;
+    this.pendingMeta = meta;
+    this.schedule();
+  }
+
+  private schedule() {
+    if (!this.hasPending()) return;
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = setTimeout(() => { this.flush(); }, this.delay);
+  }
+
+  private hasPending() {
+    return this.dirty.size > 0 || this.removed.size > 0 || this.pendingOrder !== null || this.pendingMeta !== null;
+  }
+
+  /** 立即寫出所有待存變更；頁面隱藏或關閉前呼叫。 */
+  flush(): Promise<void> {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    if (!this.hasPending()) return this.writing;
+
+    const tasks = Array.from(this.dirty, id => this.saved.get(id)!);
+    const removed = Array.from(this.removed);
+    const order = this.pendingOrder;
+    const meta = this.pendingMeta;
+    this.dirty.clear();
+    this.removed.clear();
+    this.pendingOrder = null;
+    this.pendingMeta = null;
+
+    this.writing = this.writing.then(async () => {
+      const started = performance.now();
+      const db = await openDB();
+      const tx = db.transaction(['tasks', 'meta'], 'readwrite');
+      const taskStore = tx.objectStore('tasks');
+      tasks.forEach(t => taskStore.put(t));
+      removed.forEach(id => taskStore.delete(id));
+      if (order) tx.objectStore('meta').put(order, ORDER_KEY);
+      if (meta) tx.objectStore('meta').put(meta, META_KEY);
+      await transactionDone(tx);
+      if (this.onWrite) {
+        const bytes = tasks.reduce((n, t) => n + JSON.stringify(t).length, 0);
+        this.onWrite({ tasks: tasks.length, removed: removed.length, bytes, duration: performance.now() - started });
+      }
+    }).catch(err => {
+      console.error('Persisting tasks failed:', err);
+      // 寫入失敗時重新標記，待下一次排程重試。
+      tasks.forEach(t => { if (this.saved.has(t.id)) this.dirty.add(t.id); });
+      removed.forEach(id => { if (!this.saved.has(id)) this.removed.add(id); });
+      if (order && !this.pendingOrder) this.pendingOrder = this.savedOrder;
+      if (meta && !this.pendingMeta) this.pendingMeta = this.savedMeta;
+      this.schedule();
+    });
+    return this.writing;
+  }
+}
+
+/** 讀取單一任務的復原紀錄。 */
+export const loadTaskHistory = async (taskId: string): Promise<TaskHistoryRecord | undefined> => {
+  const db = await openDB();
+  return requestToPromise(db.transaction('history').objectStore('history').get(taskId));
+};
+
+/** 寫入或刪除（空紀錄）多筆任務的復原紀錄。 */
+export const saveTaskHistory = async (records: TaskHistoryRecord[]) => {
+  const db = await openDB();
+  const tx = db.transaction('history', 'readwrite');
+  const store = tx.objectStore('history');
+  records.forEach(r => {
+    if (r.undo.length === 0 && r.redo.length === 0) store.delete(r.taskId);
+    else store.put(r);
+  });
+  await transactionDone(tx);
+};
+
+/** 讀取各底圖的比例尺（以底圖網址為鍵）。 */
+export const loadCalibrations = async (): Promise<Record<string, Calibration>> => {
+  const db = await openDB();
+  return (await requestToPromise(db.transaction('meta').objectStore('meta').get(CALIBRATION_KEY))) || {};
+};
+
+export const saveCalibrations = async (calibrations: Record<string, Calibration>) => {
+  const db = await openDB();
+  const tx = db.transaction('meta', 'readwrite');
+  tx.objectStore('meta').put(calibrations, CALIBRATION_KEY);
+  await transactionDone(tx);
+};
@@ -0,0 +1,305 @@
+import { useSyncExternalStore } from 'react';
+import { FarmlandTask, InspectionData } from '../types';
+import { openDB, requestToPromise, transactionDone } from './db';
+import { getPhotoBlob, isPhotoRef, photoHash, toPhotoRef } from './photoStore';
+import { taskStore, TaskStoreEvent } from './taskStore';
+
+// 同步外寄匣：已完成（或曾同步過）的任務，以「上次伺服器確認的內容」為基準計算欄位差異，
+// 上線時分批上傳。每筆差異帶版本號；送出前先寫入 IndexedDB，重試時原樣重送，
+// 伺服器依版本號判斷重複，確保重試不會重複套用。
+const ENDPOINT_KEY = 'farmland_sync_endpoint';
+const DEVICE_KEY = 'farmland_device_id';
+const BATCH_SIZE = 50;
+const SYNC_DELAY = 5000;
+const RETRY_BASE = 5000;
+const RETRY_MAX = 5 * 60 * 1000;
+
+type SyncedFields = Pick<FarmlandTask, 'status' | 'markers' | 'ranges' | 'formData'>;
+
+export interface TaskChanges {
+  status?: FarmlandTask['status'];
+  markers?: FarmlandTask['markers'];
+  ranges?: FarmlandTask['ranges'];
+  formData?: Partial<InspectionData>;
+}
+
+export interface TaskDelta {
+  taskId: string;
+  code: string;
+  baseVersion: number;
+  version: number;
+  changes: TaskChanges;
+}
+
+export interface DeltaResult {
+  taskId: string;
+  status: 'applied' | 'duplicate' | 'conflict';
+  version: number;
+}
+
+interface OutboxEntry {
+  taskId: string;
+  version: number;          // 伺服器已確認的版本
+  shadow?: SyncedFields;    // 伺服器已確認的內容
+  pending?: TaskDelta;      // 已送出但尚未確認的差異
+}
+
+export interface SyncStatus {
+  pending: number;
+  syncing: boolean;
+  lastSyncedAt?: number;
+  error?: string;
+}
+
+const FIELDS = ['status', 'markers', 'ranges'] as const;
+
+const same = (a: unknown, b: unknown) => a === b || JSON.stringify(a) === JSON.stringify(b);
+
+const pick = ({ status, markers, ranges, formData }: FarmlandTask): SyncedFields => ({ status, markers, ranges, formData });
+
+/** 比對基準與目前任務，只留下變動的欄位；表單依子欄位比對。 */
+export const diffTask = (shadow: SyncedFields | undefined, task: FarmlandTask): TaskChanges => {
+  if (!shadow) return pick(task);
+  const changes: TaskChanges = {};
+  FIELDS.forEach(f => {
+    if (!same(shadow[f], task[f])) (changes as any)[f] = task[f];
+  });
+  const formData: Partial<InspectionData> = {};
+  const keys = new Set([...Object.keys(shadow.formData), ...Object.keys(task.formData)]) as Set<keyof InspectionData>;
+  keys.forEach(k => {
+    if (!same(shadow.formData[k], task.formData[k])) (formData as any)[k] = task.formData[k];
+  });
+  if (Object.keys(formData).length > 0) changes.formData = formData;
+  return changes;
+};
+
+const applyChanges = (shadow: SyncedFields | undefined, changes: TaskChanges): SyncedFields => {
+  const base = shadow || ({ formData: {} } as SyncedFields);
+  return { ...base, ...changes, formData: { ...base.formData, ...changes.formData } } as SyncedFields;
+};
+
+const isEmpty = (changes: TaskChanges) => Object.keys(changes).length === 0;
+
+const photoRefsOf = (changes: TaskChanges) => {
+  const photos = changes.formData?.photos;
+  if (!photos) return [];
+  return [...photos.irrigation, ...photos.land, ...photos.surrounding].filter(isPhotoRef);
+};
+
+export const getSyncEndpoint = () => localStorage.getItem(ENDPOINT_KEY) || '';
+
+export const setSyncEndpoint = (url: string) => {
+  localStorage.setItem(ENDPOINT_KEY, url.trim().replace(/\/+$/, ''));
+};
+
+const getDeviceId = () => {
+  let id = localStorage.getItem(DEVICE_KEY);
+  if (!id) localStorage.setItem(DEVICE_KEY, id = crypto.randomUUID());
+  return id;
+};
+
+const postJSON = async <T>(url: string, body: unknown): Promise<T> => {
+  const res = await fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
+  if (!res.ok) throw new Error(`HTTP ${res.status} ${url}`);
+  return res.json();
+};
+
+export class SyncOutbox {
+  private entries = new Map<string, OutboxEntry>();
+  private uploadedPhotos = new Set<string>();
+  private dirty = new Set<string>();
+  private status: SyncStatus = { pending: 0, syncing: false };
+  private listeners = new Set<() => void>();
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private retryDelay = RETRY_BASE;
+  private running: Promise<void> | null = null;
+
+  /** 載入外寄匣並開始追蹤任務庫異動；已完成或曾同步的任務先全部標記待比對。 */
+  async start() {
+    const db = await openDB();
+    const tx = db.transaction(['outbox', 'syncedPhotos']);
+    const [entries, photos] = await Promise.all([
+      requestToPromise(tx.objectStore('outbox').getAll()) as Promise<OutboxEntry[]>,
+      requestToPromise(tx.objectStore('syncedPhotos').getAllKeys()) as Promise<IDBValidKey[]>
+    ]);
+    entries.forEach(e => this.entries.set(e.taskId, e));
+    photos.forEach(h => this.uploadedPhotos.add(String(h)));
+    taskStore.getAll().forEach(t => { if (this.isTracked(t)) this.dirty.add(t.id); });
+
+    const unsubscribe = taskStore.onChange(this.track);
+    const onOnline = () => this.schedule(0);
+    window.addEventListener('online', onOnline);
+    this.setStatus({});
+    this.schedule(0);
+    return () => {
+      unsubscribe();
+      window.removeEventListener('online', onOnline);
+      if (this.timer) clearTimeout(this.timer);
+    };
+  }
+
+  private isTracked(task: FarmlandTask) {
+    return task.status === 'COMPLETED' || this.entries.has(task.id);
+  }
+
+  private track = (event: TaskStoreEvent) => {
+    let changed = false;
+    const removed: string[] = [];
+    event.changes.forEach(({ id, after }) => {
+      if (!after) {
+        // 任務已刪除（清空或匯入新專案）：不再比對；已送出未確認的差異仍重送至完成。
+        changed = this.dirty.delete(id) || changed;
+        if (this.entries.has(id) && !this.entries.get(id)!.pending) removed.push(id);
+      } else if (this.isTracked(after)) {
+        this.dirty.add(id);
+        changed = true;
+      }
+    });
+    if (removed.length > 0) {
+      this.forget(removed).catch(err => console.error('Pruning outbox failed:', err));
+    }
+    if (changed) {
+      this.setStatus({});
+      this.schedule(SYNC_DELAY);
+    }
+  };
+
+  private schedule(delay: number) {
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = setTimeout(() => { this.sync(); }, delay);
+  }
+
+  private setStatus(patch: Partial<SyncStatus>) {
+    const pending = new Set([...this.dirty, ...Array.from(this.entries.values()).filter(e => e.pending).map(e => e.taskId)]).size;
+    this.status = { ...this.status, ...patch, pending };
+    this.listeners.forEach(l => l());
+  }
+
+  getStatus = () => this.status;
+
+  subscribe = (listener: () => void) => {
+    this.listeners.add(listener);
+    return () => { this.listeners.delete(listener); };
+  };
+
+  /** 立即同步；未設定端點或離線時略過，失敗則以指數退避重排。 */
+  sync(): Promise<void> {
+    if (!this.running) {
+      this.running = this.run().finally(() => { this.running = null; });
+    }
+    return this.running;
+  }
+
+  private async run() {
+    const endpoint = getSyncEndpoint();
+    if (!endpoint || !navigator.onLine || this.status.pending === 0) return;
+    this.setStatus({ syncing: true, error: undefined });
+    try {
+      const deltas = await this.collect();
+      for (let i = 0; i < deltas.length; i += BATCH_SIZE) {
+        const batch = deltas.slice(i, i + BATCH_SIZE);
+        await this.uploadPhotos(endpoint, batch);
+        const { results } = await postJSON<{ results: DeltaResult[] }>(`${endpoint}/sync`, { deviceId: getDeviceId(), deltas: batch });
+        await this.acknowledge(batch, results);
+      }
+      this.retryDelay = RETRY_BASE;
+      this.setStatus({ syncing: false, lastSyncedAt: Date.now() });
+      if (this.status.pending > 0) this.schedule(SYNC_DELAY);
+    } catch (err) {
+      console.error('Sync failed:', err);
+      this.setStatus({ syncing: false, error: String(err) });
+      this.schedule(this.retryDelay);
+      this.retryDelay = Math.min(this.retryDelay * 2, RETRY_MAX);
+    }
+  }
+
+  /** 取出待送差異：尚未確認者原樣重送，其餘依基準重新計算並先寫入外寄匣。 */
+  private async collect() {
+    const deltas: TaskDelta[] = [];
+    const updated: OutboxEntry[] = [];
+    this.entries.forEach(e => { if (e.pending) deltas.push(e.pending); });
+    this.dirty.forEach(id => {
+      const entry = this.entries.get(id) || { taskId: id, version: 0 };
+      const task = taskStore.getTask(id);
+      if (entry.pending) return;
+      this.dirty.delete(id);
+      if (!task) return;
+      const changes = diffTask(entry.shadow, task);
+      if (isEmpty(changes)) return;
+      entry.pending = { taskId: id, code: task.code, baseVersion: entry.version, version: entry.version + 1, changes };
+      this.entries.set(id, entry);
+      updated.push(entry);
+      deltas.push(entry.pending);
+    });
+    await this.save(updated);
+    return deltas;
+  }
+
+  /** 只上傳伺服器尚未持有的照片。 */
+  private async uploadPhotos(endpoint: string, batch: TaskDelta[]) {
+    const hashes = Array.from(new Set(batch.flatMap(d => photoRefsOf(d.changes)).map(photoHash)))
+      .filter(h => !this.uploadedPhotos.has(h));
+    if (hashes.length === 0) return;
+    const { missing } = await postJSON<{ missing: string[] }>(`${endpoint}/photos/missing`, { hashes });
+    const missingSet = new Set(missing);
+    for (const hash of hashes) {
+      if (missingSet.has(hash)) {
+        const blob = await getPhotoBlob(toPhotoRef(hash));
+        if (!blob) continue;
+        const res = await fetch(`${endpoint}/photos/${hash}`, { method: 'PUT', headers: { 'Content-Type': blob.type }, body: blob });
+        if (!res.ok) throw new Error(`HTTP ${res.status} photo ${hash}`);
+      }
+      this.uploadedPhotos.add(hash);
+    }
+    const db = await openDB();
+    const tx = db.transaction('syncedPhotos', 'readwrite');
+    hashes.forEach(hash => tx.objectStore('syncedPhotos').put({ hash }));
+    await transactionDone(tx);
+  }
+
+  /** 套用伺服器回應；版本衝突時捨棄基準，下次改送完整內容。 */
+  private async acknowledge(batch: TaskDelta[], results: DeltaResult[]) {
+    const byId = new Map(results.map(r => [r.taskId, r]));
+    const updated: OutboxEntry[] = [];
+    batch.forEach(delta => {
+      const result = byId.get(delta.taskId);
+      const entry = this.entries.get(delta.taskId);
+      if (!result || !entry) return;
+      if (result.status === 'conflict') {
+        entry.version = result.version;
+        entry.shadow = undefined;
+        this.dirty.add(delta.taskId);
+      } else {
+        entry.version = delta.version;
+        entry.shadow = applyChanges(entry.shadow, delta.changes);
+      }
+      entry.pending = undefined;
+      updated.push(entry);
+    });
+    await this.save(updated);
+    // 送出期間已被刪除的任務，確認後即可移除。
+    await this.forget(updated.filter(e => !taskStore.has(e.taskId)).map(e => e.taskId));
+    this.setStatus({});
+  }
+
+  private async forget(ids: string[]) {
+    if (ids.length === 0) return;
+    ids.forEach(id => this.entries.delete(id));
+    const db = await openDB();
+    const tx = db.transaction('outbox', 'readwrite');
+    ids.forEach(id => tx.objectStore('outbox').delete(id));
+    await transactionDone(tx);
+  }
+
+  private async save(entries: OutboxEntry[]) {
+    if (entries.length === 0) return;
+    const db = await openDB();
+    const tx = db.transaction('outbox', 'readwrite');
+    entries.forEach(e => tx.objectStore('outbox').put(e));
+    await transactionDone(tx);
+  }
+}
+
+export const syncOutbox = new SyncOutbox();
+
+export const useSyncStatus = () => useSyncExternalStore(syncOutbox.subscribe, syncOutbox.getStatus);
@@ -0,0 +1,170 @@
+import { useCallback, useSyncExternalStore } from 'react';
+import { FarmlandTask } from '../types';
+
+// 正規化任務庫：以 id 索引任務並另存排序，單筆編輯只通知訂閱該筆的元件。
+export type TaskUpdate = Partial<FarmlandTask> | ((task: FarmlandTask) => Partial<FarmlandTask>);
+
+export interface TaskChange {
+  id: string;
+  before?: FarmlandTask;
+  after?: FarmlandTask;
+  replaced?: boolean;   // 整筆被取代（匯入或載入專案），而非編輯
+}
+
+export interface TaskStoreEvent {
+  changes: TaskChange[];
+  idsChanged: boolean;
+}
+
+type Listener = () => void;
+
+export class TaskStore {
+  private byId = new Map<string, FarmlandTask>();
+  private ids: string[] = [];
+  private version = 0;
+  private taskListeners = new Map<string, Set<Listener>>();
+  private idsListeners = new Set<Listener>();
+  private versionListeners = new Set<Listener>();
+  private changeListeners = new Set<(event: TaskStoreEvent) => void>();
+  private pending: TaskStoreEvent | null = null;
+  private batchDepth = 0;
+
+  getTask = (id: string | undefined) => (id ? this.byId.get(id) : undefined);
+  getIds = () => this.ids;
+  getVersion = () => this.version;
+  getAll = () => this.ids.map(id => this.byId.get(id)!);
+  has = (id: string) => this.byId.has(id);
+  get size() { return this.ids.length; }
+
+  update(id: string, update: TaskUpdate): FarmlandTask | undefined {
+    const before = this.byId.get(id);
+    if (!before) return undefined;
+    const updates = typeof update === 'function' ? update(before) : update;
+    const after = { ...before, ...updates };
+    this.byId.set(id, after);
+    this.emit([{ id, before, after }], false);
+    return after;
+  }
+
+  /** 新增任務；id 已存在者就地取代，維持原排序。 */
+  append(tasks: FarmlandTask[]) {
+    if (tasks.length === 0) return;
+    const changes: TaskChange[] = [];
+    let added = false;
+    const ids = this.ids.slice();
+    tasks.forEach(task => {
+      const before = this.byId.get(task.id);
+      if (!before) {
+        ids.push(task.id);
+        added = true;
+      }
+      this.byId.set(task.id, task);
+      changes.push({ id: task.id, before, after: task, replaced: !!before });
+    });
+    if (added) this.ids = ids;
+    this.emit(changes, added);
+  }
+
+  remove(idsToRemove: string[]) {
+    const removing = new Set(idsToRemove.filter(id => this.byId.has(id)));
+    if (removing.size === 0) return;
+    const changes: TaskChange[] = [];
+    removing.forEach(id => {
+      changes.push({ id, before: this.byId.get(id) });
+      this.byId.delete(id);
+    });
+    this.ids = this.ids.filter(id => !removing.has(id));
+    this.emit(changes, true);
+  }
+
+  replaceAll(tasks: FarmlandTask[]) {
+    const changes: TaskChange[] = [];
+    const next = new Map(tasks.map(t => [t.id, t]));
+    this.byId.forEach((before, id) => {
+      if (!next.has(id)) changes.push({ id, before });
+    });
+    tasks.forEach(task => {
+      const before = this.byId.get(task.id);
+      changes.push({ id: task.id, before, after: task, replaced: !!before });
+    });
+    this.byId = next;
+    this.ids = tasks.map(t => t.id);
+    this.emit(changes, true);
+  }
+
+  /** 將多次異動合併為一次通知。 */
+  batch<T>(fn: () => T): T {
+    this.batchDepth++;
+    try {
+      return fn();
+    } finally {
+      if (--this.batchDepth === 0 && this.pending) {
+        const event = this.pending;
+        this.pending = null;
+        this.notify(event);
+      }
+    }
+  }
+
+  private emit(changes: TaskChange[], idsChanged: boolean) {
+    if (this.batchDepth > 0) {
+      if (!this.pending) this.pending = { changes: [], idsChanged: false };
+      this.pending.changes.push(...changes);
+      this.pending.idsChanged = this.pending.idsChanged || idsChanged;
+      return;
+    }
+    this.notify({ changes, idsChanged });
+  }
+
+  private notify(event: TaskStoreEvent) {
+    this.version++;
+    this.changeListeners.forEach(l => l(event));
+    const notified = new Set<string>();
+    event.changes.forEach(({ id }) => {
+      if (notified.has(id)) return;
+      notified.add(id);
+      this.taskListeners.get(id)?.forEach(l => l());
+    });
+    if (event.idsChanged) this.idsListeners.forEach(l => l());
+    this.versionListeners.forEach(l => l());
+  }
+
+  subscribeTask = (id: string, listener: Listener) => {
+    let set = this.taskListeners.get(id);
+    if (!set) this.taskListeners.set(id, set = new Set());
+    set.add(listener);
+    return () => {
+      set!.delete(listener);
+      if (set!.size === 0) this.taskListeners.delete(id);
+    };
+  };
+
+  subscribeIds = (listener: Listener) => {
+    this.idsListeners.add(listener);
+    return () => { this.idsListeners.delete(listener); };
+  };
+
+  subscribeVersion = (listener: Listener) => {
+    this.versionListeners.add(listener);
+    return () => { this.versionListeners.delete(listener); };
+  };
+
+  /** 取得每次異動的明細，供持久化與索引等增量維護使用。 */
+  onChange(listener: (event: TaskStoreEvent) => void) {
+    this.changeListeners.add(listener);
+    return () => { this.changeListeners.delete(listener); };
+  }
+}
+
+export const taskStore = new TaskStore();
+
+export const useTask = (id: string | undefined, store: TaskStore = taskStore) => {
+  const subscribe = useCallback((l: Listener) => (id ? store.subscribeTask(id, l) : () => {}), [id, store]);
+  return useSyncExternalStore(subscribe, () => store.getTask(id));
+};
+
+export const useTaskIds = (store: TaskStore = taskStore) =>
+  useSyncExternalStore(store.subscribeIds, store.getIds);
+
+export const useTaskVersion = (store: TaskStore = taskStore) =>
+  useSyncExternalStore(store.subscribeVersion, store.getVersion);
@@ -16,15 +16,19 @@ export interface PlotRange {
   points: Point[];
 }
 
+// 照片參照：`photo:<sha256>` 指向 IndexedDB 照片庫；舊資料可能仍為 data URL。
+export type PhotoRef = string;
+
 export interface InspectionData {
   irrigationMethods: string[];
   landStatus: string[];
   otherStatus?: string;
   photos: {
-    irrigation: string[];
-    land: string[];
-    surrounding: string[];
+    irrigation: PhotoRef[];
+    land: PhotoRef[];
+    surrounding: PhotoRef[];
   };
+  analysis?: Record<PhotoRef, string>; // AI 現勘建議，依照片參照存放
 }
 
 export interface FarmlandTask {
@@ -39,10 +43,15 @@ export interface FarmlandTask {
   formData: InspectionData;
 }
 
+// 任務本身存放於 services/taskStore，AppState 只保留專案與畫面狀態。
 export interface AppState {
   projectName: string;
-  tasks: FarmlandTask[];
-  view: 'list' | 'editor' | 'setup';
+  view: 'list' | 'editor' | 'setup' | 'dashboard';
   currentTaskId?: string;
   isEditingMap: boolean;
 }
+
+// 完整專案內容，用於載入、匯出與匯入。
+export interface ProjectSnapshot extends AppState {
+  tasks: FarmlandTask[];
+}